@@ -0,0 +1,132 @@
+"""Feedback controller that trades quality for speed to hold a latency budget.
+
+The controller walks a fixed ladder of quality levels. Each step down first
+lowers motion-gate sensitivity (more static frames skipped), then the
+inference image size, then raises the frame stride (the model only sees
+every n-th frame). It watches the smoothed per-frame processing cost and
+steps down when the cost stays above the budget, e.g. under CPU contention.
+It steps back up once the cost has stayed comfortably below the budget for
+a while. Its decisions are published as metrics.
+"""
+from typing import List, NamedTuple, Optional, Sequence
+
+from metrics import REGISTRY, MetricsRegistry
+
+IMGSZ_LADDER = (640, 512, 416, 320)
+
+
+class QualityLevel(NamedTuple):
+    imgsz: int
+    stride: int
+    motion_sensitivity: Optional[float]
+
+
+def build_ladder(base_imgsz: int, motion_sensitivity: Optional[float], max_stride: int = 4,
+                 imgsz_levels: Sequence[int] = IMGSZ_LADDER, min_sensitivity: float = 0.1) -> List[QualityLevel]:
+    """Quality levels from best (index 0) to cheapest"""
+    ladder = [QualityLevel(base_imgsz, 1, motion_sensitivity)]
+    sensitivity = motion_sensitivity
+    if sensitivity is not None:
+        for step in (0.5, 0.25):
+            sensitivity = max(motion_sensitivity * step, min_sensitivity)
+            if sensitivity < ladder[-1].motion_sensitivity:
+                ladder.append(QualityLevel(base_imgsz, 1, sensitivity))
+    for imgsz in imgsz_levels:
+        if imgsz < base_imgsz:
+            ladder.append(QualityLevel(imgsz, 1, sensitivity))
+    smallest = ladder[-1].imgsz
+    for stride in range(2, max(int(max_stride), 1) + 1):
+        ladder.append(QualityLevel(smallest, stride, sensitivity))
+    return ladder
+
+
+class AdaptiveController:
+    """Holds per-frame processing time near ``1 / target_fps``.
+
+    Call :meth:`should_infer` before each frame (applies the stride) and
+    :meth:`observe` with the processing time of each frame the detector ran
+    on. That cost is spread over the stride, so frames the model skips don't
+    need to be observed. Sizes other
+    than the loaded one only take effect on backends that accept a per-call
+    ``imgsz`` (PyTorch, or ONNX/OpenVINO graphs exported with dynamic shapes);
+    fixed-shape exports keep their size, so the ladder leaves it alone.
+    """
+
+    def __init__(self, detector, target_fps: float = 10.0, motion_gate=None, max_stride: int = 4,
+                 smoothing: float = 0.1, degrade_ratio: float = 1.1, restore_ratio: float = 0.6,
+                 settle_frames: int = 30, metrics: MetricsRegistry = REGISTRY):
+        self.detector = detector
+        self.motion_gate = motion_gate
+        self.budget = 1.0 / max(target_fps, 0.1)
+        self.smoothing = smoothing
+        self.degrade_ratio = degrade_ratio
+        self.restore_ratio = restore_ratio
+        self.settle_frames = settle_frames
+        resizable = (getattr(detector, 'backend', 'pytorch') == "pytorch"
+                     or getattr(getattr(detector, 'model', None), 'dynamic', False))
+        imgsz_levels = IMGSZ_LADDER if resizable else ()
+        self.ladder = build_ladder(detector.imgsz,
+                                   motion_gate.sensitivity if motion_gate is not None else None,
+                                   max_stride, imgsz_levels)
+        self.level = 0
+        self.cost: Optional[float] = None
+        self._frames_at_level = 0
+        self._frame_index = 0
+
+        self._level_gauge = metrics.gauge("adaptive_level", "Current quality level (0 = best)")
+        self._imgsz_gauge = metrics.gauge("adaptive_imgsz", "Inference image size chosen by the controller")
+        self._stride_gauge = metrics.gauge("adaptive_stride", "Frame stride chosen by the controller")
+        self._sensitivity_gauge = metrics.gauge("adaptive_motion_sensitivity",
+                                                "Motion-gate sensitivity chosen by the controller")
+        self._cost_gauge = metrics.gauge("adaptive_frame_cost_seconds", "Smoothed processing time per detector run")
+        self._budget_gauge = metrics.gauge("adaptive_budget_seconds", "Target processing time per frame")
+        self._budget_gauge.set(self.budget)
+        self._changes = {
+            direction: metrics.counter("adaptive_adjustments_total", "Quality level changes",
+                                       {'direction': direction})
+            for direction in ("degrade", "restore")
+        }
+        self._apply()
+
+    @property
+    def current(self) -> QualityLevel:
+        return self.ladder[self.level]
+
+    def should_infer(self) -> bool:
+        """Whether the stride lets the model see this frame"""
+        infer = self._frame_index % self.current.stride == 0
+        self._frame_index += 1
+        return infer
+
+    def observe(self, seconds: float):
+        """Record the processing time of a detector run and adjust the level if needed"""
+        self.cost = seconds if self.cost is None else self.cost + self.smoothing * (seconds - self.cost)
+        self._cost_gauge.set(self.cost)
+        self._frames_at_level += 1
+        if self._frames_at_level < self.settle_frames:
+            return
+        # Per-frame cost: one run pays for ``stride`` frames
+        cost = self.cost / self.current.stride
+        if cost > self.budget * self.degrade_ratio and self.level < len(self.ladder) - 1:
+            self._set_level(self.level + 1, "degrade")
+        elif (cost < self.budget * self.restore_ratio and self.level > 0
+              and self._frames_at_level >= self.settle_frames * 3):
+            # Restoring waits longer than degrading so the controller doesn't oscillate
+            self._set_level(self.level - 1, "restore")
+
+    def _set_level(self, level: int, direction: str):
+        self.level = level
+        self._frames_at_level = 0
+        self._changes[direction].inc()
+        self._apply()
+
+    def _apply(self):
+        level = self.current
+        self.detector.imgsz = level.imgsz
+        if self.motion_gate is not None and level.motion_sensitivity is not None:
+            self.motion_gate.set_sensitivity(level.motion_sensitivity)
+        self._level_gauge.set(self.level)
+        self._imgsz_gauge.set(level.imgsz)
+        self._stride_gauge.set(level.stride)
+        if level.motion_sensitivity is not None:
+            self._sensitivity_gauge.set(level.motion_sensitivity)
@@ -0,0 +1,406 @@
+"""CPU inference backends for DroneDetector.
+
+The default "pytorch" backend is the Ultralytics ``YOLO`` model itself. The
+ONNX Runtime and OpenVINO backends run an exported copy of the same weights
+with a NumPy-only letterbox / decode / NMS path and return ``Detections``
+directly, so ``DroneDetector.detect``/``process_results`` work unchanged.
+
+Exported artifacts are cached under ``Model/.cache/<model hash>/`` so the
+export (and INT8 calibration) only happens once per set of weights.
+"""
+import hashlib
+import logging
+import math
+import os
+import shutil
+import time
+from typing import Dict, Iterable, List, Optional
+
+import cv2
+import numpy as np
+
+from detections import Detections
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("pytorch", "onnx", "onnx-int8", "openvino")
+DEFAULT_CACHE_DIR = os.path.join("Model", ".cache")
+
+
+def model_hash(model_path: str, chunk_size: int = 1 << 20) -> str:
+    """Short content hash of a weights file, used as the export cache key"""
+    digest = hashlib.sha256()
+    with open(model_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def artifact_dir(model_path: str, cache_dir: str = DEFAULT_CACHE_DIR) -> str:
+    path = os.path.join(cache_dir, model_hash(model_path))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def export_onnx(model_path: str, imgsz: int = 640, cache_dir: str = DEFAULT_CACHE_DIR) -> str:
+    """Export weights to ONNX once and return the cached path"""
+    target = os.path.join(artifact_dir(model_path, cache_dir), f"model_{imgsz}.onnx")
+    if not os.path.exists(target):
+        from ultralytics import YOLO
+        exported = YOLO(model_path).export(format="onnx", imgsz=imgsz, dynamic=False, simplify=True)
+        shutil.move(str(exported), target)
+    return target
+
+
+def export_openvino(model_path: str, imgsz: int = 640, cache_dir: str = DEFAULT_CACHE_DIR) -> str:
+    """Export weights to OpenVINO IR once and return the cached .xml path"""
+    target_dir = os.path.join(artifact_dir(model_path, cache_dir), f"openvino_{imgsz}")
+    if not os.path.isdir(target_dir):
+        from ultralytics import YOLO
+        exported = YOLO(model_path).export(format="openvino", imgsz=imgsz)
+        shutil.move(str(exported), target_dir)
+    xml_files = [name for name in os.listdir(target_dir) if name.endswith(".xml")]
+    if not xml_files:
+        raise FileNotFoundError(f"No OpenVINO IR found in {target_dir}")
+    return os.path.join(target_dir, xml_files[0])
+
+
+def int8_path(model_path: str, imgsz: int = 640, cache_dir: str = DEFAULT_CACHE_DIR) -> str:
+    return os.path.join(artifact_dir(model_path, cache_dir), f"model_{imgsz}_int8.onnx")
+
+
+def quantize_int8(model_path: str, calibration_frames: Iterable[np.ndarray], imgsz: int = 640,
+                  cache_dir: str = DEFAULT_CACHE_DIR, force: bool = False) -> str:
+    """Build a static INT8 ONNX model calibrated on sample BGR frames"""
+    from onnxruntime.quantization import (CalibrationDataReader, QuantFormat, QuantType,
+                                          quantize_static)
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    target = int8_path(model_path, imgsz, cache_dir)
+    if os.path.exists(target) and not force:
+        return target
+
+    fp32_path = export_onnx(model_path, imgsz, cache_dir)
+    prepared_path = fp32_path.replace(".onnx", "_prep.onnx")
+    quant_pre_process(fp32_path, prepared_path, skip_symbolic_shape=True)
+
+    frames = list(calibration_frames)
+    if not frames:
+        raise ValueError("INT8 calibration needs at least one sample frame")
+
+    import onnxruntime as ort
+    input_name = ort.InferenceSession(prepared_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+
+    class FrameReader(CalibrationDataReader):
+        def __init__(self):
+            self.rewind()
+
+        def get_next(self):
+            return next(self._batches, None)
+
+        def rewind(self):
+            self._batches = iter([{input_name: letterbox(frame, imgsz)[0]} for frame in frames])
+
+    reader = FrameReader()
+    quantize_static(prepared_path, target, reader, quant_format=QuantFormat.QDQ,
+                    activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8,
+                    per_channel=True)
+    os.remove(prepared_path)
+    return target
+
+
+def sample_frames(source: str, count: int = 64) -> List[np.ndarray]:
+    """Evenly spaced BGR frames from a video file or a directory of images"""
+    if os.path.isdir(source):
+        names = sorted(name for name in os.listdir(source)
+                       if name.lower().endswith((".jpg", ".jpeg", ".png", ".bmp")))
+        step = max(len(names) // count, 1)
+        frames = [cv2.imread(os.path.join(source, name)) for name in names[::step][:count]]
+        return [frame for frame in frames if frame is not None]
+
+    cap = cv2.VideoCapture(source)
+    total = max(int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), 1)
+    step = max(total // count, 1)
+    frames = []
+    index = 0
+    while len(frames) < count:
+        ret = cap.grab()
+        if not ret:
+            break
+        if index % step == 0:
+            ret, frame = cap.retrieve()
+            if ret:
+                frames.append(frame)
+        index += 1
+    cap.release()
+    return frames
+
+
+def letterbox(frame: np.ndarray, imgsz: int = 640, pad_value: int = 114):
+    """Resize with unchanged aspect ratio and pad to imgsz x imgsz.
+
+    Returns (NCHW float32 RGB tensor in [0, 1], scale, (pad_x, pad_y)).
+    """
+    height, width = frame.shape[:2]
+    scale = min(imgsz / height, imgsz / width)
+    new_width, new_height = int(round(width * scale)), int(round(height * scale))
+    pad_x, pad_y = (imgsz - new_width) / 2, (imgsz - new_height) / 2
+
+    resized = frame
+    if (new_width, new_height) != (width, height):
+        resized = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+    left, top = int(round(pad_x - 0.1)), int(round(pad_y - 0.1))
+    canvas = np.full((imgsz, imgsz, 3), pad_value, dtype=np.uint8)
+    canvas[top:top + new_height, left:left + new_width] = resized
+
+    tensor = canvas[:, :, ::-1].transpose(2, 0, 1)[None].astype(np.float32) / 255.0
+    return np.ascontiguousarray(tensor), scale, (left, top)
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """Greedy non-maximum suppression; returns kept indices sorted by score"""
+    order = np.argsort(-scores)
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    keep = []
+    while order.size:
+        best = order[0]
+        keep.append(best)
+        rest = order[1:]
+        xx1 = np.maximum(boxes[best, 0], boxes[rest, 0])
+        yy1 = np.maximum(boxes[best, 1], boxes[rest, 1])
+        xx2 = np.minimum(boxes[best, 2], boxes[rest, 2])
+        yy2 = np.minimum(boxes[best, 3], boxes[rest, 3])
+        intersection = np.clip(xx2 - xx1, 0, None) * np.clip(yy2 - yy1, 0, None)
+        iou = intersection / np.maximum(areas[best] + areas[rest] - intersection, 1e-6)
+        order = rest[iou <= iou_threshold]
+    return np.array(keep, dtype=np.int64)
+
+
+def decode_predictions(output: np.ndarray, conf: float, iou_threshold: float, scale: float,
+                       pad, frame_shape, class_names: Dict[int, str], max_det: int = 300) -> Detections:
+    """Decode a raw (4 + num_classes, N) YOLOv8-style head output into Detections"""
+    predictions = output.T
+    class_scores = predictions[:, 4:]
+    class_ids = class_scores.argmax(axis=1)
+    scores = class_scores[np.arange(len(class_ids)), class_ids]
+    mask = scores >= conf
+    if not mask.any():
+        return Detections.empty(class_names)
+
+    xywh, scores, class_ids = predictions[mask, :4], scores[mask], class_ids[mask]
+    boxes = np.empty_like(xywh)
+    boxes[:, :2] = xywh[:, :2] - xywh[:, 2:] / 2
+    boxes[:, 2:] = xywh[:, :2] + xywh[:, 2:] / 2
+
+    # Class-aware NMS by offsetting each class into its own coordinate range
+    offsets = class_ids[:, None].astype(np.float32) * 7680.0
+    keep = nms(boxes + offsets, scores, iou_threshold)[:max_det]
+    boxes, scores, class_ids = boxes[keep], scores[keep], class_ids[keep]
+
+    boxes[:, [0, 2]] = (boxes[:, [0, 2]] - pad[0]) / scale
+    boxes[:, [1, 3]] = (boxes[:, [1, 3]] - pad[1]) / scale
+    height, width = frame_shape[:2]
+    boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, width)
+    boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, height)
+    return Detections(boxes, scores, class_ids, class_names)
+
+
+class NumpyYoloBackend:
+    """Shared NumPy pre/post-processing around a raw exported YOLO graph.
+
+    Called like an Ultralytics model: ``backend(frame_or_frames, conf=...)``
+    returns one Detections per frame, with ``orig_img`` and ``speed`` (ms per
+    stage) attached for rendering and benchmarking. A per-call ``imgsz`` is
+    honoured by graphs exported with dynamic input shapes (rounded up to the
+    32 px model stride); fixed-shape graphs keep the size they were exported
+    at and log a warning the first time another size is asked for.
+    """
+
+    name = "numpy"
+    # Subclasses set this when the graph accepts any input height and width
+    dynamic = False
+
+    def __init__(self, class_names: Dict[int, str], imgsz: int = 640, iou_threshold: float = 0.7):
+        self.class_names = class_names
+        self.imgsz = imgsz
+        self.iou_threshold = iou_threshold
+        self._ignored_sizes = set()
+
+    def _infer(self, tensor: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def __call__(self, source, conf: float = 0.25, verbose: bool = False, imgsz: Optional[int] = None,
+                 **kwargs) -> List[Detections]:
+        frames = source if isinstance(source, (list, tuple)) else [source]
+        imgsz = self._input_size(imgsz)
+        return [self._predict(frame, conf, imgsz) for frame in frames]
+
+    def _input_size(self, imgsz: Optional[int]) -> int:
+        if imgsz is None or imgsz == self.imgsz:
+            return self.imgsz
+        if self.dynamic:
+            return int(math.ceil(imgsz / 32) * 32)
+        if imgsz not in self._ignored_sizes:
+            self._ignored_sizes.add(imgsz)
+            logger.warning("Model %s diekspor dengan ukuran tetap %d; imgsz %d diabaikan",
+                           getattr(self, 'path', self.name), self.imgsz, imgsz)
+        return self.imgsz
+
+    def _predict(self, frame: np.ndarray, conf: float, imgsz: int) -> Detections:
+        start = time.perf_counter()
+        tensor, scale, pad = letterbox(frame, imgsz)
+        preprocessed = time.perf_counter()
+        output = self._infer(tensor)
+        inferred = time.perf_counter()
+        detections = decode_predictions(output[0], conf, self.iou_threshold, scale, pad,
+                                        frame.shape, self.class_names)
+        done = time.perf_counter()
+
+        detections.orig_img = frame
+        detections.speed = {
+            'preprocess': (preprocessed - start) * 1000,
+            'inference': (inferred - preprocessed) * 1000,
+            'postprocess': (done - inferred) * 1000,
+        }
+        return detections
+
+
+class OnnxBackend(NumpyYoloBackend):
+    name = "onnx"
+
+    def __init__(self, onnx_path: str, class_names: Dict[int, str], imgsz: int = 640,
+                 iou_threshold: float = 0.7, threads: Optional[int] = None):
+        super().__init__(class_names, imgsz, iou_threshold)
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        # Worker processes sharing a machine cap their pools through OMP_NUM_THREADS
+        threads = threads or int(os.getenv("OMP_NUM_THREADS", "0"))
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        # Symbolic or unknown dimensions come back as strings or None
+        self.dynamic = not all(isinstance(dim, int) for dim in model_input.shape[2:])
+        self.path = onnx_path
+
+    def _infer(self, tensor):
+        return self.session.run(None, {self.input_name: tensor})[0]
+
+
+class OpenVinoBackend(NumpyYoloBackend):
+    name = "openvino"
+
+    def __init__(self, xml_path: str, class_names: Dict[int, str], imgsz: int = 640,
+                 iou_threshold: float = 0.7):
+        super().__init__(class_names, imgsz, iou_threshold)
+        import openvino as ov
+
+        self.compiled = ov.Core().compile_model(xml_path, "CPU")
+        self.output = self.compiled.output(0)
+        self.dynamic = self.compiled.input(0).get_partial_shape().is_dynamic
+        self.path = xml_path
+
+    def _infer(self, tensor):
+        return self.compiled(tensor)[self.output]
+
+
+def create_backend(model_path: str, backend: str, class_names: Dict[int, str], imgsz: int = 640,
+                   cache_dir: str = DEFAULT_CACHE_DIR):
+    """Build the requested backend, exporting and caching artifacts as needed"""
+    if backend == "pytorch":
+        from ultralytics import YOLO
+        return YOLO(model_path)
+    if backend == "onnx":
+        return OnnxBackend(export_onnx(model_path, imgsz, cache_dir), class_names, imgsz)
+    if backend == "onnx-int8":
+        path = int8_path(model_path, imgsz, cache_dir)
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"INT8 model belum dikalibrasi: jalankan 'python backends.py quantize --model {model_path} "
+                f"--calibration <video/folder>' terlebih dahulu"
+            )
+        return OnnxBackend(path, class_names, imgsz)
+    if backend == "openvino":
+        return OpenVinoBackend(export_openvino(model_path, imgsz, cache_dir), class_names, imgsz)
+    raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
+
+
+def compare_backends(reference, candidate, frames: Iterable[np.ndarray], confidence: float = 0.5,
+                     iou_threshold: float = 0.5) -> Dict[str, float]:
+    """Accuracy/latency parity of two DroneDetectors over the same frames.
+
+    Recall/precision treat the reference detector's boxes as ground truth.
+    """
+    from tracker import iou_matrix
+
+    matched = reference_total = candidate_total = 0
+    reference_time = candidate_time = 0.0
+    frames = list(frames)
+    for frame in frames:
+        start = time.perf_counter()
+        _, expected = reference.process_results(reference.detect(frame, confidence), render=False)
+        reference_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        _, actual = candidate.process_results(candidate.detect(frame, confidence), render=False)
+        candidate_time += time.perf_counter() - start
+
+        reference_total += len(expected)
+        candidate_total += len(actual)
+        if len(expected) and len(actual):
+            iou = iou_matrix(expected.boxes, actual.boxes)
+            iou[expected.class_ids[:, None] != actual.class_ids[None, :]] = 0.0
+            matched += int(np.count_nonzero(iou.max(axis=1) >= iou_threshold))
+
+    count = max(len(frames), 1)
+    return {
+        'frames': len(frames),
+        'recall': matched / reference_total if reference_total else 1.0,
+        'precision': matched / candidate_total if candidate_total else 1.0,
+        'reference_ms': reference_time * 1000 / count,
+        'candidate_ms': candidate_time * 1000 / count,
+        'speedup': reference_time / candidate_time if candidate_time else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Export, quantize and compare inference backends")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Export ONNX/OpenVINO artifacts into the cache")
+    export_parser.add_argument("--format", choices=["onnx", "openvino"], default="onnx")
+
+    quantize_parser = subparsers.add_parser("quantize", help="Build the INT8 ONNX model")
+    quantize_parser.add_argument("--calibration", required=True, help="Video file or image folder")
+    quantize_parser.add_argument("--frames", type=int, default=64)
+
+    parity_parser = subparsers.add_parser("parity", help="Compare a backend against pytorch")
+    parity_parser.add_argument("--backend", choices=BACKENDS, default="onnx")
+    parity_parser.add_argument("--source", required=True, help="Video file or image folder")
+    parity_parser.add_argument("--frames", type=int, default=64)
+    parity_parser.add_argument("--confidence", type=float, default=0.5)
+
+    for sub in (export_parser, quantize_parser, parity_parser):
+        sub.add_argument("--model", default="Model/YoloV12_Best.pt")
+        sub.add_argument("--imgsz", type=int, default=640)
+
+    args = parser.parse_args()
+    if args.command == "export":
+        exporter = export_onnx if args.format == "onnx" else export_openvino
+        print(exporter(args.model, args.imgsz))
+    elif args.command == "quantize":
+        print(quantize_int8(args.model, sample_frames(args.calibration, args.frames), args.imgsz, force=True))
+    else:
+        from detector import DroneDetector
+
+        reference = DroneDetector(args.model, backend="pytorch", imgsz=args.imgsz)
+        candidate = DroneDetector(args.model, backend=args.backend, imgsz=args.imgsz)
+        report = compare_backends(reference, candidate, sample_frames(args.source, args.frames),
+                                  args.confidence)
+        print(json.dumps(report, indent=2))
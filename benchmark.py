@@ -0,0 +1,306 @@
+"""Per-stage performance benchmark for the detection pipeline.
+
+Runs a local video (or a generated synthetic clip) through
+``video_processing.process_video``, the code the app uses for uploads, and
+reports p50/p95/p99 latency per stage, frames/s, model load/warm-up time and
+peak RSS as JSON. Decode and encode times come from process_video's stage
+callback; model and drawing stages from a thin wrapper around the detector:
+
+    python benchmark.py --source synthetic --frames 300 --output run.json
+    python benchmark.py --screener-model Model/YoloV8_Best.pt --cascade-mode crops
+    python benchmark.py --source clip.mp4 --baseline run.json --threshold 0.1
+
+With --baseline the run exits with status 1 when any stage's p95 latency or
+the overall throughput regresses by more than the threshold. With a
+--screener-model the two-stage cascade is measured and the report includes
+the fraction of frames escalated to the main model.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import cv2
+import numpy as np
+
+from backends import BACKENDS
+
+STAGES = ("decode", "preprocess", "inference", "postprocess", "annotation", "encode")
+
+
+def make_synthetic_video(path: str, frames: int = 300, width: int = 640, height: int = 480,
+                         fps: int = 15, seed: int = 0) -> str:
+    """Write a sky-like clip with a few moving dark objects"""
+    rng = np.random.default_rng(seed)
+    gradient = np.linspace(235, 170, height, dtype=np.float32)[:, None, None]
+    sky = np.broadcast_to(gradient * np.array([1.0, 0.92, 0.78], dtype=np.float32),
+                          (height, width, 3)).astype(np.uint8)
+    objects = [(rng.uniform(0, width), rng.uniform(0, height * 0.6),
+                rng.uniform(-4, 4), rng.uniform(-2, 2), rng.integers(8, 30)) for _ in range(3)]
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    for index in range(frames):
+        frame = sky.copy()
+        for x, y, dx, dy, size in objects:
+            cx = int((x + dx * index) % width)
+            cy = int((y + dy * index) % height)
+            cv2.rectangle(frame, (cx, cy), (cx + size, cy + size // 2), (40, 40, 40), -1)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def percentile_summary(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {'count': 0, 'mean_ms': 0.0, 'p50_ms': 0.0, 'p95_ms': 0.0, 'p99_ms': 0.0}
+    array = np.asarray(values, dtype=np.float64)
+    p50, p95, p99 = np.percentile(array, [50, 95, 99])
+    return {
+        'count': int(array.size),
+        'mean_ms': float(array.mean()),
+        'p50_ms': float(p50),
+        'p95_ms': float(p95),
+        'p99_ms': float(p99),
+    }
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _model_speed(result) -> Dict[str, float]:
+    """Per-stage ms reported by the backend (Ultralytics Results or our Detections)"""
+    speed = getattr(result, 'speed', None) or {}
+    return {stage: float(speed.get(stage) or 0.0) for stage in ('preprocess', 'inference', 'postprocess')}
+
+
+class StageTimingDetector:
+    """Wraps the detector handed to ``process_video`` and times its calls per stage.
+
+    Preprocess, inference and model postprocess come from the speed each result
+    reports; extracting detections is added to postprocess and the fast
+    renderer's ``render`` is the annotation stage. With the ultralytics
+    renderer, ``result.plot()`` is not hooked and counts towards postprocess.
+    Everything else is delegated to the wrapped detector.
+    """
+
+    def __init__(self, detector, timings: Dict[str, List[float]]):
+        self.detector = detector
+        self.timings = timings
+        self.record = True
+        self.detections = 0
+        self._render_ms = 0.0
+        renderer = detector.renderer
+        draw = renderer.render
+
+        def timed_render(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return draw(*args, **kwargs)
+            finally:
+                self._render_ms += (time.perf_counter() - start) * 1000
+
+        # Shadows the method on this renderer only, so the detector's own calls are timed
+        renderer.render = timed_render
+
+    def __getattr__(self, name):
+        return getattr(self.detector, name)
+
+    def detect_batch(self, frames, confidence_threshold=0.5, rois=None):
+        results = self.detector.detect_batch(frames, confidence_threshold, rois=rois)
+        if results is None:
+            raise RuntimeError("Detector returned no results")
+        if self.record:
+            for result in results:
+                speed = _model_speed(result)
+                self.timings['preprocess'].append(speed['preprocess'])
+                self.timings['inference'].append(speed['inference'])
+                # Extraction time is added to this entry in process_batch_results
+                self.timings['postprocess'].append(speed['postprocess'])
+        return results
+
+    def process_batch_results(self, results, render=True):
+        processed = []
+        recorded = len(self.timings['postprocess']) - len(results)
+        for index, result in enumerate(results):
+            self._render_ms = 0.0
+            start = time.perf_counter()
+            processed.extend(self.detector.process_batch_results([result], render=render))
+            total_ms = (time.perf_counter() - start) * 1000
+            if self.record:
+                self.timings['postprocess'][recorded + index] += max(total_ms - self._render_ms, 0.0)
+                if render:
+                    self.timings['annotation'].append(self._render_ms)
+                self.detections += len(processed[-1][1])
+        return processed
+
+
+def run_benchmark(detector, source: str, confidence: float = 0.5, max_frames: int = 0,
+                  batch_size: int = 1, warmup: int = 5) -> Dict:
+    """Run ``source`` through ``video_processing.process_video`` and time each stage per frame"""
+    from video_processing import process_video
+    from video_reader import VideoReader
+
+    with VideoReader(source) as reader:
+        width, height, fps = reader.width, reader.height, reader.fps
+
+    timings = {stage: [] for stage in STAGES}
+    timed = StageTimingDetector(detector, timings)
+
+    def record_stage(stage, ms):
+        if timed.record:
+            timings[stage].append(ms)
+
+    def run(frames):
+        output_path, _ = process_video(source, timed, confidence, batch_size=batch_size,
+                                       end_time=frames / fps if frames else None,
+                                       stage_callback=record_stage)
+        os.unlink(output_path)
+
+    # Warm-up frames pay for lazy initialisation and are not recorded
+    if warmup:
+        timed.record = False
+        run(warmup)
+        timed.record = True
+    if hasattr(detector, 'frames_screened'):
+        # Only measured frames count towards the cascade's escalation rate
+        detector.frames_screened = detector.frames_escalated = 0
+
+    wall_start = time.perf_counter()
+    run(max_frames)
+    wall = time.perf_counter() - wall_start
+    frames_done = len(timings['decode'])
+
+    report = {
+        'source': source,
+        'frames': frames_done,
+        'resolution': [width, height],
+        'batch_size': batch_size,
+        'backend': getattr(detector, 'backend', 'pytorch'),
+        'model': getattr(detector, 'model_path', None),
+        'imgsz': getattr(detector, 'imgsz', None),
+        'wall_seconds': wall,
+        'fps': frames_done / wall if wall > 0 else 0.0,
+        'detections': timed.detections,
+        'peak_rss_mb': peak_rss_mb(),
+        'stages': {stage: percentile_summary(values) for stage, values in timings.items()},
+        'platform': {'python': platform.python_version(), 'machine': platform.machine(),
+                     'cpus': os.cpu_count()},
+    }
+    screener = getattr(detector, 'screener', None)
+    if screener is not None:
+        report['cascade'] = {
+            'screener_model': screener.model_path,
+            'screener_imgsz': screener.imgsz,
+            'screen_confidence': detector.screen_confidence,
+            'escalate': detector.escalate,
+            'frames_screened': detector.frames_screened,
+            'frames_escalated': detector.frames_escalated,
+            'escalated_fraction': detector.escalated_fraction,
+        }
+    return report
+
+
+def compare_to_baseline(current: Dict, baseline: Dict, threshold: float = 0.10) -> List[str]:
+    """Return human-readable regressions beyond ``threshold`` (fractional)"""
+    regressions = []
+    for stage, stats in current['stages'].items():
+        base = baseline.get('stages', {}).get(stage)
+        if not base or not base.get('count') or not stats.get('count'):
+            continue
+        # Sub-0.1 ms stages are dominated by timer noise
+        if base['p95_ms'] >= 0.1 and stats['p95_ms'] > base['p95_ms'] * (1 + threshold):
+            regressions.append(f"{stage}: p95 {stats['p95_ms']:.2f} ms vs baseline {base['p95_ms']:.2f} ms")
+    if baseline.get('fps') and current['fps'] < baseline['fps'] * (1 - threshold):
+        regressions.append(f"fps: {current['fps']:.2f} vs baseline {baseline['fps']:.2f}")
+    return regressions
+
+
+def build_detector(args):
+    from detector import DroneDetector
+    detector = DroneDetector(args.model, renderer=args.renderer, output_channels="BGR",
+                             backend=args.backend, imgsz=args.imgsz)
+    if args.screener_model:
+        from cascade import build_cascade
+        detector = build_cascade(detector, args.screener_model, args.screener_imgsz,
+                                 args.screener_confidence, args.cascade_mode)
+    return detector
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Per-stage pipeline benchmark")
+    parser.add_argument("--source", default="synthetic", help="Video file, or 'synthetic'")
+    parser.add_argument("--frames", type=int, default=300, help="Frames to measure (0 = whole video)")
+    parser.add_argument("--model", default="Model/YoloV12_Best.pt")
+    parser.add_argument("--backend", default="pytorch", choices=BACKENDS)
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--screener-model", help="Benchmark a cascade with this screener in front of --model")
+    parser.add_argument("--screener-imgsz", type=int, default=320)
+    parser.add_argument("--screener-confidence", type=float, default=0.15)
+    parser.add_argument("--cascade-mode", default="frame", choices=("frame", "crops"))
+    parser.add_argument("--renderer", default="fast", choices=["fast", "ultralytics"])
+    parser.add_argument("--confidence", type=float, default=0.5)
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", help="Baseline JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Allowed fractional regression before failing")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    detector = build_detector(args)
+    if not detector.is_model_loaded():
+        print(f"Cannot load model {args.model}", file=sys.stderr)
+        return 2
+
+    source = args.source
+    synthetic_path = None
+    if source == "synthetic":
+        synthetic_path = tempfile.NamedTemporaryFile(delete=False, suffix='.mp4').name
+        source = make_synthetic_video(synthetic_path, frames=args.frames or 300)
+
+    try:
+        report = run_benchmark(detector, source, args.confidence, args.frames, args.batch_size,
+                               args.warmup)
+    finally:
+        if synthetic_path:
+            os.unlink(synthetic_path)
+    if synthetic_path:
+        report['source'] = "synthetic"
+    from model_manager import POOL
+    load_stats = POOL.loaded().get((args.model, args.backend, args.imgsz))
+    if load_stats:
+        report['model_load'] = load_stats
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(report, baseline, args.threshold)
+        report['regressions'] = regressions
+        if regressions:
+            exit_code = 1
+            for regression in regressions:
+                print(f"REGRESSION {regression}", file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
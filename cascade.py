@@ -0,0 +1,160 @@
+"""Two-stage detection: a small, fast screener in front of the heavy model.
+
+``CascadeDetector`` runs the screener (e.g. a YOLOv8n-sized model at a low
+image size) on every frame with a low confidence threshold. Only frames
+where it reports candidates are escalated to the heavy model, and the heavy
+model's output is final; frames the screener finds empty come back with no
+detections. Escalation either re-runs the heavy model on the whole frame
+(``escalate="frame"``) or on one padded crop around all candidates
+(``escalate="crops"``), whose boxes are mapped back to the full frame.
+
+It is used like a ``DroneDetector``. Anything not overridden here
+(rendering, result processing, class names, ...) is delegated to the heavy
+model.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+
+from detections import Detections
+from metrics import REGISTRY, MetricsRegistry
+
+ESCALATE_MODES = ("frame", "crops")
+
+
+class CascadeDetector:
+    def __init__(self, screener, verifier, screen_confidence: float = 0.15, escalate: str = "frame",
+                 crop_padding: float = 1.0, min_crop: int = 160, metrics: MetricsRegistry = REGISTRY):
+        """screener/verifier: DroneDetector instances (fast and heavy model)
+
+        crop_padding: with ``escalate="crops"``, margin added on every side of the
+        candidates' union box, as a multiple of its size; crops are at least
+        ``min_crop`` pixels wide and high
+        """
+        if escalate not in ESCALATE_MODES:
+            raise ValueError(f"Unknown escalation mode {escalate!r}, expected one of {ESCALATE_MODES}")
+        self.screener = screener
+        self.verifier = verifier
+        self.screen_confidence = screen_confidence
+        self.escalate = escalate
+        self.crop_padding = crop_padding
+        self.min_crop = min_crop
+        self.frames_screened = 0
+        self.frames_escalated = 0
+        cascade_help = "Frames seen by each cascade stage"
+        self._screened_counter = metrics.counter("cascade_frames_total", cascade_help, {'stage': 'screened'})
+        self._escalated_counter = metrics.counter("cascade_frames_total", cascade_help, {'stage': 'escalated'})
+
+    def __getattr__(self, name):
+        return getattr(self.verifier, name)
+
+    @property
+    def imgsz(self) -> int:
+        return self.verifier.imgsz
+
+    @imgsz.setter
+    def imgsz(self, value: int):
+        # Lets adaptive.AdaptiveController resize the heavy stage
+        self.verifier.imgsz = value
+
+    @property
+    def load_error(self) -> Optional[str]:
+        return self.screener.load_error or self.verifier.load_error
+
+    def is_model_loaded(self) -> bool:
+        return self.screener.is_model_loaded() and self.verifier.is_model_loaded()
+
+    @property
+    def escalated_fraction(self) -> float:
+        return self.frames_escalated / self.frames_screened if self.frames_screened else 0.0
+
+    def detect(self, frame, confidence_threshold=0.5, roi=None):
+        return self.detect_batch([frame], confidence_threshold, rois=[roi])
+
+    def detect_batch(self, frames, confidence_threshold=0.5, rois=None):
+        frames = list(frames)
+        if not frames or not self.is_model_loaded():
+            return None
+        rois = list(rois) if rois is not None else [None] * len(frames)
+        screened = self.screener.detect_batch(frames, self.screen_confidence, rois=rois)
+        if screened is None:
+            return None
+        candidates = [detections for _, detections in
+                      self.screener.process_batch_results(screened, render=False)]
+
+        self.frames_screened += len(frames)
+        self._screened_counter.inc(len(frames))
+        escalate = [index for index, found in enumerate(candidates) if len(found)]
+        self.frames_escalated += len(escalate)
+        self._escalated_counter.inc(len(escalate))
+
+        results = [self._empty(frame, screen) for frame, screen in zip(frames, screened)]
+        if not escalate:
+            return results
+        if self.escalate == "crops":
+            crops = [self._crop(frames[index], candidates[index].boxes) for index in escalate]
+            verified = self.verifier.detect_batch([crop for crop, _ in crops], confidence_threshold)
+            if verified is None:
+                return None
+            verified = [self._restore(result, offset, frames[index], rois[index])
+                        for result, (_, offset), index in zip(verified, crops, escalate)]
+        else:
+            verified = self.verifier.detect_batch([frames[index] for index in escalate], confidence_threshold,
+                                                  rois=[rois[index] for index in escalate])
+            if verified is None:
+                return None
+        for index, result in zip(escalate, verified):
+            self._add_speed(result, screened[index])
+            results[index] = result
+        return results
+
+    def _empty(self, frame, screen) -> Detections:
+        """Final result for a frame the screener found empty"""
+        detections = Detections.empty(self.verifier.class_names)
+        detections.orig_img = frame
+        detections.speed = dict(getattr(screen, 'speed', None) or {})
+        return detections
+
+    def _crop(self, frame: np.ndarray, boxes: np.ndarray) -> Tuple[np.ndarray, Tuple[int, int]]:
+        """Padded crop around all candidate boxes, and its (x, y) offset"""
+        height, width = frame.shape[:2]
+        x0, y0 = boxes[:, :2].min(axis=0)
+        x1, y1 = boxes[:, 2:].max(axis=0)
+        pad_x = max((x1 - x0) * self.crop_padding, (self.min_crop - (x1 - x0)) / 2, 0)
+        pad_y = max((y1 - y0) * self.crop_padding, (self.min_crop - (y1 - y0)) / 2, 0)
+        x0, x1 = int(max(x0 - pad_x, 0)), int(min(x1 + pad_x, width))
+        y0, y1 = int(max(y0 - pad_y, 0)), int(min(y1 + pad_y, height))
+        return frame[y0:y1, x0:x1], (x0, y0)
+
+    def _restore(self, result, offset: Tuple[int, int], frame, roi=None) -> Detections:
+        """Crop result as full-frame Detections, limited to ``roi`` when given"""
+        detections = result if isinstance(result, Detections) \
+            else Detections.from_ultralytics(result, self.verifier.class_names)
+        if roi is not None:
+            restored = roi.restore(detections, offset, frame.shape)
+        else:
+            x0, y0 = offset
+            restored = Detections(detections.boxes + np.array([x0, y0, x0, y0], dtype=np.float32),
+                                  detections.scores, detections.class_ids, detections.class_names)
+        restored.orig_img = frame
+        restored.speed = dict(getattr(result, 'speed', None) or {})
+        return restored
+
+    @staticmethod
+    def _add_speed(result, screen):
+        """Fold the screener's per-stage time into the final result"""
+        speed = getattr(result, 'speed', None)
+        screen_speed = getattr(screen, 'speed', None)
+        if isinstance(speed, dict) and isinstance(screen_speed, dict):
+            for stage, ms in screen_speed.items():
+                speed[stage] = (speed.get(stage) or 0.0) + (ms or 0.0)
+
+
+def build_cascade(verifier, screener_model: str, screener_imgsz: int = 320, screen_confidence: float = 0.15,
+                  escalate: str = "frame", warmup: int = 1) -> CascadeDetector:
+    """Cascade in front of ``verifier``, with a screener on the same backend and output settings"""
+    from detector import DroneDetector
+    screener = DroneDetector(screener_model, renderer=verifier.renderer_name,
+                             output_channels=verifier.output_channels, backend=verifier.backend,
+                             imgsz=screener_imgsz, warmup=warmup)
+    return CascadeDetector(screener, verifier, screen_confidence, escalate)
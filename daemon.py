@@ -0,0 +1,354 @@
+"""Headless drone detection service.
+
+Runs the capture -> inference pipeline, Telegram alerting and the metrics
+endpoint without Streamlit, until SIGINT/SIGTERM:
+
+    python -m daemon --source 0 --model Model/YoloV12_Best.pt
+    python -m daemon --source rtsp://cam1/stream --source 1 --backend onnx
+    python -m daemon --source 0 --roi "0,0 1,0 1,0.65 0,0.65"
+    python -m daemon --source clip.mp4 --realtime
+
+Cameras and stream URLs are read by a background grabber that keeps only
+the newest frame and reconnects with exponential backoff when the stream
+fails or stalls. --realtime plays a video file at its own frame rate, looped,
+as a stand-in for a live camera.
+
+One --source uses the threaded DetectionPipeline (with optional motion gate,
+tracking and adaptive quality control); several use the cross-stream batched
+MultiCameraScheduler.
+Telegram credentials come from --telegram-token/--telegram-chat-id or the
+TELEGRAM_BOT_TOKEN/TELEGRAM_CHAT_ID environment variables.
+
+Example systemd unit:
+
+    [Service]
+    WorkingDirectory=/opt/drone-detection
+    EnvironmentFile=/etc/drone-detection.env
+    ExecStart=/usr/bin/python3 -m daemon --source 0 --backend onnx
+    Restart=on-failure
+    RestartPreventExitStatus=2
+    KillSignal=SIGTERM
+
+Exit status:
+
+    0  requested shutdown (SIGINT/SIGTERM), or every video file ended
+    1  a source could not be opened, or failed for good (e.g. a live source
+       gave up after --max-reconnects attempts); a restart may help
+    2  the model could not be loaded; restarting won't help until the
+       model path or backend is fixed
+"""
+import argparse
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+
+from backends import BACKENDS
+from metrics import REGISTRY, MetricsServer, PeriodicLogger
+from stream_source import is_network_source, redact_source
+
+logger = logging.getLogger("daemon")
+
+EXIT_OK = 0
+EXIT_SOURCE_FAILED = 1
+EXIT_MODEL_FAILED = 2
+
+
+def parse_source(source: str):
+    """Camera indices are given as integers, everything else is a path or URL"""
+    return int(source) if source.isdigit() else source
+
+
+def open_capture(source, frame_size=None, stream_options=None):
+    """Capture for ``source``.
+
+    With ``frame_size`` (width, height): a capture process feeding shared memory, for camera
+    indices and files only, since it doesn't reconnect dropped network streams. Otherwise a
+    StreamSource (``stream_options`` are passed on): live sources reconnect, and video files are
+    read in full, the grabber waiting for the pipeline rather than dropping frames, unless
+    ``realtime`` makes them stand in for a camera.
+    """
+    stream_options = stream_options or {}
+    if frame_size and not is_network_source(source):
+        from shm_ring import ProcessCapture
+        cap = ProcessCapture(source, frame_size).open()
+    else:
+        from stream_source import StreamSource
+        cap = StreamSource(source, labels={'camera': redact_source(source)}, **stream_options)
+    if not cap.isOpened():
+        cap.release()
+        raise RuntimeError(f"Tidak dapat membuka sumber video: {redact_source(source)}")
+    return cap
+
+
+def parse_frame_size(value: str):
+    try:
+        width, height = (int(part) for part in value.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got {value!r}") from None
+    return width, height
+
+
+def create_dispatcher(args):
+    if not (args.telegram_token and args.telegram_chat_id):
+        return None
+    from telegram_notifier import TelegramDispatcher, TelegramNotifier
+    notifier = TelegramNotifier(args.telegram_token, args.telegram_chat_id, api_url=args.telegram_api_url)
+    return TelegramDispatcher(notifier).start()
+
+
+def install_signal_handlers(stop_event: threading.Event):
+    def handle(signum, _frame):
+        logger.info("Received %s, shutting down", signal.Signals(signum).name)
+        stop_event.set()
+
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, handle)
+
+
+def run_single(detector, cap, args, dispatcher, stop_event: threading.Event, roi=None,
+               event_store=None, camera: str = "0"):
+    """Single source: threaded pipeline; returns the pipeline error, if any"""
+    from pipeline import DetectionPipeline
+    from utils import DetectionCounter
+
+    motion_gate = None
+    if args.motion_sensitivity > 0:
+        from motion import MotionGate
+        motion_gate = MotionGate(sensitivity=args.motion_sensitivity)
+    tracking = None
+    if args.detect_interval > 1:
+        from tracker import TrackingDetector
+        tracking = TrackingDetector(detector, detect_interval=args.detect_interval, render=False)
+    controller = None
+    if args.target_fps > 0:
+        from adaptive import AdaptiveController
+        controller = AdaptiveController(detector, args.target_fps, motion_gate)
+
+    counter = DetectionCounter()
+
+    def on_result(result):
+        # Runs on the inference thread, so results the consumer never sees are still counted
+        counter.update_session_counts(result.detections)
+        if event_store is not None:
+            # With tracking, store each object once rather than every frame it appears in
+            counted = result.new_detections if result.new_detections is not None else result.detections
+            event_store.record(camera, counted, result.timestamp)
+
+    last_alert = 0.0
+    frame_latency = REGISTRY.histogram("frame_latency_seconds", "Capture-to-display latency per frame")
+    pipeline = DetectionPipeline(cap, detector, args.confidence, motion_gate=motion_gate,
+                                 tracking=tracking, render=False, controller=controller, roi=roi,
+                                 result_callback=on_result).start()
+    try:
+        while not stop_event.is_set() and pipeline.running:
+            result = pipeline.get_result(timeout=0.5)
+            if result is None:
+                continue
+            frame_latency.observe(time.time() - result.timestamp)
+            counter.update_frame_counts(result.detections)
+            drone_count = counter.frame_counts.get('Drone', 0)
+            now = time.time()
+            if drone_count > 0 and now - last_alert > args.alert_cooldown:
+                last_alert = now
+                logger.warning("Drone terdeteksi: %d", drone_count)
+                if dispatcher:
+                    dispatcher.submit_drone_alert(drone_count)
+    finally:
+        pipeline.stop()
+        logger.info("Session counts: %s", counter.session_counts)
+    return pipeline.error
+
+
+def run_multi(detector, caps, args, dispatcher, stop_event: threading.Event, rois=None,
+              event_store=None):
+    """Several sources: one batched scheduler; returns the scheduler error, if any"""
+    from multicam import MultiCameraScheduler
+
+    def on_alert(camera, drone_count):
+        logger.warning("Drone terdeteksi di kamera %s: %d", camera, drone_count)
+        if dispatcher:
+            dispatcher.submit_drone_alert(drone_count, camera=camera)
+
+    on_result = None
+    if event_store is not None:
+        def on_result(camera, result):
+            event_store.record(camera, result.detections, result.timestamp)
+
+    scheduler = MultiCameraScheduler(detector, caps, args.confidence, max_batch=args.max_batch,
+                                     alert_callback=on_alert, alert_cooldown=args.alert_cooldown,
+                                     render=False, rois=rois, result_callback=on_result).start()
+    try:
+        while not stop_event.wait(0.01) and scheduler.running:
+            # Results are recorded by on_result; only drain the slots here
+            scheduler.get_results()
+    finally:
+        scheduler.stop()
+        for stream in scheduler.streams:
+            logger.info("Kamera %s session counts: %s", stream.name, stream.counter.session_counts)
+    errors = [f"kamera {stream.name}: {stream.error}" for stream in scheduler.streams if stream.error]
+    return scheduler.error or "; ".join(errors) or None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Headless drone detection service")
+    parser.add_argument("--source", action="append", required=True,
+                        help="Camera index, video file or stream URL (repeat for multiple cameras)")
+    parser.add_argument("--model", default="Model/YoloV12_Best.pt")
+    parser.add_argument("--backend", default=os.getenv("DETECTOR_BACKEND", "pytorch"), choices=BACKENDS)
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--confidence", type=float, default=0.5)
+    parser.add_argument("--screener-model", default=os.getenv("CASCADE_SCREENER_MODEL", ""),
+                        help="Small model that screens every frame; the main model only runs on candidates "
+                             "('' = no cascade)")
+    parser.add_argument("--screener-imgsz", type=int, default=320)
+    parser.add_argument("--screener-confidence", type=float, default=0.15,
+                        help="Screener score that escalates a frame to the main model")
+    parser.add_argument("--cascade-mode", default="frame", choices=("frame", "crops"),
+                        help="Run the main model on the whole frame or on a padded crop around candidates")
+    parser.add_argument("--warmup", type=int, default=int(os.getenv("MODEL_WARMUP", "1")),
+                        help="Dummy-frame inferences run right after the model loads")
+    parser.add_argument("--motion-sensitivity", type=float, default=0.0,
+                        help="Skip static frames (0 = off); single source only")
+    parser.add_argument("--detect-interval", type=int, default=1,
+                        help="Run the detector every N frames and track in between; single source only")
+    parser.add_argument("--target-fps", type=float, default=0.0,
+                        help="Trade image size, stride and motion sensitivity to hold this rate (0 = off); "
+                             "single source only")
+    parser.add_argument("--roi", action="append", default=[],
+                        help="Detection area as normalised polygons 'x,y x,y x,y[; ...]'; "
+                             "give one for all sources or one per --source, in order")
+    parser.add_argument("--capture-process", action="store_true",
+                        help="Decode in a separate process that hands frames over through shared memory; "
+                             "single local camera or file only, URLs keep reconnecting in-process")
+    parser.add_argument("--frame-size", type=parse_frame_size, default=(640, 480),
+                        help="WIDTHxHEIGHT that --capture-process frames are scaled to")
+    parser.add_argument("--realtime", action="store_true",
+                        help="Play video files at their frame rate, looped, like a live camera")
+    parser.add_argument("--stall-timeout", type=float, default=10.0,
+                        help="Seconds without a frame before a live source is reconnected")
+    parser.add_argument("--max-reconnects", type=int, default=0,
+                        help="Failed reconnects in a row before a live source gives up (0 = never)")
+    parser.add_argument("--stream-buffer", type=int, default=1,
+                        help="Frames kept per live source; 1 = newest only, more behaves like buffered reads")
+    parser.add_argument("--max-batch", type=int, default=8, help="Max frames per cross-camera batch")
+    parser.add_argument("--alert-cooldown", type=float, default=10.0, help="Seconds between alerts per source")
+    parser.add_argument("--telegram-token", default=os.getenv("TELEGRAM_BOT_TOKEN"))
+    parser.add_argument("--telegram-chat-id", default=os.getenv("TELEGRAM_CHAT_ID"))
+    parser.add_argument("--telegram-api-url", default=os.getenv("TELEGRAM_API_URL", "https://api.telegram.org"))
+    parser.add_argument("--event-db", default=os.getenv("EVENT_DB", "events.db"),
+                        help="SQLite detection history ('' = disabled)")
+    parser.add_argument("--event-retention-days", type=float,
+                        default=float(os.getenv("EVENT_RETENTION_DAYS", "30")))
+    parser.add_argument("--metrics-host", default="127.0.0.1")
+    parser.add_argument("--metrics-port", type=int, default=int(os.getenv("METRICS_PORT", "9108")),
+                        help="Prometheus endpoint port (0 = disabled)")
+    parser.add_argument("--log-interval", type=float, default=float(os.getenv("METRICS_LOG_INTERVAL", "60")))
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args(argv)
+
+    from roi import RegionOfInterest
+    if args.roi and len(args.roi) not in (1, len(args.source)):
+        parser.error("--roi must be given once or once per --source")
+    try:
+        rois = [RegionOfInterest.parse(spec) for spec in args.roi]
+    except ValueError as e:
+        parser.error(str(e))
+    args.rois = rois * len(args.source) if len(rois) == 1 else rois
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=args.log_level.upper(),
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    stop_event = threading.Event()
+    install_signal_handlers(stop_event)
+
+    from detector import CLASS_NAMES, DroneDetector
+    from model_manager import POOL
+
+    # Load and warm up the model while the (possibly slow, e.g. RTSP) sources open
+    specs = [(args.model, args.backend, args.imgsz)]
+    if args.screener_model:
+        specs.append((args.screener_model, args.backend, args.screener_imgsz))
+    preload = POOL.preload(specs, CLASS_NAMES, args.warmup)
+
+    sources = [parse_source(source) for source in args.source]
+    stream_options = {'realtime': args.realtime, 'stall_timeout': args.stall_timeout,
+                      'max_retries': args.max_reconnects, 'buffer': args.stream_buffer}
+    caps = {}
+    try:
+        for index, source in enumerate(sources):
+            # Names go into logs, metric labels, the event store and alerts: no credentials
+            name = redact_source(source)
+            name = name if name not in caps else f"{name}#{index}"
+            caps[name] = open_capture(source, args.frame_size if args.capture_process and len(sources) == 1
+                                      else None, stream_options)
+    except RuntimeError as e:
+        logger.error("%s", e)
+        for cap in caps.values():
+            cap.release()
+        # Exiting while the model is still loading can abort inside native code instead of returning this status
+        preload.join()
+        return EXIT_SOURCE_FAILED
+
+    detector = DroneDetector(args.model, output_channels="BGR", backend=args.backend, imgsz=args.imgsz,
+                             warmup=args.warmup)
+    if args.screener_model:
+        from cascade import build_cascade
+        detector = build_cascade(detector, args.screener_model, args.screener_imgsz, args.screener_confidence,
+                                 args.cascade_mode, warmup=args.warmup)
+    if not detector.is_model_loaded():
+        logger.error("%s", detector.load_error)
+        for cap in caps.values():
+            cap.release()
+        return EXIT_MODEL_FAILED
+
+    server = None
+    if args.metrics_port:
+        try:
+            server = MetricsServer(REGISTRY, host=args.metrics_host, port=args.metrics_port).start()
+            logger.info("Metrics on http://%s:%d/metrics", args.metrics_host, server.port)
+        except OSError as e:
+            logger.warning("Could not start metrics endpoint: %s", e)
+    metrics_logger = PeriodicLogger(REGISTRY, interval=args.log_interval).start()
+    dispatcher = create_dispatcher(args)
+    event_store = None
+    if args.event_db:
+        from event_store import EventStore
+        event_store = EventStore(args.event_db, retention_days=args.event_retention_days).start()
+
+    logger.info("Deteksi berjalan: %s (backend %s)", ", ".join(caps), args.backend)
+    rois = dict(zip(caps, args.rois))
+    try:
+        if len(caps) == 1:
+            name, cap = next(iter(caps.items()))
+            error = run_single(detector, cap, args, dispatcher, stop_event, rois.get(name), event_store, name)
+        else:
+            error = run_multi(detector, caps, args, dispatcher, stop_event, rois, event_store)
+    finally:
+        if event_store:
+            event_store.stop(drain=True, timeout=5.0)
+        if dispatcher:
+            dispatcher.stop(drain=True, timeout=5.0)
+        metrics_logger.stop()
+        if server:
+            server.stop()
+        for cap in caps.values():
+            cap.release()
+
+    if stop_event.is_set():
+        return EXIT_OK
+    if not args.realtime and all(isinstance(source, str) and os.path.isfile(source) for source in sources):
+        logger.info("Sumber video selesai")
+        return EXIT_OK
+    logger.error("Deteksi berhenti: %s", error or "sumber video terputus")
+    return EXIT_SOURCE_FAILED
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+from typing import Dict, Iterable, Iterator, List
+
+import numpy as np
+
+
+class Detections:
+    """Columnar detection results for a single frame.
+
+    Boxes, scores and class ids live in NumPy arrays so per-frame work
+    (counting, filtering, drawing) runs vectorized. Iterating or indexing
+    yields the legacy ``{'class_name', 'confidence', 'bbox', 'class_id'}``
+    dicts, built lazily, so existing callers keep working.
+    """
+
+    def __init__(self, boxes, scores, class_ids, class_names: Dict[int, str], track_ids=None,
+                 frame_indices=None, timestamps=None):
+        self.boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        self.scores = np.asarray(scores, dtype=np.float32).reshape(-1)
+        self.class_ids = np.asarray(class_ids, dtype=np.int64).reshape(-1)
+        self.class_names = class_names
+        self.track_ids = None if track_ids is None else np.asarray(track_ids, dtype=np.int64).reshape(-1)
+        # Source frame index and position (seconds) per row, for results of video files
+        self.frame_indices = None if frame_indices is None else np.asarray(frame_indices, dtype=np.int64).reshape(-1)
+        self.timestamps = None if timestamps is None else np.asarray(timestamps, dtype=np.float64).reshape(-1)
+        # Set by inference backends that return Detections directly
+        self.orig_img = None
+        self.speed = None
+
+    @classmethod
+    def empty(cls, class_names: Dict[int, str]) -> "Detections":
+        return cls(np.zeros((0, 4)), np.zeros(0), np.zeros(0), class_names)
+
+    @classmethod
+    def from_ultralytics(cls, result, class_names: Dict[int, str]) -> "Detections":
+        """Pull all box tensors of an Ultralytics result to the CPU in one transfer"""
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return cls.empty(class_names)
+        data = boxes.data.cpu().numpy()
+        # data columns: x1, y1, x2, y2, [track_id,] conf, cls
+        return cls(data[:, :4], data[:, -2], data[:, -1], class_names)
+
+    @classmethod
+    def from_dicts(cls, detections: Iterable[dict], class_names: Dict[int, str]) -> "Detections":
+        detections = list(detections)
+        return cls(
+            [d['bbox'] for d in detections],
+            [d['confidence'] for d in detections],
+            [d.get('class_id', -1) for d in detections],
+            class_names
+        )
+
+    @classmethod
+    def concatenate(cls, items: Iterable["Detections"], class_names: Dict[int, str]) -> "Detections":
+        items = [item for item in items if len(item)]
+        if not items:
+            return cls.empty(class_names)
+        def column(name):
+            if all(getattr(item, name) is not None for item in items):
+                return np.concatenate([getattr(item, name) for item in items])
+            return None
+
+        return cls(
+            np.concatenate([item.boxes for item in items]),
+            np.concatenate([item.scores for item in items]),
+            np.concatenate([item.class_ids for item in items]),
+            class_names,
+            track_ids=column('track_ids'),
+            frame_indices=column('frame_indices'),
+            timestamps=column('timestamps')
+        )
+
+    def set_frame(self, frame_index: int, timestamp: float) -> "Detections":
+        """Tag every row with the source frame it came from (in place)"""
+        self.frame_indices = np.full(len(self), frame_index, dtype=np.int64)
+        self.timestamps = np.full(len(self), timestamp, dtype=np.float64)
+        return self
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def class_name(self, class_id: int) -> str:
+        return self.class_names.get(int(class_id), f"Class_{int(class_id)}")
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        class_id = int(self.class_ids[index])
+        detection = {
+            'class_name': self.class_name(class_id),
+            'confidence': float(self.scores[index]),
+            'bbox': self.boxes[index].tolist(),
+            'class_id': class_id
+        }
+        if self.track_ids is not None:
+            detection['track_id'] = int(self.track_ids[index])
+        if self.frame_indices is not None:
+            detection['frame_index'] = int(self.frame_indices[index])
+        if self.timestamps is not None:
+            detection['timestamp'] = float(self.timestamps[index])
+        return detection
+
+    def __iter__(self) -> Iterator[dict]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def to_list(self) -> List[dict]:
+        return list(self)
+
+    def filter(self, mask) -> "Detections":
+        mask = np.asarray(mask)
+        def column(values):
+            return None if values is None else values[mask]
+
+        return Detections(self.boxes[mask], self.scores[mask], self.class_ids[mask], self.class_names,
+                          track_ids=column(self.track_ids), frame_indices=column(self.frame_indices),
+                          timestamps=column(self.timestamps))
+
+    def bincount(self) -> np.ndarray:
+        """Per-class-id detection counts; detections without a class (id -1, e.g. from_dicts) are left out"""
+        minlength = max(self.class_names, default=-1) + 1
+        return np.bincount(self.class_ids[self.class_ids >= 0], minlength=minlength)
+
+    def class_counts(self) -> Dict[str, int]:
+        """Counts for every known class name (including zeros)"""
+        counts = self.bincount()
+        result = {name: 0 for name in self.class_names.values()}
+        for class_id in np.flatnonzero(counts):
+            result[self.class_name(class_id)] = int(counts[class_id])
+        return result
+
+    def summary(self) -> Dict[str, int]:
+        """Counts for classes that were actually detected"""
+        return {name: count for name, count in self.class_counts().items() if count > 0}
+
+    def count(self, class_name: str) -> int:
+        return self.class_counts().get(class_name, 0)
+
+
+def count_by_class(detections) -> Dict[str, int]:
+    """Per-class counts for either a Detections object or a list of detection dicts"""
+    if isinstance(detections, Detections):
+        return detections.summary()
+    summary = {}
+    for detection in detections:
+        class_name = detection.get('class_name', '')
+        summary[class_name] = summary.get(class_name, 0) + 1
+    return summary
@@ -1,21 +1,42 @@
+import logging
+
 import cv2
 import numpy as np
-from ultralytics import YOLO
-import streamlit as st
+
+from detections import Detections, count_by_class
+from model_manager import POOL
+from renderer import AnnotationRenderer
+
+logger = logging.getLogger(__name__)
+
+# Class mappings shared by every detector instance (and the model pool's preload)
+CLASS_NAMES = {
+    0: 'Pesawat', 
+    1: 'Burung', 
+    2: 'Drone', 
+    3: 'Helikopter'
+}
+
 
 class DroneDetector:
-    def __init__(self, model_path="Model/YoloV12_Best.pt"):
-        """Initialize the drone detector with YOLO model"""
+    def __init__(self, model_path="Model/YoloV12_Best.pt", renderer="fast", output_channels="RGB",
+                 backend="pytorch", imgsz=640, warmup=1):
+        """Initialize the drone detector with YOLO model
+
+        renderer: "fast" (AnnotationRenderer) or "ultralytics" (result.plot())
+        output_channels: colour order of annotated frames, "RGB" or "BGR"
+        backend: one of backends.BACKENDS ("pytorch", "onnx", "onnx-int8", "openvino")
+        warmup: dummy-frame inferences run when the model is first loaded into the pool
+        """
         self.model_path = model_path
-        self.model = self._load_model()
+        self.backend = backend
+        self.imgsz = imgsz
+        self.renderer_name = renderer
+        self.output_channels = output_channels
+        self.warmup = warmup
         
         # Class mappings
-        self.class_names = {
-            0: 'Pesawat', 
-            1: 'Burung', 
-            2: 'Drone', 
-            3: 'Helikopter'
-        }
+        self.class_names = dict(CLASS_NAMES)
         
         # Class colors for visualization
         self.class_colors = {
@@ -32,112 +53,138 @@ class DroneDetector:
             'Drone': '🛸',
             'Helikopter': '🚁'
         }
+        
+        self.renderer = AnnotationRenderer(self.class_names, self.class_colors)
+        self.load_error = None
+        self.model = self._load_model()
     
-    @st.cache_resource
-    def _load_model(_self):
-        """Load YOLO model with caching"""
+    def _load_model(self):
+        """Get the YOLO model from the process-wide pool (loaded and warmed up once)"""
         try:
-            model = YOLO(_self.model_path)
-            return model
+            return POOL.get(self.model_path, self.backend, self.imgsz, self.class_names, self.warmup)
         except Exception as e:
-            st.error(f"❌ Gagal memuat model YOLO: {e}")
-            st.error(f"Pastikan file model ada di: {_self.model_path}")
+            self.load_error = f"Gagal memuat model YOLO: {e}"
+            logger.error("%s (model: %s)", self.load_error, self.model_path)
             return None
     
-    def detect(self, frame, confidence_threshold=0.5):
-        """Run detection on a single frame"""
+    def detect(self, frame, confidence_threshold=0.5, roi=None):
+        """Run detection on a single frame
+
+        roi: optional roi.RegionOfInterest; only its bounding box is sent to the
+        model and the result is a Detections in full-frame coordinates
+        """
         if self.model is None:
             return None
         
         try:
-            results = self.model(frame, conf=confidence_threshold, verbose=False)
+            if roi is not None:
+                return self.detect_batch([frame], confidence_threshold, rois=[roi])
+            results = self.model(frame, conf=confidence_threshold, imgsz=self.imgsz, verbose=False)
+            POOL.mark_first_detection()
+            return results
+        except Exception as e:
+            logger.error("Error dalam deteksi: %s", e)
+            return None
+    
+    def detect_batch(self, frames, confidence_threshold=0.5, rois=None):
+        """Run detection on a list of frames in a single model call
+
+        rois: optional list with one roi.RegionOfInterest (or None) per frame
+        """
+        if self.model is None or not frames:
+            return None
+        
+        try:
+            frames = list(frames)
+            if rois is None or all(roi is None for roi in rois):
+                results = self.model(frames, conf=confidence_threshold, imgsz=self.imgsz, verbose=False)
+            else:
+                crops = [roi.crop(frame) if roi is not None else (frame, (0, 0)) for frame, roi in zip(frames, rois)]
+                results = self.model([crop for crop, _ in crops], conf=confidence_threshold,
+                                     imgsz=self.imgsz, verbose=False)
+                results = [self._restore_roi(result, roi, offset, frame) if roi is not None else result
+                           for result, roi, (_, offset), frame in zip(results, rois, crops, frames)]
+            POOL.mark_first_detection()
             return results
         except Exception as e:
-            st.error(f"Error dalam deteksi: {e}")
+            logger.error("Error dalam deteksi batch: %s", e)
             return None
     
-    def process_results(self, results):
-        """Process YOLO results and return annotated frame and detection info"""
+    def _restore_roi(self, result, roi, offset, frame):
+        """Map a crop's result back onto the full frame as Detections"""
+        detections = result if isinstance(result, Detections) else Detections.from_ultralytics(result, self.class_names)
+        restored = roi.restore(detections, offset, frame.shape)
+        restored.orig_img = frame
+        restored.speed = getattr(result, 'speed', None)
+        return restored
+    
+    def process_batch_results(self, results, render=True):
+        """Process batched YOLO results into a list of (annotated_frame, detections)"""
+        if results is None:
+            return []
+        return [self.process_results([result], render=render) for result in results]
+    
+    def process_results(self, results, render=True):
+        """Process YOLO results and return annotated frame and detection info
+
+        With render=False only the detections are extracted and the frame is None.
+        """
         if results is None or len(results) == 0:
-            return None, []
+            return None, Detections.empty(self.class_names)
         
         try:
             result = results[0]
             
-            annotated_frame = result.plot()
-            
-            annotated_frame = cv2.cvtColor(annotated_frame, cv2.COLOR_BGR2RGB)
+            if isinstance(result, Detections):
+                # ONNX/OpenVINO backends decode straight to Detections
+                detections = result
+            else:
+                detections = Detections.from_ultralytics(result, self.class_names)
             
-            detections = []
-            if result.boxes is not None and len(result.boxes) > 0:
-                for box in result.boxes:
-                    # Extract detection data
-                    conf = float(box.conf.item())
-                    cls_id = int(box.cls.item())
-                    bbox = box.xyxy[0].cpu().numpy()
-                    
-                    # Get class name
-                    class_name = self.class_names.get(cls_id, f"Class_{cls_id}")
-                    
-                    detection_info = {
-                        'class_name': class_name,
-                        'confidence': conf,
-                        'bbox': bbox.tolist(),
-                        'class_id': cls_id
-                    }
-                    
-                    detections.append(detection_info)
+            if not render:
+                annotated_frame = None
+            elif self.renderer_name == "ultralytics" and not isinstance(result, Detections):
+                annotated_frame = result.plot()
+                if self.output_channels == "RGB":
+                    annotated_frame = cv2.cvtColor(annotated_frame, cv2.COLOR_BGR2RGB)
+            else:
+                annotated_frame = self.render(result.orig_img, detections)
             
             return annotated_frame, detections
             
         except Exception as e:
-            st.error(f"Error memproses hasil: {e}")
-            return None, []
+            logger.error("Error memproses hasil: %s", e)
+            return None, Detections.empty(self.class_names)
     
     def get_detection_summary(self, detections):
         """Get summary of detections by class"""
         if not detections:
             return {}
         
-        summary = {}
-        for detection in detections:
-            class_name = detection['class_name']
-            if class_name in summary:
-                summary[class_name] += 1
-            else:
-                summary[class_name] = 1
-        
-        return summary
+        return count_by_class(detections)
+    
+    def to_output_channels(self, frame):
+        """Convert a BGR frame to self.output_channels (no copy for BGR)"""
+        if self.output_channels == "RGB":
+            return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        return frame
+    
+    def render(self, frame, detections):
+        """Draw detections with the fast renderer, in place when no colour conversion is needed.
+
+        frame is expected in BGR (OpenCV order); the result is in self.output_channels.
+        """
+        frame = self.to_output_channels(frame)
+        return self.renderer.render(frame, detections, channels=self.output_channels)
     
     def draw_custom_annotations(self, frame, detections):
-        """Draw custom annotations on frame (alternative to YOLO's built-in plot)"""
+        """Draw custom annotations on a copy of a BGR frame (alternative to YOLO's built-in plot)"""
         if not detections:
             return frame
         
-        annotated_frame = frame.copy()
-        
-        for detection in detections:
-            bbox = detection['bbox']
-            class_name = detection['class_name']
-            confidence = detection['confidence']
-            
-            x1, y1, x2, y2 = map(int, bbox)
-            
-            color_hex = self.class_colors.get(class_name, '#FFFFFF')
-            color_bgr = tuple(int(color_hex[i:i+2], 16) for i in (5, 3, 1))
-            
-            cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), color_bgr, 2)
-            
-            label = f"{class_name} {confidence:.2f}"
-            (label_width, label_height), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)
-            
-            cv2.rectangle(annotated_frame, (x1, y1 - label_height - 10), 
-                         (x1 + label_width, y1), color_bgr, -1)
-            
-            cv2.putText(annotated_frame, label, (x1, y1 - 5), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-        
-        return annotated_frame
+        if not isinstance(detections, Detections):
+            detections = Detections.from_dicts(detections, self.class_names)
+        return self.renderer.render(frame.copy(), detections, channels="BGR")
     
     def is_model_loaded(self):
         """Check if model is successfully loaded"""
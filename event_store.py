@@ -0,0 +1,250 @@
+"""Persistent detection history in SQLite.
+
+``EventStore`` keeps one row per detection (time, camera, class, confidence,
+box, track id) in an SQLite database in WAL mode, so history queries can run
+while it is being written. The detection loop only appends rows to an
+in-memory queue. A background writer inserts them in batches, one
+transaction each. When the queue is full the oldest rows are dropped; the
+loop never blocks. Callers record what the live totals count: with tracking
+only new tracks, so each object is stored once.
+
+Indexes on time, (camera, class, time) and (class, time) serve the usual
+history queries, e.g. drones per hour on one camera over the last week.
+The writer periodically deletes rows older than ``retention_days`` or beyond
+``max_rows``. It then returns freed pages to the filesystem (incremental
+vacuum) and truncates the WAL, so the database stays bounded.
+"""
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+from itertools import repeat
+from typing import Dict, List, Optional, Tuple
+
+from metrics import REGISTRY, MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = "events.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS detections (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    camera TEXT NOT NULL,
+    class_name TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    x1 REAL NOT NULL,
+    y1 REAL NOT NULL,
+    x2 REAL NOT NULL,
+    y2 REAL NOT NULL,
+    track_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS detections_ts ON detections (ts);
+CREATE INDEX IF NOT EXISTS detections_camera_class_ts ON detections (camera, class_name, ts);
+CREATE INDEX IF NOT EXISTS detections_class_ts ON detections (class_name, ts);
+"""
+
+INSERT = ("INSERT INTO detections (ts, camera, class_name, confidence, x1, y1, x2, y2, track_id) "
+          "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+
+class EventStore:
+    def __init__(self, path: str = DEFAULT_DB_PATH, batch_size: int = 256, flush_interval: float = 1.0,
+                 max_queue: int = 10000, retention_days: float = 30.0, max_rows: Optional[int] = 5_000_000,
+                 prune_interval: float = 300.0, metrics: MetricsRegistry = REGISTRY):
+        self.path = path
+        self.batch_size = max(int(batch_size), 1)
+        self.flush_interval = flush_interval
+        self.retention_days = retention_days
+        self.max_rows = max_rows
+        self.prune_interval = prune_interval
+
+        self._pending = deque(maxlen=max(int(max_queue), 1))
+        self._cond = threading.Condition()
+        self._stop_event = threading.Event()
+        self._worker = threading.Thread(target=self._run, name="event-writer", daemon=True)
+
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+        metrics.gauge("event_queue_depth", "Detection events waiting to be written").set_function(
+            lambda: len(self._pending)
+        )
+        events_help = "Detection events by outcome"
+        self._written_counter = metrics.counter("events_total", events_help, {'outcome': 'written'})
+        self._dropped_counter = metrics.counter("events_total", events_help, {'outcome': 'dropped'})
+        self._failed_counter = metrics.counter("events_total", events_help, {'outcome': 'failed'})
+        self._write_latency = metrics.histogram("stage_latency_seconds", "Per-stage latency",
+                                                {'stage': 'event_write'})
+
+        # auto_vacuum only takes effect when set before the first table is created
+        with self._connect() as conn:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.executescript(SCHEMA)
+        conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10.0)
+        conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+
+    def start(self) -> "EventStore":
+        self._worker.start()
+        return self
+
+    def stop(self, drain: bool = True, timeout: float = 5.0) -> None:
+        """Stop the writer, flushing queued rows first unless ``drain`` is False"""
+        with self._cond:
+            if not drain:
+                self._pending.clear()
+            self._stop_event.set()
+            self._cond.notify_all()
+        if self._worker.is_alive():
+            self._worker.join(timeout)
+
+    def record(self, camera: str, detections, timestamp: Optional[float] = None) -> bool:
+        """Queue a frame's detections without blocking; returns False if older rows were dropped"""
+        count = len(detections)
+        if not count:
+            return True
+        timestamp = time.time() if timestamp is None else timestamp
+        boxes = detections.boxes.T.tolist()
+        track_ids = detections.track_ids.tolist() if detections.track_ids is not None else repeat(None)
+        rows = zip(repeat(timestamp), repeat(str(camera)),
+                   [detections.class_name(class_id) for class_id in detections.class_ids],
+                   detections.scores.tolist(), *boxes, track_ids)
+        with self._cond:
+            overflow = max(len(self._pending) + count - self._pending.maxlen, 0)
+            self._pending.extend(rows)
+            if overflow:
+                self.dropped += overflow
+                self._dropped_counter.inc(overflow)
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+        return overflow == 0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._pending)
+
+    def _take(self) -> List[tuple]:
+        with self._cond:
+            if len(self._pending) < self.batch_size and not self._stop_event.is_set():
+                self._cond.wait(self.flush_interval)
+            rows = list(self._pending)
+            self._pending.clear()
+            return rows
+
+    def _run(self):
+        conn = self._connect()
+        next_prune = time.monotonic()
+        try:
+            while True:
+                rows = self._take()
+                if rows:
+                    self._write(conn, rows)
+                elif self._stop_event.is_set():
+                    break
+                if time.monotonic() >= next_prune:
+                    next_prune = time.monotonic() + self.prune_interval
+                    self._prune(conn)
+        finally:
+            conn.close()
+
+    def _write(self, conn: sqlite3.Connection, rows: List[tuple]):
+        try:
+            with self._write_latency.time(), conn:
+                conn.executemany(INSERT, rows)
+            self.written += len(rows)
+            self._written_counter.inc(len(rows))
+        except sqlite3.Error as e:
+            self.failed += len(rows)
+            self._failed_counter.inc(len(rows))
+            logger.error("Gagal menyimpan %d deteksi: %s", len(rows), e)
+
+    def _prune(self, conn: sqlite3.Connection) -> int:
+        """Apply retention limits and compact; returns the number of rows deleted"""
+        try:
+            with conn:
+                deleted = 0
+                if self.retention_days:
+                    cutoff = time.time() - self.retention_days * 86400
+                    deleted += conn.execute("DELETE FROM detections WHERE ts < ?", (cutoff,)).rowcount
+                if self.max_rows:
+                    deleted += conn.execute(
+                        "DELETE FROM detections WHERE id <= "
+                        "(SELECT id FROM detections ORDER BY id DESC LIMIT 1 OFFSET ?)", (self.max_rows,)
+                    ).rowcount
+            if deleted:
+                conn.execute("PRAGMA incremental_vacuum")
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                logger.info("Event store: %d deteksi lama dihapus", deleted)
+            return deleted
+        except sqlite3.Error as e:
+            logger.error("Gagal memangkas event store: %s", e)
+            return 0
+
+    # Queries run on their own short-lived connections, concurrently with the writer
+
+    def _query(self, sql: str, params: tuple) -> list:
+        conn = self._connect()
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _where(start: Optional[float], end: Optional[float], camera: Optional[str],
+               class_name: Optional[str]) -> Tuple[str, tuple]:
+        clauses, params = [], []
+        if camera is not None:
+            clauses.append("camera = ?")
+            params.append(str(camera))
+        if class_name is not None:
+            clauses.append("class_name = ?")
+            params.append(class_name)
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("ts < ?")
+            params.append(end)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", tuple(params)
+
+    def histogram(self, start: float, end: Optional[float] = None, camera: Optional[str] = None,
+                  class_name: Optional[str] = None, bucket_seconds: float = 3600) -> List[Tuple[float, int]]:
+        """(bucket start, count) per non-empty bucket; buckets are aligned to the epoch (UTC hours by default)"""
+        where, params = self._where(start, end, camera, class_name)
+        rows = self._query(f"SELECT CAST(ts / ? AS INTEGER) AS bucket, COUNT(*) FROM detections{where} "
+                           f"GROUP BY bucket ORDER BY bucket", (bucket_seconds,) + params)
+        return [(bucket * bucket_seconds, count) for bucket, count in rows]
+
+    def totals(self, start: Optional[float] = None, end: Optional[float] = None,
+               camera: Optional[str] = None) -> Dict[str, int]:
+        """Detections per class"""
+        where, params = self._where(start, end, camera, None)
+        return dict(self._query(f"SELECT class_name, COUNT(*) FROM detections{where} GROUP BY class_name",
+                                params))
+
+    def events(self, start: Optional[float] = None, end: Optional[float] = None, camera: Optional[str] = None,
+               class_name: Optional[str] = None, limit: int = 100) -> List[dict]:
+        """Newest detections first, as dicts"""
+        where, params = self._where(start, end, camera, class_name)
+        rows = self._query(f"SELECT ts, camera, class_name, confidence, x1, y1, x2, y2, track_id "
+                           f"FROM detections{where} ORDER BY ts DESC LIMIT ?", params + (int(limit),))
+        return [{'timestamp': ts, 'camera': camera, 'class_name': class_name, 'confidence': confidence,
+                 'bbox': [x1, y1, x2, y2], 'track_id': track_id}
+                for ts, camera, class_name, confidence, x1, y1, x2, y2, track_id in rows]
+
+    def cameras(self) -> List[str]:
+        return [camera for camera, in self._query("SELECT DISTINCT camera FROM detections ORDER BY camera", ())]
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,94 @@
+"""Bounded-memory upload and download handling for large media files.
+
+Uploads are copied to disk in fixed-size chunks, and oversized files are
+rejected before any copying. Processed results are moved into Streamlit's
+static folder and served from disk by the web server, rather than being read
+into memory for ``st.download_button``.
+"""
+import os
+import secrets
+import shutil
+import tempfile
+import time
+from typing import Optional
+
+CHUNK_SIZE = 8 * 1024 * 1024
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+RESULTS_SUBDIR = "results"
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+def save_upload(uploaded_file, suffix: str = "", max_bytes: int = None, chunk_size: int = CHUNK_SIZE) -> str:
+    """Stream a file-like upload to a temp file; raises UploadTooLarge past ``max_bytes``"""
+    size = getattr(uploaded_file, "size", None)
+    if max_bytes and size is not None and size > max_bytes:
+        raise UploadTooLarge(f"File {size / 1e6:.0f} MB melebihi batas {max_bytes / 1e6:.0f} MB")
+
+    if hasattr(uploaded_file, "seek"):
+        uploaded_file.seek(0)
+    written = 0
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
+        try:
+            while True:
+                chunk = uploaded_file.read(chunk_size)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if max_bytes and written > max_bytes:
+                    raise UploadTooLarge(f"File melebihi batas {max_bytes / 1e6:.0f} MB")
+                tmp_file.write(chunk)
+        except BaseException:
+            tmp_file.close()
+            os.unlink(tmp_file.name)
+            raise
+    return tmp_file.name
+
+
+def prune_results(max_age: float, static_dir: str = STATIC_DIR):
+    """Delete published results older than ``max_age`` seconds"""
+    results_dir = os.path.join(static_dir, RESULTS_SUBDIR)
+    if not os.path.isdir(results_dir):
+        return
+    cutoff = time.time() - max_age
+    for entry in os.scandir(results_dir):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.unlink(entry.path)
+        except OSError:
+            pass
+
+
+def publish_result(path: str, suffix: str = ".mp4", max_age: float = 3600.0,
+                   static_dir: str = STATIC_DIR, copy: bool = False, digest: Optional[str] = None) -> str:
+    """Move (or with ``copy``, hard-link/copy) ``path`` into the static folder under an unguessable name.
+
+    Returns the URL path Streamlit serves it at (with ``server.enableStaticServing``).
+    Results older than ``max_age`` seconds are pruned on each call. With a
+    ``digest`` (e.g. the result cache key) the name is derived from it, and a
+    result already published under that name is reused instead of linked or
+    copied again.
+    """
+    prune_results(max_age, static_dir)
+    results_dir = os.path.join(static_dir, RESULTS_SUBDIR)
+    os.makedirs(results_dir, exist_ok=True)
+    name = (digest or secrets.token_urlsafe(16)) + suffix
+    target = os.path.join(results_dir, name)
+    url = f"app/static/{RESULTS_SUBDIR}/{name}"
+    if digest and os.path.isfile(target):
+        # Restarts the max_age clock for a result that is still being offered
+        os.utime(target)
+        return url
+    # Staged under a temporary name, so a concurrent session never serves a partial copy
+    staging = target + f".{secrets.token_hex(4)}.tmp"
+    if not copy:
+        shutil.move(path, staging)
+    else:
+        try:
+            os.link(path, staging)
+        except OSError:
+            shutil.copyfile(path, staging)
+    os.replace(staging, target)
+    return url
@@ -0,0 +1,242 @@
+"""Lightweight in-process metrics for the detection hot path.
+
+Counters, gauges and fixed-size ring-buffer latency histograms, exported in
+Prometheus text format over a localhost HTTP endpoint and summarised in a
+periodic log line. Recording is O(1) and allocation-free so it can sit inside
+the per-frame loop.
+"""
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _label_key(labels: Optional[Dict[str, str]]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((labels or {}).items()))
+
+
+def _format_labels(key, extra: Optional[Dict[str, str]] = None) -> str:
+    items = list(key) + sorted((extra or {}).items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in items) + "}"
+
+
+class Counter:
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class Gauge:
+    def __init__(self):
+        self._value = 0.0
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float):
+        self._value = float(value)
+
+    def set_function(self, function: Callable[[], float]):
+        """Read the value lazily at export time (e.g. a queue's current depth)"""
+        self._function = function
+
+    @property
+    def value(self) -> float:
+        if self._function is not None:
+            try:
+                return float(self._function())
+            except Exception:
+                return float("nan")
+        return self._value
+
+
+class LatencyHistogram:
+    """Latency samples (seconds) kept in a fixed-size ring buffer.
+
+    Quantiles cover the most recent ``size`` samples; count and sum are
+    cumulative, as Prometheus summaries expect.
+    """
+
+    def __init__(self, size: int = 1024):
+        self._samples = np.zeros(size, dtype=np.float64)
+        self._index = 0
+        self._filled = 0
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self._samples[self._index] = seconds
+            self._index = (self._index + 1) % len(self._samples)
+            self._filled = min(self._filled + 1, len(self._samples))
+            self.count += 1
+            self.total += seconds
+
+    def time(self):
+        """Context manager that observes the duration of its block"""
+        return _Timer(self)
+
+    def quantiles(self, quantiles=QUANTILES) -> Dict[float, float]:
+        with self._lock:
+            window = self._samples[:self._filled].copy()
+        if not len(window):
+            return {q: 0.0 for q in quantiles}
+        return dict(zip(quantiles, np.quantile(window, quantiles).tolist()))
+
+
+class _Timer:
+    def __init__(self, histogram: LatencyHistogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+class MetricsRegistry:
+    """Named, optionally labelled metrics; ``counter``/``gauge``/``histogram`` get-or-create"""
+
+    def __init__(self, namespace: str = "drone"):
+        self.namespace = namespace
+        self._metrics: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, kind: str, name: str, help_text: str, labels, factory):
+        full_name = f"{self.namespace}_{name}"
+        with self._lock:
+            family = self._metrics.setdefault(full_name, {'kind': kind, 'help': help_text, 'series': {}})
+            if family['kind'] != kind:
+                raise ValueError(f"Metric {full_name} already registered as {family['kind']}")
+            key = _label_key(labels)
+            if key not in family['series']:
+                family['series'][key] = factory()
+            return family['series'][key]
+
+    def counter(self, name: str, help_text: str = "", labels: Dict[str, str] = None) -> Counter:
+        return self._get("counter", name, help_text, labels, Counter)
+
+    def gauge(self, name: str, help_text: str = "", labels: Dict[str, str] = None) -> Gauge:
+        return self._get("gauge", name, help_text, labels, Gauge)
+
+    def histogram(self, name: str, help_text: str = "", labels: Dict[str, str] = None,
+                  size: int = 1024) -> LatencyHistogram:
+        return self._get("summary", name, help_text, labels, lambda: LatencyHistogram(size))
+
+    def render_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            families = {name: dict(family, series=dict(family['series']))
+                        for name, family in self._metrics.items()}
+        for name, family in sorted(families.items()):
+            if family['help']:
+                lines.append(f"# HELP {name} {family['help']}")
+            lines.append(f"# TYPE {name} {family['kind']}")
+            for key, metric in family['series'].items():
+                if family['kind'] == "summary":
+                    for quantile, value in metric.quantiles().items():
+                        lines.append(f"{name}{_format_labels(key, {'quantile': str(quantile)})} {value:.6f}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {metric.total:.6f}")
+                    lines.append(f"{name}_count{_format_labels(key)} {metric.count}")
+                else:
+                    lines.append(f"{name}{_format_labels(key)} {metric.value:g}")
+        return "\n".join(lines) + "\n"
+
+    def summary_line(self) -> str:
+        """One-line digest: counters/gauges as values, histograms as p50/p95 in ms"""
+        parts = []
+        with self._lock:
+            families = {name: dict(family['series']) for name, family in self._metrics.items()}
+            kinds = {name: family['kind'] for name, family in self._metrics.items()}
+        for name, series in sorted(families.items()):
+            short = name[len(self.namespace) + 1:]
+            for key, metric in series.items():
+                label = short + "".join(f"[{value}]" for _, value in key)
+                if kinds[name] == "summary":
+                    q = metric.quantiles((0.5, 0.95))
+                    parts.append(f"{label}=p50:{q[0.5] * 1000:.1f}ms/p95:{q[0.95] * 1000:.1f}ms")
+                else:
+                    parts.append(f"{label}={metric.value:g}")
+        return " ".join(parts)
+
+
+REGISTRY = MetricsRegistry()
+
+
+class MetricsServer:
+    """Serves ``/metrics`` in Prometheus text format from a daemon thread"""
+
+    def __init__(self, registry: MetricsRegistry = REGISTRY, host: str = "127.0.0.1", port: int = 9108):
+        registry_ref = registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = registry_ref.render_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, name="metrics-server", daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def start(self) -> "MetricsServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class PeriodicLogger:
+    """Logs ``registry.summary_line()`` every ``interval`` seconds"""
+
+    def __init__(self, registry: MetricsRegistry = REGISTRY, interval: float = 60.0,
+                 log: logging.Logger = logger):
+        self.registry = registry
+        self.interval = interval
+        self.log = log
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-logger", daemon=True)
+
+    def start(self) -> "PeriodicLogger":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.log.info("metrics %s", self.registry.summary_line())
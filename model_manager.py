@@ -0,0 +1,116 @@
+"""Process-wide pool of loaded detection models.
+
+Each model is loaded once per process and keyed by (path, backend, imgsz). The
+loaded model is warmed up on a dummy frame, so the first real frame does not
+pay for lazy CUDA/graph initialisation. Heavy frameworks (torch/ultralytics,
+onnxruntime, openvino) are only imported by ``backends.create_backend`` when
+their model is first requested. Load, warm-up and startup-to-first-detection
+times go to the metrics registry and to ``ModelPool.stats``.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+from metrics import REGISTRY, MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+# Reference point for the startup-to-first-detection gauge
+PROCESS_START = time.time()
+
+ModelKey = Tuple[str, str, int]
+
+
+def warm_up(model, imgsz: int, runs: int = 1) -> float:
+    """Run ``runs`` inferences on a blank frame; returns the seconds spent"""
+    dummy = np.zeros((imgsz, imgsz, 3), dtype=np.uint8)
+    start = time.perf_counter()
+    for _ in range(runs):
+        model(dummy, conf=0.99, imgsz=imgsz, verbose=False)
+    return time.perf_counter() - start
+
+
+class ModelPool:
+    """Loads each (path, backend, imgsz) model once and hands out the shared instance.
+
+    Different keys load concurrently; concurrent requests for the same key
+    wait for the first load instead of loading twice.
+    """
+
+    def __init__(self, metrics: MetricsRegistry = REGISTRY):
+        self.metrics = metrics
+        self.stats: Dict[ModelKey, Dict[str, float]] = {}
+        self._models: Dict[ModelKey, object] = {}
+        self._key_locks: Dict[ModelKey, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._first_detection = threading.Event()
+
+    def get(self, model_path: str, backend: str = "pytorch", imgsz: int = 640,
+            class_names: Dict[int, str] = None, warmup: int = 1):
+        key = (model_path, backend, imgsz)
+        with self._lock:
+            if key in self._models:
+                return self._models[key]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            if key in self._models:
+                return self._models[key]
+            from backends import create_backend
+
+            start = time.perf_counter()
+            model = create_backend(model_path, backend, class_names, imgsz)
+            load_seconds = time.perf_counter() - start
+            warmup_seconds = warm_up(model, imgsz, warmup) if warmup > 0 else 0.0
+
+            # Several models may share a backend (e.g. a cascade's screener and verifier)
+            labels = {'backend': backend, 'model': os.path.basename(model_path)}
+            self.metrics.gauge("model_load_seconds", "Time spent loading the model", labels).set(load_seconds)
+            self.metrics.gauge("model_warmup_seconds", "Time spent on warm-up inferences",
+                               labels).set(warmup_seconds)
+            logger.info("Loaded %s (%s, imgsz %d) in %.2fs, warm-up %.2fs",
+                        model_path, backend, imgsz, load_seconds, warmup_seconds)
+            with self._lock:
+                self._models[key] = model
+                self.stats[key] = {'load_seconds': load_seconds, 'warmup_seconds': warmup_seconds}
+            return model
+
+    def preload(self, specs: Iterable[ModelKey], class_names: Dict[int, str] = None,
+                warmup: int = 1) -> threading.Thread:
+        """Load models on a background thread so startup work overlaps with UI setup"""
+        def run():
+            for model_path, backend, imgsz in specs:
+                try:
+                    self.get(model_path, backend, imgsz, class_names, warmup)
+                except Exception as e:
+                    logger.warning("Preloading %s (%s) failed: %s", model_path, backend, e)
+
+        thread = threading.Thread(target=run, name="model-preload", daemon=True)
+        thread.start()
+        return thread
+
+    def mark_first_detection(self):
+        """Record startup-to-first-detection latency once per process"""
+        if self._first_detection.is_set():
+            return
+        self._first_detection.set()
+        elapsed = time.time() - PROCESS_START
+        self.metrics.gauge("time_to_first_detection_seconds",
+                           "Process start to first completed detection").set(elapsed)
+        logger.info("First detection %.2fs after startup", elapsed)
+
+    def loaded(self) -> Dict[ModelKey, Dict[str, float]]:
+        with self._lock:
+            return dict(self.stats)
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+            self.stats.clear()
+
+
+POOL = ModelPool()
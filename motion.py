@@ -0,0 +1,78 @@
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """Cheap pre-filter that decides whether a frame is worth running YOLO on.
+
+    Frames are compared against a running-average background on a downscaled,
+    blurred grayscale copy. Inference is requested when enough pixels change,
+    while the previous inference still reported objects, or when
+    ``force_every`` frames have passed without a full inference.
+    """
+
+    def __init__(self, sensitivity: float = 0.5, force_every: int = 30,
+                 downscale_width: int = 160, learning_rate: float = 0.05):
+        self.force_every = max(int(force_every), 1)
+        self.downscale_width = downscale_width
+        self.learning_rate = learning_rate
+        self.set_sensitivity(sensitivity)
+        self.reset()
+
+    def set_sensitivity(self, sensitivity: float):
+        """Sensitivity in [0, 1]; higher values trigger on smaller changes"""
+        self.sensitivity = float(np.clip(sensitivity, 0.0, 1.0))
+        self.pixel_threshold = 8 + 40 * (1.0 - self.sensitivity)
+        self.min_changed_fraction = 0.0002 + 0.01 * (1.0 - self.sensitivity)
+
+    def reset(self):
+        self._background = None
+        self._frames_since_inference = 0
+        self._hold = False
+        self.frames_seen = 0
+        self.frames_skipped = 0
+
+    def _prepare(self, frame):
+        height, width = frame.shape[:2]
+        if width > self.downscale_width:
+            scale = self.downscale_width / width
+            frame = cv2.resize(frame, (self.downscale_width, max(int(height * scale), 1)),
+                               interpolation=cv2.INTER_AREA)
+        if frame.ndim == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(frame, (5, 5), 0).astype(np.float32)
+
+    def motion_score(self, frame) -> float:
+        """Fraction of pixels that differ from the background; updates the background"""
+        gray = self._prepare(frame)
+        if self._background is None or self._background.shape != gray.shape:
+            self._background = gray
+            return 1.0
+        diff = cv2.absdiff(gray, self._background)
+        cv2.accumulateWeighted(gray, self._background, self.learning_rate)
+        return float(np.count_nonzero(diff > self.pixel_threshold)) / diff.size
+
+    def should_infer(self, frame) -> bool:
+        self.frames_seen += 1
+        score = self.motion_score(frame)
+        infer = (
+            self._hold
+            or score >= self.min_changed_fraction
+            or self._frames_since_inference + 1 >= self.force_every
+        )
+        if infer:
+            self._frames_since_inference = 0
+        else:
+            self._frames_since_inference += 1
+            self.frames_skipped += 1
+        return infer
+
+    def record_detections(self, detection_count: int):
+        """Keep inferring while the last inference still saw objects"""
+        self._hold = detection_count > 0
+
+    @property
+    def skip_ratio(self) -> float:
+        if self.frames_seen == 0:
+            return 0.0
+        return self.frames_skipped / self.frames_seen
@@ -0,0 +1,171 @@
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from detections import Detections
+from metrics import REGISTRY, MetricsRegistry
+from pipeline import CaptureWorker, FrameResult, LatestQueue
+from stream_source import redact_source
+from utils import DetectionCounter
+
+
+class CameraStream:
+    """One capture source with its own latest-frame slot, counters and alert state"""
+
+    def __init__(self, name: str, cap, metrics: MetricsRegistry = REGISTRY,
+                 alert_cooldown: float = 10.0, roi=None):
+        self.name = redact_source(name)
+        self.roi = roi
+        labels = {'camera': self.name}
+        self.stop_event = threading.Event()
+        # Per-stream drop policy: a slow consumer only ever sees this camera's newest frame
+        self.frames = LatestQueue(
+            maxsize=1,
+            drop_counter=metrics.counter("frames_dropped_total",
+                                         "Stale frames dropped by latest-frame-wins queues",
+                                         {'queue': 'capture', **labels})
+        )
+        self.results = LatestQueue(maxsize=1)
+        self.capture_worker = CaptureWorker(cap, self.frames, self.stop_event, metrics, labels)
+        self.counter = DetectionCounter()
+        self.alert_cooldown = alert_cooldown
+        self.last_alert = 0.0
+        self.frames_inferred = 0
+        self.inferred_counter = metrics.counter("frames_inferred_total", "Frames sent through the model",
+                                                labels)
+
+    @property
+    def alive(self) -> bool:
+        return not self.stop_event.is_set()
+
+    @property
+    def error(self) -> Optional[str]:
+        return self.capture_worker.error
+
+    @property
+    def connected(self) -> bool:
+        """False while a reconnecting source (stream_source.StreamSource) is down"""
+        return getattr(self.capture_worker.cap, 'connected', True)
+
+    def should_alert(self, drone_count: int, now: float) -> bool:
+        if drone_count <= 0 or now - self.last_alert <= self.alert_cooldown:
+            return False
+        self.last_alert = now
+        return True
+
+
+class MultiCameraScheduler:
+    """Runs one detector over several cameras with cross-stream batched inference.
+
+    Every capture source fills its own latest-frame slot. A single inference
+    thread collects at most one fresh frame per camera, starting from a
+    rotating offset so cameras take turns when there are more of them than
+    ``max_batch``, runs them through ``detector.detect_batch`` in one call and
+    fans results back out per camera. A slow or stalled camera is simply
+    absent from the batch and never holds the others back. ``rois`` maps
+    camera names to an optional ``roi.RegionOfInterest`` each.
+    ``result_callback(camera, result)`` is called on the inference thread for
+    every result, including those the per-camera result slots later drop.
+    """
+
+    def __init__(self, detector, caps: Dict[str, object], confidence: float = 0.5,
+                 max_batch: int = 8, alert_callback: Optional[Callable[[str, int], None]] = None,
+                 alert_cooldown: float = 10.0, metrics: MetricsRegistry = REGISTRY,
+                 render: bool = True, rois: Optional[Dict[str, object]] = None,
+                 result_callback: Optional[Callable[[str, FrameResult], None]] = None):
+        self.detector = detector
+        self.result_callback = result_callback
+        self.render = render
+        self.confidence = confidence
+        self.max_batch = max(int(max_batch), 1)
+        self.alert_callback = alert_callback
+        self.streams: List[CameraStream] = [
+            CameraStream(name, cap, metrics, alert_cooldown, (rois or {}).get(name))
+            for name, cap in caps.items()
+        ]
+        self._offset = 0
+        self._stop_event = threading.Event()
+        self._worker = threading.Thread(target=self._run, name="multicam-inference", daemon=True)
+        self.error: Optional[str] = None
+        self._batch_latency = metrics.histogram("stage_latency_seconds", "Per-stage latency",
+                                                {'stage': 'batch_inference'})
+        self._batch_size = metrics.gauge("batch_size", "Frames in the last cross-stream batch")
+
+    def start(self) -> "MultiCameraScheduler":
+        for stream in self.streams:
+            stream.capture_worker.start()
+        self._worker.start()
+        return self
+
+    def stop(self, timeout: float = 2.0):
+        self._stop_event.set()
+        for stream in self.streams:
+            stream.stop_event.set()
+        for stream in self.streams:
+            if stream.capture_worker.is_alive():
+                stream.capture_worker.join(timeout)
+        if self._worker.is_alive():
+            self._worker.join(timeout)
+
+    @property
+    def running(self) -> bool:
+        return not self._stop_event.is_set() and any(stream.alive for stream in self.streams)
+
+    def get_results(self) -> Dict[str, FrameResult]:
+        """Newest unseen result per camera (non-blocking)"""
+        results = {}
+        for stream in self.streams:
+            result = stream.results.get(timeout=0)
+            if result is not None:
+                results[stream.name] = result
+        return results
+
+    def _collect(self):
+        """Fair round-robin pick of at most one fresh frame per camera"""
+        batch = []
+        count = len(self.streams)
+        for step in range(count):
+            stream = self.streams[(self._offset + step) % count]
+            captured = stream.frames.get(timeout=0)
+            if captured is not None:
+                batch.append((stream, captured))
+                if len(batch) == self.max_batch:
+                    self._offset = (self._offset + step + 1) % count
+                    return batch
+        self._offset = (self._offset + 1) % count
+        return batch
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            batch = self._collect()
+            if not batch:
+                if not any(stream.alive for stream in self.streams):
+                    break
+                time.sleep(0.002)
+                continue
+            try:
+                with self._batch_latency.time():
+                    results = self.detector.detect_batch([captured.frame for _, captured in batch],
+                                                         self.confidence,
+                                                         rois=[stream.roi for stream, _ in batch])
+                    processed = self.detector.process_batch_results(results, render=self.render)
+            except Exception as e:
+                self.error = f"Error dalam deteksi: {e}"
+                self._stop_event.set()
+                break
+            self._batch_size.set(len(batch))
+            if len(processed) != len(batch):
+                processed = [(None, Detections.empty(self.detector.class_names))] * len(batch)
+
+            now = time.time()
+            for (stream, captured), (annotated_frame, detections) in zip(batch, processed):
+                stream.frames_inferred += 1
+                stream.inferred_counter.inc()
+                stream.counter.update(detections)
+                drone_count = stream.counter.frame_counts.get('Drone', 0)
+                if self.alert_callback and stream.should_alert(drone_count, now):
+                    self.alert_callback(stream.name, drone_count)
+                result = FrameResult(captured.frame_id, captured.timestamp, annotated_frame, detections)
+                if self.result_callback is not None:
+                    self.result_callback(stream.name, result)
+                stream.results.put(result)
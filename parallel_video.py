@@ -0,0 +1,164 @@
+"""Chunked video processing across a pool of worker processes.
+
+The video is split into contiguous frame ranges. Each worker process loads
+its own model once (through the model pool), seeks to its range and runs
+batched detection. Only the compact per-frame Detections go back to the
+parent. The parent decodes the file in order, renders those detections with
+the same renderer as the sequential path and encodes the output, consuming
+chunk results in order as they complete, and checks every record's frame
+index against the frame it annotates. Detection records and the annotated
+video therefore match ``process_video`` frame for frame; any mismatch is an
+error rather than a shifted result.
+
+Motion gating and tracking carry state from frame to frame, and the
+``ultralytics`` renderer needs the model's own result objects, so they only
+run on the sequential path.
+"""
+import math
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+import cv2
+
+from detections import Detections
+from video_reader import VideoReader
+from video_writer import open_writer
+
+_worker_detector = None
+
+
+def plan_chunks(start_frame: int, end_frame: int, workers: int, stride: int = 1,
+                chunk_frames: Optional[int] = None,
+                min_chunk_frames: int = 64) -> List[Tuple[int, Optional[int]]]:
+    """Split source frames [start_frame, end_frame) into ranges; the last range runs to the end.
+
+    ``chunk_frames`` counts analysed frames, and every range starts on the
+    stride grid, so the chunks together visit exactly the frames a single
+    strided reader would. By default there are about four chunks per worker,
+    which balances load when some ranges are busier than others.
+    """
+    analysed = max(math.ceil((end_frame - start_frame) / stride), 1)
+    if chunk_frames is None:
+        chunk_frames = max(math.ceil(analysed / max(workers * 4, 1)), min_chunk_frames)
+    starts = [start_frame + offset * stride for offset in range(0, analysed, chunk_frames)]
+    return [(start, starts[i + 1] if i + 1 < len(starts) else None) for i, start in enumerate(starts)]
+
+
+def _init_worker(model_path: str, backend: str, imgsz: int, threads: int):
+    global _worker_detector
+    # Must be set before torch/onnxruntime are imported so workers don't oversubscribe cores
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    cv2.setNumThreads(1)
+    from detector import DroneDetector
+    _worker_detector = DroneDetector(model_path, output_channels="BGR", backend=backend, imgsz=imgsz)
+
+
+def _detect_chunk(task) -> Tuple[int, List[Tuple[int, Detections]]]:
+    """(start, [(frame_id, detections), ...]) for one frame range"""
+    video_path, start, end, stride, confidence, batch_size, reader_backend = task
+    detector = _worker_detector
+    if not detector.is_model_loaded():
+        raise RuntimeError(detector.load_error or "Model gagal dimuat")
+    records = []
+
+    def flush(batch):
+        frames = [captured.frame for captured in batch]
+        processed = detector.process_batch_results(detector.detect_batch(frames, confidence), render=False)
+        if len(processed) != len(batch):
+            raise RuntimeError(f"Deteksi mengembalikan {len(processed)} hasil untuk {len(batch)} frame")
+        for captured, (_, detections) in zip(batch, processed):
+            # Fresh object: drops orig_img/speed so only the arrays are pickled back
+            records.append((captured.frame_id,
+                            Detections(detections.boxes, detections.scores, detections.class_ids,
+                                       detections.class_names).set_frame(captured.frame_id, captured.timestamp)))
+
+    with VideoReader(video_path, stride, start_frame=start, end_frame=end, backend=reader_backend) as reader:
+        batch = []
+        for captured in reader:
+            batch.append(captured)
+            if len(batch) == batch_size:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+    return start, records
+
+
+def process_video_parallel(video_path: str, detector, confidence: float, workers: int = None,
+                           batch_size: int = 8, chunk_frames: Optional[int] = None,
+                           progress_callback: Callable[[float], None] = None,
+                           frame_callback: Callable[[int, object], None] = None,
+                           stride: int = 1, start_time: float = 0.0, end_time: Optional[float] = None,
+                           reader_backend: str = "opencv", highlights_only: bool = False,
+                           pre_seconds: float = 1.0, post_seconds: float = 2.0):
+    """Process a video file over ``workers`` processes.
+
+    ``detector`` supplies the model settings for the workers and renders the
+    output in this process. Returns (output_path, concatenated Detections),
+    like ``process_video``. Raises RuntimeError when a worker fails or the
+    chunks don't line up with the decoded frames.
+    """
+    if getattr(detector, 'renderer_name', "fast") == "ultralytics":
+        raise ValueError("Parallel video processing needs the fast renderer; use process_video instead")
+    workers = max(int(workers or os.cpu_count() or 1), 1)
+    reader = VideoReader(video_path, stride, start_time, end_time, backend=reader_backend)
+    total_frames = max(reader.expected_frames, 1)
+    end_frame = reader.end_frame if reader.end_frame is not None else reader.frame_count
+    if reader.frame_count:
+        end_frame = min(end_frame, reader.frame_count)
+
+    temp_output = tempfile.NamedTemporaryFile(delete=False, suffix='.mp4')
+    out = open_writer(temp_output.name, reader.output_fps, (reader.width, reader.height),
+                      detector.output_channels, highlights_only, pre_seconds, post_seconds)
+
+    threads = max((os.cpu_count() or 1) // workers, 1)
+    chunks = plan_chunks(reader.start_frame, end_frame, workers, reader.stride, chunk_frames)
+    if reader.end_frame is not None:
+        chunks[-1] = (chunks[-1][0], reader.end_frame)
+    all_detections = []
+    frame_count = 0
+
+    def emit(frame, detections):
+        nonlocal frame_count
+        annotated_frame = detector.render(frame, detections)
+        out.write(annotated_frame, len(detections) > 0)
+        if frame_callback is not None:
+            frame_callback(frame_count, annotated_frame)
+        all_detections.append(detections)
+        frame_count += 1
+        if progress_callback is not None:
+            progress_callback(min(frame_count / total_frames, 1.0))
+
+    # spawn: forking a process that already runs threads (Streamlit, torch) is unsafe
+    context = multiprocessing.get_context("spawn")
+    frames = iter(reader)
+    try:
+        with ProcessPoolExecutor(min(workers, len(chunks)), mp_context=context, initializer=_init_worker,
+                                 initargs=(detector.model_path, detector.backend, detector.imgsz,
+                                           threads)) as pool:
+            futures = [pool.submit(_detect_chunk, (video_path, start, end, reader.stride, confidence,
+                                                   max(int(batch_size), 1), reader_backend))
+                       for start, end in chunks]
+            for future in futures:
+                start, records = future.result()
+                for frame_id, detections in records:
+                    captured = next(frames, None)
+                    if captured is None or captured.frame_id != frame_id:
+                        raise RuntimeError(
+                            f"Chunk from frame {start} returned frame {frame_id}, expected "
+                            f"{'end of video' if captured is None else captured.frame_id}"
+                        )
+                    emit(captured.frame, detections)
+
+        # The last chunk runs to the end of the file, so every decoded frame must have a record
+        leftover = next(frames, None)
+        if leftover is not None:
+            raise RuntimeError(f"No detections for frame {leftover.frame_id} onwards")
+    finally:
+        reader.close()
+        out.close()
+
+    return temp_output.name, Detections.concatenate(all_detections, detector.class_names)
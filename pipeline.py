@@ -0,0 +1,301 @@
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+from detections import Detections
+from metrics import REGISTRY, MetricsRegistry
+
+
+class LatestQueue:
+    """Bounded queue with "latest frame wins" semantics.
+
+    When the queue is full the oldest item is discarded, so consumers always
+    see the freshest data and producers never block.
+    """
+
+    def __init__(self, maxsize: int = 1, drop_counter=None):
+        self._items = deque(maxlen=maxsize)
+        self._cond = threading.Condition()
+        self.dropped = 0
+        self._drop_counter = drop_counter
+
+    def put(self, item) -> None:
+        with self._cond:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+                if self._drop_counter is not None:
+                    self._drop_counter.inc()
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None):
+        """Return the oldest queued item, or None on timeout"""
+        with self._cond:
+            if not self._items:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            # Wakes a producer waiting for room
+            self._cond.notify_all()
+            return item
+
+    def wait_for_room(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the queue has room; False on timeout"""
+        with self._cond:
+            if len(self._items) == self._items.maxlen:
+                self._cond.wait(timeout)
+            return len(self._items) < self._items.maxlen
+
+    def clear(self) -> None:
+        with self._cond:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+@dataclass
+class CapturedFrame:
+    frame_id: int
+    timestamp: float
+    frame: Any
+
+
+@dataclass
+class FrameResult:
+    frame_id: int
+    timestamp: float
+    annotated_frame: Any
+    detections: Any = None
+    inference_time: float = 0.0
+    skipped: bool = False
+    # Detections that started new tracks; None when tracking is off
+    new_detections: Any = None
+
+
+class CaptureWorker(threading.Thread):
+    """Reads frames from a cv2.VideoCapture as fast as the camera delivers them.
+
+    Sources that timestamp frames when they arrive (``frame_time``, e.g.
+    ``stream_source.StreamSource``) keep that timestamp. Sources that are not
+    live (``live`` is False, e.g. a StreamSource reading a file in full) wait
+    for room in the queue instead of replacing a frame inference hasn't taken.
+    """
+
+    def __init__(self, cap, output: LatestQueue, stop_event: threading.Event,
+                 metrics: MetricsRegistry = REGISTRY, labels: Optional[dict] = None):
+        super().__init__(name="capture", daemon=True)
+        self.cap = cap
+        self.output = output
+        self.stop_event = stop_event
+        self.wait = not getattr(cap, 'live', True)
+        self.frames_read = 0
+        self.error: Optional[str] = None
+        self._read_counter = metrics.counter("frames_read_total", "Frames read from capture sources", labels)
+        self._read_latency = metrics.histogram("stage_latency_seconds", "Per-stage latency",
+                                               {'stage': 'capture', **(labels or {})})
+
+    def run(self):
+        while not self.stop_event.is_set():
+            with self._read_latency.time():
+                ret, frame = self.cap.read()
+            if not ret:
+                self.error = getattr(self.cap, 'error', None) or "Gagal membaca dari kamera"
+                # Let inference take the last frame of a file before the pipeline stops
+                self._wait_for_room()
+                self.stop_event.set()
+                break
+            timestamp = getattr(self.cap, 'frame_time', None) or time.time()
+            if not self._wait_for_room():
+                break
+            self.output.put(CapturedFrame(self.frames_read, timestamp, frame))
+            self.frames_read += 1
+            self._read_counter.inc()
+
+    def _wait_for_room(self) -> bool:
+        while self.wait and not self.output.wait_for_room(0.1):
+            if self.stop_event.is_set():
+                return False
+        return True
+
+
+class InferenceWorker(threading.Thread):
+    """Runs detection (or track propagation) on the newest captured frame.
+
+    With ``copy_frames`` the source's frames are borrowed buffers (e.g. shared
+    memory slots that are reused after the next ``get``), so annotated frames
+    that still point into them are copied before they are queued.
+    ``result_callback`` is called with every result on this thread before it
+    is queued, so it sees results the consumer later misses.
+    """
+
+    def __init__(self, detector, confidence: float, source: LatestQueue,
+                 output: LatestQueue, stop_event: threading.Event, motion_gate=None, tracking=None,
+                 metrics: MetricsRegistry = REGISTRY, render: bool = True, controller=None, roi=None,
+                 copy_frames: bool = False, result_callback: Optional[Callable[[FrameResult], None]] = None):
+        super().__init__(name="inference", daemon=True)
+        self.detector = detector
+        self.copy_frames = copy_frames
+        self.result_callback = result_callback
+        self.confidence = confidence
+        self.render = render
+        self.controller = controller
+        self.roi = roi
+        self.motion_gate = motion_gate
+        self.tracking = tracking
+        self.source = source
+        self.output = output
+        self.stop_event = stop_event
+        self.frames_inferred = 0
+        self.frames_skipped = 0
+        self.error: Optional[str] = None
+        self._inferred_counter = metrics.counter("frames_inferred_total", "Frames sent through the model")
+        self._skipped_counter = metrics.counter("frames_skipped_total",
+                                                "Frames that skipped the model (motion gate/tracking)")
+        self._latency = metrics.histogram("stage_latency_seconds", "Per-stage latency",
+                                          {'stage': 'inference'})
+
+    def run(self):
+        while not self.stop_event.is_set():
+            captured = self.source.get(timeout=0.1)
+            if captured is None:
+                continue
+            try:
+                start = time.time()
+                result = self._process(captured)
+                result.inference_time = time.time() - start
+                self._latency.observe(result.inference_time)
+                # Frames skipped by stride, motion gate or tracking cost next to nothing and would drag
+                # the controller's estimate down
+                if self.controller is not None and not result.skipped:
+                    self.controller.observe(result.inference_time)
+                if self.result_callback is not None:
+                    self.result_callback(result)
+            except Exception as e:
+                self.error = f"Error dalam deteksi: {e}"
+                self.stop_event.set()
+                break
+            self.output.put(result)
+
+    def _process(self, captured: CapturedFrame) -> FrameResult:
+        frame = captured.frame
+        run_detector = self.tracking is None or self.tracking.should_detect()
+        if self.controller is not None:
+            run_detector = self.controller.should_infer() and run_detector
+        if run_detector and self.motion_gate is not None:
+            run_detector = self.motion_gate.should_infer(frame)
+
+        new_detections = None
+        if self.tracking is not None:
+            annotated_frame, detections, new_detections, _ = self.tracking.process(
+                frame, self.confidence, run_detector, roi=self.roi
+            )
+        elif run_detector:
+            results = self.detector.detect(frame, self.confidence, roi=self.roi)
+            annotated_frame, detections = self.detector.process_results(results, render=self.render)
+        else:
+            annotated_frame = self.detector.to_output_channels(frame) if self.render else None
+            detections = Detections.empty(self.detector.class_names)
+
+        # BGR output without detections (or drawn in place) is the captured frame itself
+        if self.copy_frames and annotated_frame is not None and np.may_share_memory(annotated_frame, frame):
+            annotated_frame = annotated_frame.copy()
+
+        if run_detector:
+            self.frames_inferred += 1
+            self._inferred_counter.inc()
+            if self.motion_gate is not None:
+                self.motion_gate.record_detections(len(detections))
+        else:
+            self.frames_skipped += 1
+            self._skipped_counter.inc()
+
+        return FrameResult(
+            captured.frame_id, captured.timestamp, annotated_frame, detections,
+            skipped=not run_detector, new_detections=new_detections
+        )
+
+
+class DetectionPipeline:
+    """Staged capture -> inference pipeline connected by latest-wins queues.
+
+    Capture and inference run on background threads; the render/notify stage
+    is whoever calls :meth:`get_result` (the Streamlit script thread, since
+    Streamlit elements may only be updated from there, or the headless daemon).
+    With ``render=False`` results carry detections only and no annotated frame.
+    An ``adaptive.AdaptiveController`` lets the inference stage trade image
+    size, stride and motion sensitivity for speed to hold a latency budget.
+    A ``roi.RegionOfInterest`` limits detection to part of the frame.
+    ``result_callback`` sees every result on the inference thread, including
+    those the latest-wins result queue drops; anything that must not miss a
+    result (session totals, the event store) belongs there.
+    ``cap`` may also be a ``shm_ring.ProcessCapture``; frames then come from a
+    capture process through shared memory and no capture thread is started.
+    """
+
+    def __init__(self, cap, detector, confidence: float = 0.5, motion_gate=None, tracking=None,
+                 metrics: MetricsRegistry = REGISTRY, render: bool = True, controller=None, roi=None,
+                 result_callback: Optional[Callable[[FrameResult], None]] = None):
+        self._stop_event = threading.Event()
+        dropped_help = "Stale frames dropped by latest-frame-wins queues"
+        self.process_capture = callable(getattr(cap, 'get', None)) and hasattr(cap, 'ring')
+        if self.process_capture:
+            self.frame_queue = cap
+            self.capture_worker = None
+        else:
+            self.frame_queue = LatestQueue(
+                maxsize=1, drop_counter=metrics.counter("frames_dropped_total", dropped_help, {'queue': 'capture'})
+            )
+            self.capture_worker = CaptureWorker(cap, self.frame_queue, self._stop_event, metrics)
+        self.result_queue = LatestQueue(
+            maxsize=1, drop_counter=metrics.counter("frames_dropped_total", dropped_help, {'queue': 'result'})
+        )
+        self.inference_worker = InferenceWorker(
+            detector, confidence, self.frame_queue, self.result_queue, self._stop_event,
+            motion_gate=motion_gate, tracking=tracking, metrics=metrics, render=render,
+            controller=controller, roi=roi, copy_frames=self.process_capture,
+            result_callback=result_callback
+        )
+
+    def start(self) -> "DetectionPipeline":
+        if self.process_capture:
+            self.frame_queue.start(self._stop_event)
+        else:
+            self.capture_worker.start()
+        self.inference_worker.start()
+        return self
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._stop_event.set()
+        for worker in (self.capture_worker, self.inference_worker):
+            if worker is not None and worker.is_alive():
+                worker.join(timeout)
+        if self.process_capture:
+            self.frame_queue.stop(timeout)
+
+    def get_result(self, timeout: Optional[float] = None) -> Optional[FrameResult]:
+        return self.result_queue.get(timeout)
+
+    @property
+    def running(self) -> bool:
+        return not self._stop_event.is_set()
+
+    @property
+    def error(self) -> Optional[str]:
+        capture_error = self.frame_queue.error if self.process_capture else self.capture_worker.error
+        return capture_error or self.inference_worker.error
+
+    @property
+    def frames_dropped(self) -> int:
+        return self.frame_queue.dropped + self.result_queue.dropped
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,123 @@
+import time
+from typing import Dict
+
+import cv2
+import numpy as np
+
+from detections import Detections
+
+
+def hex_to_bgr(color_hex: str):
+    return tuple(int(color_hex[i:i+2], 16) for i in (5, 3, 1))
+
+
+class AnnotationRenderer:
+    """Fast box/label renderer used instead of Ultralytics' ``result.plot()``.
+
+    Colours and label glyph sizes are computed once per class, and boxes are
+    drawn straight into the given frame. ``channels`` tells the renderer the
+    colour order of the frame it draws on, so callers can keep frames in BGR
+    (OpenCV/video) or RGB (display) without a full-frame conversion.
+    """
+
+    font = cv2.FONT_HERSHEY_SIMPLEX
+
+    def __init__(self, class_names: Dict[int, str], class_colors: Dict[str, str],
+                 font_scale: float = 0.6, thickness: int = 2,
+                 default_color: str = '#FFFFFF', text_color=(255, 255, 255)):
+        self.class_names = class_names
+        self.font_scale = font_scale
+        self.thickness = thickness
+        self.text_color = text_color
+        self._default_bgr = hex_to_bgr(default_color)
+        self._colors = {
+            'BGR': {class_id: hex_to_bgr(class_colors.get(name, default_color))
+                    for class_id, name in class_names.items()},
+        }
+        self._colors['RGB'] = {class_id: color[::-1] for class_id, color in self._colors['BGR'].items()}
+        # Confidence labels always render as "<name> d.dd", so one measurement per class suffices
+        self._label_sizes = {class_id: self._measure(f"{name} 0.00")
+                             for class_id, name in class_names.items()}
+
+    def _measure(self, label: str):
+        (width, height), _ = cv2.getTextSize(label, self.font, self.font_scale, self.thickness)
+        return width, height
+
+    def render(self, frame: np.ndarray, detections: Detections, channels: str = 'BGR') -> np.ndarray:
+        """Draw detections into ``frame`` in place and return it"""
+        if not len(detections):
+            return frame
+
+        colors = self._colors[channels]
+        default_color = self._default_bgr if channels == 'BGR' else self._default_bgr[::-1]
+        boxes = np.rint(detections.boxes).astype(np.int32)
+
+        for (x1, y1, x2, y2), score, class_id in zip(boxes.tolist(), detections.scores.tolist(),
+                                                     detections.class_ids.tolist()):
+            color = colors.get(class_id, default_color)
+            cv2.rectangle(frame, (x1, y1), (x2, y2), color, self.thickness)
+
+            label = f"{detections.class_name(class_id)} {score:.2f}"
+            label_size = self._label_sizes.get(class_id)
+            if label_size is None:
+                label_size = self._label_sizes[class_id] = self._measure(label)
+            label_width, label_height = label_size
+
+            # Put the label inside the box when it would fall off the top edge
+            top = y1 - label_height - 10
+            if top < 0:
+                top = y1
+            cv2.rectangle(frame, (x1, top), (x1 + label_width, top + label_height + 10), color, -1)
+            cv2.putText(frame, label, (x1, top + label_height + 5), self.font,
+                        self.font_scale, self.text_color, self.thickness)
+
+        return frame
+
+
+def benchmark_renderers(detector, frame: np.ndarray, confidence: float = 0.25,
+                        repeat: int = 50) -> Dict[str, float]:
+    """Compare ms/frame of ``result.plot()`` + cvtColor against AnnotationRenderer"""
+    results = detector.detect(frame, confidence)
+    result = results[0]
+    detections = Detections.from_ultralytics(result, detector.class_names)
+    renderer = AnnotationRenderer(detector.class_names, detector.class_colors)
+
+    timings = {}
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        cv2.cvtColor(result.plot(), cv2.COLOR_BGR2RGB)
+    timings['ultralytics_plot_rgb'] = (time.perf_counter() - start) * 1000 / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        renderer.render(frame.copy(), detections, channels='BGR')
+    timings['fast_bgr'] = (time.perf_counter() - start) * 1000 / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        renderer.render(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), detections, channels='RGB')
+    timings['fast_rgb'] = (time.perf_counter() - start) * 1000 / repeat
+
+    timings['detections'] = len(detections)
+    return timings
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from detector import DroneDetector
+
+    parser = argparse.ArgumentParser(description="Benchmark annotation renderers")
+    parser.add_argument("image", help="Path to a test image")
+    parser.add_argument("--model", default="Model/YoloV12_Best.pt")
+    parser.add_argument("--confidence", type=float, default=0.25)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    image = cv2.imread(args.image)
+    if image is None:
+        raise SystemExit(f"Cannot read image: {args.image}")
+    timings = benchmark_renderers(DroneDetector(args.model), image, args.confidence, args.repeat)
+    for name, value in timings.items():
+        print(f"{name}: {value:.3f}" if isinstance(value, float) else f"{name}: {value}")
@@ -0,0 +1,144 @@
+"""Disk-backed, content-addressed cache of processed uploads.
+
+Entries are keyed by the upload's content hash, the model's identity (its
+weights hash, backend, image size and rendering settings) and every setting
+that changes the output. Each entry holds the detections as ``.npz`` and
+the annotated output file. Entries are written to a temp directory and
+renamed into place, so concurrent sessions never see a partial entry.
+When the total size goes over ``max_bytes``, the least recently used
+entries are evicted; a hit refreshes an entry's mtime.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from detections import Detections
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "results")
+DETECTIONS_FILE = "detections.npz"
+OPTIONAL_COLUMNS = ("track_ids", "frame_indices", "timestamps")
+
+
+def stream_digest(fileobj, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file-like object, read in chunks (position is restored to 0)"""
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for chunk in iter(lambda: fileobj.read(chunk_size), b""):
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=16)
+def _weights_hash(model_path: str, mtime: float, size: int) -> str:
+    from backends import model_hash
+    return model_hash(model_path)
+
+
+def model_identity(detector) -> str:
+    """Everything about the detector that affects its output"""
+    screener = getattr(detector, 'screener', None)
+    if screener is not None:
+        return (f"cascade({model_identity(screener)}@{detector.screen_confidence}:{detector.escalate}"
+                f">{model_identity(detector.verifier)})")
+    path = detector.model_path
+    try:
+        stat = os.stat(path)
+        weights = _weights_hash(path, stat.st_mtime, stat.st_size)
+    except OSError:
+        weights = path
+    return f"{weights}:{detector.backend}:{detector.imgsz}:{detector.renderer_name}:{detector.output_channels}"
+
+
+def make_key(content_hash: str, model: str, **params) -> str:
+    payload = json.dumps({'content': content_hash, 'model': model, 'params': params},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def save_detections(path: str, detections: Detections):
+    columns = {'boxes': detections.boxes, 'scores': detections.scores, 'class_ids': detections.class_ids}
+    for name in OPTIONAL_COLUMNS:
+        if getattr(detections, name) is not None:
+            columns[name] = getattr(detections, name)
+    np.savez(path, **columns)
+
+
+def load_detections(path: str, class_names: Dict[int, str]) -> Detections:
+    with np.load(path) as data:
+        optional = {name: data[name] for name in OPTIONAL_COLUMNS if name in data.files}
+        return Detections(data['boxes'], data['scores'], data['class_ids'], class_names, **optional)
+
+
+class ResultCache:
+    def __init__(self, root: str = DEFAULT_CACHE_DIR, max_bytes: int = 2 * 1024 ** 3):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+
+    def _entry(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def get(self, key: str, class_names: Dict[int, str]) -> Optional[Tuple[Optional[str], Detections]]:
+        """(cached output path or None, detections) for ``key``, or None on a miss"""
+        entry = self._entry(key)
+        try:
+            with open(os.path.join(entry, "meta.json")) as f:
+                meta = json.load(f)
+            detections = load_detections(os.path.join(entry, DETECTIONS_FILE), class_names)
+            os.utime(entry)
+        except (OSError, ValueError, KeyError):
+            return None
+        output = meta.get('output')
+        return (os.path.join(entry, output) if output else None), detections
+
+    def put(self, key: str, detections: Detections, output_path: Optional[str] = None) -> Optional[str]:
+        """Store an entry, moving ``output_path`` into it; returns the cached output path"""
+        staging = tempfile.mkdtemp(dir=self.root, prefix=".tmp-")
+        output = None
+        if output_path:
+            output = "output" + os.path.splitext(output_path)[1]
+            shutil.move(output_path, os.path.join(staging, output))
+        save_detections(os.path.join(staging, DETECTIONS_FILE), detections)
+        with open(os.path.join(staging, "meta.json"), "w") as f:
+            json.dump({'output': output}, f)
+
+        entry = self._entry(key)
+        try:
+            os.rename(staging, entry)
+        except OSError:
+            # Another session stored the same key first; keep theirs
+            shutil.rmtree(staging, ignore_errors=True)
+        self.evict(keep=entry)
+        return os.path.join(entry, output) if output else None
+
+    def _entries(self):
+        entries = []
+        for item in os.scandir(self.root):
+            if not item.is_dir() or item.name.startswith("."):
+                continue
+            size = sum(f.stat().st_size for f in os.scandir(item.path) if f.is_file())
+            entries.append((item.stat().st_mtime, size, item.path))
+        return entries
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, keep: Optional[str] = None):
+        """Drop least recently used entries until the cache fits ``max_bytes``"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
@@ -0,0 +1,95 @@
+"""Region-of-interest masks that restrict detection to part of the frame.
+
+A ``RegionOfInterest`` holds one or more polygons in normalised (0-1) frame
+coordinates, so one definition works at any capture resolution. Before
+inference the frame is cropped to the polygons' bounding box, which gives
+the model fewer pixels to resize and letterbox. Afterwards boxes are shifted
+back to full-frame coordinates, and boxes whose centre lies outside the
+polygons are dropped, e.g. birds in the trees below the skyline.
+"""
+from typing import Dict, List, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from detections import Detections
+
+Point = Tuple[float, float]
+
+
+class RegionOfInterest:
+    def __init__(self, polygons: Sequence[Sequence[Point]]):
+        self.polygons: List[np.ndarray] = []
+        for polygon in polygons:
+            points = np.asarray(polygon, dtype=np.float64).reshape(-1, 2)
+            if len(points) < 3:
+                raise ValueError("ROI polygon needs at least 3 points")
+            if points.min() < 0.0 or points.max() > 1.0:
+                raise ValueError("ROI coordinates must be normalised to 0-1")
+            self.polygons.append(points)
+        if not self.polygons:
+            raise ValueError("ROI needs at least one polygon")
+        # Per frame size: (mask, (x0, y0, x1, y1))
+        self._geometry: Dict[Tuple[int, int], Tuple[np.ndarray, Tuple[int, int, int, int]]] = {}
+
+    @classmethod
+    def parse(cls, spec: str) -> "RegionOfInterest":
+        """From ``"x,y x,y x,y; x,y x,y x,y"``: points separated by spaces, polygons by ``;``"""
+        try:
+            polygons = [[tuple(float(value) for value in point.split(","))
+                         for point in polygon.split()]
+                        for polygon in spec.split(";") if polygon.strip()]
+        except ValueError:
+            raise ValueError(f"Invalid ROI {spec!r}, expected 'x,y x,y x,y[; ...]'") from None
+        return cls(polygons)
+
+    @classmethod
+    def above(cls, horizon: float) -> "RegionOfInterest":
+        """Everything above ``horizon`` (fraction of the frame height from the top)"""
+        return cls([[(0.0, 0.0), (1.0, 0.0), (1.0, horizon), (0.0, horizon)]])
+
+    def __str__(self) -> str:
+        return "; ".join(" ".join(f"{x:g},{y:g}" for x, y in polygon) for polygon in self.polygons)
+
+    def _get_geometry(self, shape) -> Tuple[np.ndarray, Tuple[int, int, int, int]]:
+        height, width = shape[:2]
+        geometry = self._geometry.get((height, width))
+        if geometry is None:
+            scale = np.array([width, height], dtype=np.float64)
+            pixels = [np.round(polygon * scale).astype(np.int32) for polygon in self.polygons]
+            mask = np.zeros((height, width), dtype=np.uint8)
+            cv2.fillPoly(mask, pixels, 1)
+            stacked = np.concatenate(pixels)
+            x0, y0 = np.clip(stacked.min(axis=0), 0, [width, height])
+            x1, y1 = np.clip(stacked.max(axis=0) + 1, 0, [width, height])
+            geometry = (mask, (int(x0), int(y0), int(x1), int(y1)))
+            self._geometry[(height, width)] = geometry
+        return geometry
+
+    def mask(self, shape) -> np.ndarray:
+        """uint8 mask (1 inside the ROI) for a frame of ``shape``"""
+        return self._get_geometry(shape)[0]
+
+    def bounds(self, shape) -> Tuple[int, int, int, int]:
+        """Pixel bounding box ``(x0, y0, x1, y1)`` of the polygons, end exclusive"""
+        return self._get_geometry(shape)[1]
+
+    def crop(self, frame: np.ndarray) -> Tuple[np.ndarray, Tuple[int, int]]:
+        """View of ``frame`` cut to the ROI bounding box, and its ``(x, y)`` offset"""
+        x0, y0, x1, y1 = self.bounds(frame.shape)
+        return frame[y0:y1, x0:x1], (x0, y0)
+
+    def restore(self, detections: Detections, offset: Tuple[int, int], shape) -> Detections:
+        """Shift crop detections to full-frame coordinates and drop those outside the mask"""
+        if not len(detections):
+            return detections
+        x0, y0 = offset
+        boxes = detections.boxes + np.array([x0, y0, x0, y0], dtype=np.float32)
+        shifted = Detections(boxes, detections.scores, detections.class_ids, detections.class_names,
+                             track_ids=detections.track_ids, frame_indices=detections.frame_indices,
+                             timestamps=detections.timestamps)
+        mask = self.mask(shape)
+        height, width = mask.shape
+        centre_x = ((boxes[:, 0] + boxes[:, 2]) / 2).astype(np.int64).clip(0, width - 1)
+        centre_y = ((boxes[:, 1] + boxes[:, 3]) / 2).astype(np.int64).clip(0, height - 1)
+        return shifted.filter(mask[centre_y, centre_x].astype(bool))
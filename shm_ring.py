@@ -0,0 +1,303 @@
+"""Capture in a separate process, handing frames over through shared memory.
+
+``SharedFrameRing`` is a ring of preallocated frame slots in a
+``multiprocessing.shared_memory`` block, with a small header of sequence
+numbers. The producer decodes straight into a free slot and publishes it
+by bumping the sequence number. The consumer takes the newest slot by
+index and uses the frame in place, so no frame is pickled or copied between
+processes.
+The consumer pins the slot it is working on and the producer never writes
+into a pinned slot or the newest one. A lock guards only the few header
+updates, never the frame data. Sequence gaps show how many stale frames
+were skipped. One ring has one producer and one consumer.
+
+``ProcessCapture`` runs ``cv2.VideoCapture`` in a child process that fills
+a ring. It can be passed to ``DetectionPipeline`` in place of a capture, so
+decoding no longer competes with inference for the GIL.
+"""
+import multiprocessing
+import signal
+import time
+from multiprocessing.shared_memory import SharedMemory
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from metrics import REGISTRY, MetricsRegistry
+from pipeline import CapturedFrame
+
+# Header: state, newest published sequence number, newest slot
+HEADER_FIELDS = 3
+# Per slot: sequence number (-1 while being written), frame id, timestamp (ns), pinned
+SLOT_FIELDS = 4
+
+STARTING, RUNNING, ENDED, FAILED = range(4)
+
+
+class SharedFrameRing:
+    def __init__(self, shape: Tuple[int, int, int], slots: int = 4, name: Optional[str] = None,
+                 lock=None, create: bool = True):
+        if slots < 3:
+            raise ValueError("A frame ring needs at least 3 slots (newest, pinned, being written)")
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.lock = lock if lock is not None else multiprocessing.get_context("spawn").Lock()
+        meta_bytes = (HEADER_FIELDS + SLOT_FIELDS * slots) * 8
+        frames_offset = -(-meta_bytes // 64) * 64
+        size = frames_offset + slots * int(np.prod(self.shape))
+        # Spawned children share the parent's resource tracker, so attaching there
+        # adds nothing to unregister; the creator unlinks the block
+        self.shm = SharedMemory(name=name, create=create, size=size if create else 0)
+        self._meta = np.ndarray((HEADER_FIELDS + SLOT_FIELDS * slots,), dtype=np.int64, buffer=self.shm.buf)
+        self._slot_meta = self._meta[HEADER_FIELDS:].reshape(slots, SLOT_FIELDS)
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=self.shm.buf,
+                                 offset=frames_offset)
+        if create:
+            self._meta[:] = 0
+            self._slot_meta[:, 0] = 0
+        self._last_written = -1
+        self._pinned: Optional[int] = None
+
+    @classmethod
+    def attach(cls, name: str, shape: Tuple[int, int, int], slots: int, lock) -> "SharedFrameRing":
+        return cls(shape, slots, name=name, lock=lock, create=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def state(self) -> int:
+        return int(self._meta[0])
+
+    @state.setter
+    def state(self, value: int):
+        self._meta[0] = value
+
+    @property
+    def sequence(self) -> int:
+        """Sequence number of the newest published frame (0 = none yet)"""
+        return int(self._meta[1])
+
+    # Producer side
+
+    def begin_write(self) -> int:
+        """Claim a slot that is neither pinned nor the newest; returns its index"""
+        with self.lock:
+            newest = self._meta[2] if self._meta[1] else -1
+            for step in range(1, self.slots + 1):
+                index = (self._last_written + step) % self.slots
+                if index != newest and not self._slot_meta[index, 3]:
+                    break
+            self._slot_meta[index, 0] = -1
+        self._last_written = index
+        return index
+
+    def commit(self, index: int, frame_id: int, timestamp: float) -> int:
+        """Publish a written slot as the newest frame; returns its sequence number"""
+        with self.lock:
+            sequence = int(self._meta[1]) + 1
+            self._slot_meta[index, 1] = frame_id
+            self._slot_meta[index, 2] = int(timestamp * 1e9)
+            self._slot_meta[index, 0] = sequence
+            self._meta[2] = index
+            self._meta[1] = sequence
+        return sequence
+
+    def write(self, frame: np.ndarray, frame_id: int, timestamp: float) -> int:
+        """Copy ``frame`` into a free slot and publish it"""
+        index = self.begin_write()
+        np.copyto(self.frames[index], frame)
+        return self.commit(index, frame_id, timestamp)
+
+    # Consumer side
+
+    def acquire(self, after: int = 0) -> Optional[Tuple[int, int, int, float]]:
+        """Pin the newest frame if it is newer than sequence ``after``.
+
+        Returns ``(sequence, slot, frame_id, timestamp)``. The previously
+        pinned slot is released, so the caller must be done with it.
+        """
+        with self.lock:
+            sequence = int(self._meta[1])
+            if sequence <= after:
+                return None
+            index = int(self._meta[2])
+            if self._pinned is not None and self._pinned != index:
+                self._slot_meta[self._pinned, 3] = 0
+            self._slot_meta[index, 3] = 1
+            self._pinned = index
+            _, frame_id, timestamp_ns, _ = self._slot_meta[index].tolist()
+        return sequence, index, frame_id, timestamp_ns / 1e9
+
+    def release(self):
+        with self.lock:
+            if self._pinned is not None:
+                self._slot_meta[self._pinned, 3] = 0
+                self._pinned = None
+
+    def close(self):
+        # Views must go before the buffer can be closed
+        del self._meta, self._slot_meta, self.frames
+        try:
+            self.shm.close()
+        except BufferError:
+            # Frames handed out are still referenced; the mapping is freed along with them
+            pass
+
+    def unlink(self):
+        self.shm.unlink()
+
+
+def _capture_main(source, ring_name: str, shape, slots: int, lock, go_event, stop_event, properties: dict):
+    # Shutdown signals sent to the whole process group are handled by the parent, which stops us
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    parent = multiprocessing.parent_process()
+    ring = SharedFrameRing.attach(ring_name, shape, slots, lock)
+    cap = cv2.VideoCapture(source)
+    try:
+        if not cap.isOpened():
+            ring.state = FAILED
+            return
+        for prop, value in properties.items():
+            cap.set(prop, value)
+        height, width = shape[:2]
+        ring.state = RUNNING
+        # Opened; frames are only read once the consumer starts, so a file isn't run through early
+        while not go_event.wait(0.1):
+            if stop_event.is_set() or not parent.is_alive():
+                return
+        frame_id = 0
+        while not stop_event.is_set() and parent.is_alive():
+            index = ring.begin_write()
+            slot = ring.frames[index]
+            # Decode straight into shared memory when the size already matches
+            ret, frame = cap.read(slot)
+            if not ret:
+                break
+            if frame.shape != slot.shape:
+                cv2.resize(frame, (width, height), dst=slot)
+            elif frame.ctypes.data != slot.ctypes.data:
+                np.copyto(slot, frame)
+            ring.commit(index, frame_id, time.time())
+            frame_id += 1
+        ring.state = ENDED
+    finally:
+        cap.release()
+        ring.close()
+
+
+class ProcessCapture:
+    """A capture source read by a child process into a SharedFrameRing.
+
+    Frames are resized to ``frame_size`` (width, height) if the source
+    delivers another size. ``get`` has the same contract as
+    ``pipeline.LatestQueue.get`` and returns the newest frame as a view into
+    shared memory. The view stays valid until the next ``get``.
+    """
+
+    def __init__(self, source, frame_size: Tuple[int, int] = (640, 480), fps: Optional[float] = None,
+                 slots: int = 4, metrics: MetricsRegistry = REGISTRY, labels: Optional[dict] = None):
+        self.source = source
+        width, height = frame_size
+        context = multiprocessing.get_context("spawn")
+        self.ring = SharedFrameRing((height, width, 3), slots, lock=context.Lock())
+        properties = {cv2.CAP_PROP_FRAME_WIDTH: width, cv2.CAP_PROP_FRAME_HEIGHT: height}
+        if fps:
+            properties[cv2.CAP_PROP_FPS] = fps
+        self._child_go = context.Event()
+        self._child_stop = context.Event()
+        self._process = context.Process(
+            target=_capture_main, name="capture-process", daemon=True,
+            args=(source, self.ring.name, self.ring.shape, slots, self.ring.lock, self._child_go,
+                  self._child_stop, properties)
+        )
+        self._stop_event = None
+        self._last_sequence = 0
+        self.frames_read = 0
+        self.dropped = 0
+        self.error: Optional[str] = None
+        self._read_counter = metrics.counter("frames_read_total", "Frames read from capture sources", labels)
+        self._drop_counter = metrics.counter("frames_dropped_total",
+                                             "Stale frames dropped by latest-frame-wins queues",
+                                             {'queue': 'shared_memory', **(labels or {})})
+
+    def open(self) -> "ProcessCapture":
+        """Start the child, which opens the source but doesn't read frames yet"""
+        if self._process.pid is None:
+            self._process.start()
+        return self
+
+    def start(self, stop_event=None) -> "ProcessCapture":
+        """Start reading frames; ``stop_event`` (if given) is set once the source ends or fails"""
+        if stop_event is not None:
+            self._stop_event = stop_event
+        self.open()
+        self._child_go.set()
+        return self
+
+    def isOpened(self, timeout: float = 10.0) -> bool:
+        """Wait for the child (started by :meth:`open`) to open the source"""
+        deadline = time.monotonic() + timeout
+        while self.ring.state == STARTING and self._process.is_alive() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return self.ring.state in (RUNNING, ENDED)
+
+    def get(self, timeout: Optional[float] = None) -> Optional[CapturedFrame]:
+        ring = self.ring
+        if ring is None:
+            return None
+        deadline = time.monotonic() + (timeout or 0.0)
+        while True:
+            acquired = ring.acquire(self._last_sequence)
+            if acquired is not None:
+                break
+            if ring.state in (ENDED, FAILED) or not self._process.is_alive():
+                self._finish(ring)
+                return None
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(0.001)
+        sequence, index, frame_id, timestamp = acquired
+        skipped = sequence - self._last_sequence - 1
+        if skipped > 0 and self._last_sequence:
+            self.dropped += skipped
+            self._drop_counter.inc(skipped)
+        read = sequence - self._last_sequence
+        self.frames_read += read
+        self._read_counter.inc(read)
+        self._last_sequence = sequence
+        return CapturedFrame(frame_id, timestamp, ring.frames[index])
+
+    def _finish(self, ring: SharedFrameRing):
+        if self.error is None:
+            self.error = ("Gagal membuka sumber video" if ring.state == FAILED
+                          else "Gagal membaca dari kamera")
+        if self._stop_event is not None:
+            self._stop_event.set()
+
+    def clear(self):
+        if self.ring is not None:
+            self._last_sequence = self.ring.sequence
+
+    def __len__(self) -> int:
+        return int(self.ring is not None and self.ring.sequence > self._last_sequence)
+
+    def stop(self, timeout: float = 2.0):
+        self._child_stop.set()
+        if self._process.is_alive():
+            self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join(timeout)
+
+    def release(self):
+        """Stop the child and free the shared memory (cv2.VideoCapture-style)"""
+        self.stop()
+        if self.ring is not None:
+            self.ring.release()
+            self.ring.close()
+            self.ring.unlink()
+            self.ring = None
@@ -0,0 +1,308 @@
+"""Live video sources with a background grabber and automatic reconnect.
+
+``StreamSource`` wraps ``cv2.VideoCapture`` for a camera index, an RTSP/HTTP
+URL or a video file. A grabber thread reads frames as fast as the source
+delivers them and keeps only the newest one (``buffer=1``). The consumer
+therefore never works through a backlog queued in OpenCV or the camera, and
+each frame it gets is as fresh as possible. Frames are timestamped when they
+are grabbed, so capture-to-result latency metrics measure the real age.
+
+When the source fails, the grabber reopens it with exponential backoff.
+When no frame has arrived for ``stall_timeout`` seconds, e.g. a read hanging
+on a dead network stream, a watchdog abandons the stuck reader and starts a
+fresh connection. ``read`` waits through reconnects. It only fails once the
+source has ended for good: a file reached its end, or reconnecting was given
+up after ``max_retries`` failed attempts in a row. A network source that
+retries forever counts as opened even while it is still down, so a camera
+that is offline at startup is picked up once it comes back.
+
+A video file can stand in for a live camera with ``realtime=True``. It is
+then played at its own frame rate and looped, and older frames are dropped
+like those of a camera. Without it, files are read in full: the grabber
+waits for the consumer instead of dropping frames.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from typing import Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+import cv2
+
+from metrics import REGISTRY, MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+NETWORK_SCHEMES = ("rtsp://", "rtsps://", "rtmp://", "http://", "https://", "udp://", "tcp://")
+
+
+def is_network_source(source) -> bool:
+    return isinstance(source, str) and source.lower().startswith(NETWORK_SCHEMES)
+
+
+def redact_source(source) -> str:
+    """``source`` as text for logs, labels, storage and display, without URL credentials"""
+    if not is_network_source(source):
+        return str(source)
+    parts = urlsplit(source)
+    if "@" not in parts.netloc:
+        return source
+    return urlunsplit(parts._replace(netloc=parts.netloc.rpartition("@")[2]))
+
+
+class StreamSource:
+    """A cv2.VideoCapture-like source that reconnects and keeps the newest frames"""
+
+    def __init__(self, source, frame_size: Optional[Tuple[int, int]] = None, fps: Optional[float] = None,
+                 buffer: int = 1, realtime: bool = False, max_retries: int = 0, backoff_initial: float = 0.5,
+                 backoff_max: float = 30.0, stall_timeout: float = 10.0, open_timeout: float = 10.0,
+                 metrics: MetricsRegistry = REGISTRY, labels: Optional[dict] = None):
+        """frame_size: (width, height) requested from the source; fps likewise
+
+        buffer: frames kept for the consumer; larger values behave like buffered reads
+        max_retries: failed reconnect attempts in a row before giving up (0 = never)
+        """
+        self.source = source
+        # Never log or label the raw URL, which may carry credentials
+        self.name = redact_source(source)
+        self.is_file = isinstance(source, str) and not is_network_source(source)
+        self.realtime = realtime and self.is_file
+        # Live sources drop old frames; plain files are read in full
+        self.live = not self.is_file or self.realtime
+        self.max_retries = max_retries
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.stall_timeout = stall_timeout
+        self.open_timeout = open_timeout
+        self._properties = {}
+        if frame_size:
+            self._properties[cv2.CAP_PROP_FRAME_WIDTH] = frame_size[0]
+            self._properties[cv2.CAP_PROP_FRAME_HEIGHT] = frame_size[1]
+        if fps:
+            self._properties[cv2.CAP_PROP_FPS] = fps
+        if not self.is_file:
+            # Backends that honour it keep no backlog of their own
+            self._properties[cv2.CAP_PROP_BUFFERSIZE] = 1
+
+        self._frames = deque(maxlen=max(int(buffer), 1))
+        self._cond = threading.Condition()
+        self._stopped = threading.Event()
+        self._first_attempt = threading.Event()
+        self._generation = 0
+        self._last_frame_at = time.monotonic()
+        self.connected = False
+        self.opened = False
+        self.ended = False
+        self.error: Optional[str] = None
+        self.frame_time: Optional[float] = None
+        self.frames_grabbed = 0
+        self.dropped = 0
+        self.reconnects = 0
+        self.stalls = 0
+
+        labels = labels or {}
+        self._connected_gauge = metrics.gauge("stream_connected", "Whether a live source is connected", labels)
+        reconnect_help = "Reconnects of live sources by reason"
+        self._failed_counter = metrics.counter("stream_reconnects_total", reconnect_help,
+                                               {'reason': 'failed', **labels})
+        self._stalled_counter = metrics.counter("stream_reconnects_total", reconnect_help,
+                                                {'reason': 'stalled', **labels})
+        self._drop_counter = metrics.counter("frames_dropped_total",
+                                             "Stale frames dropped by latest-frame-wins queues",
+                                             {'queue': 'stream', **labels})
+
+        self._start_grabber()
+        self._watchdog = threading.Thread(target=self._watch, name="stream-watchdog", daemon=True)
+        self._watchdog.start()
+
+    # cv2.VideoCapture interface
+
+    def isOpened(self, timeout: Optional[float] = None) -> bool:
+        """Wait (up to ``open_timeout``) for the first connection attempt"""
+        self._first_attempt.wait(self.open_timeout if timeout is None else timeout)
+        if self._stopped.is_set() or self.ended:
+            return False
+        if not self.opened and is_network_source(self.source) and not self.max_retries:
+            logger.warning("Sumber %s belum tersambung, terus mencoba", self.name)
+            return True
+        return self.opened
+
+    def read(self):
+        """The oldest kept frame (the newest one with ``buffer=1``) as ``(ok, frame)``"""
+        with self._cond:
+            while not self._frames:
+                if self.ended or self._stopped.is_set():
+                    return False, None
+                self._cond.wait(0.5)
+            timestamp, frame = self._frames.popleft()
+            self.frame_time = timestamp
+            # Wakes a file grabber waiting for room
+            self._cond.notify_all()
+        return True, frame
+
+    def release(self):
+        self._stopped.set()
+        with self._cond:
+            self._frames.clear()
+            self._cond.notify_all()
+        self._connected_gauge.set(0)
+
+    # Grabbing
+
+    def _current(self, generation: int) -> bool:
+        return generation == self._generation and not self._stopped.is_set()
+
+    def _start_grabber(self):
+        with self._cond:
+            self._generation += 1
+            generation = self._generation
+            self._last_frame_at = time.monotonic()
+        threading.Thread(target=self._grab, args=(generation,), name="stream-grabber", daemon=True).start()
+
+    def _open(self) -> Optional[cv2.VideoCapture]:
+        if is_network_source(self.source) and hasattr(cv2, "CAP_PROP_OPEN_TIMEOUT_MSEC"):
+            # Bound the blocking open/read calls of the FFmpeg backend
+            cap = cv2.VideoCapture(self.source, cv2.CAP_ANY, [
+                cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, int(self.open_timeout * 1000),
+                cv2.CAP_PROP_READ_TIMEOUT_MSEC, int(self.stall_timeout * 1000),
+            ])
+        else:
+            cap = cv2.VideoCapture(self.source)
+        if not cap.isOpened():
+            cap.release()
+            return None
+        for prop, value in self._properties.items():
+            cap.set(prop, value)
+        return cap
+
+    def _grab(self, generation: int):
+        failures = 0
+        backoff = self.backoff_initial
+        while self._current(generation):
+            cap = self._open()
+            if not self._current(generation):
+                if cap is not None:
+                    cap.release()
+                return
+            if cap is None:
+                self._first_attempt.set()
+                failures += 1
+                if self.is_file or (self.max_retries and failures > self.max_retries):
+                    self._end(f"Tidak dapat membuka sumber video: {self.name}")
+                    return
+                logger.warning("Sumber %s tidak dapat dibuka, coba lagi dalam %.1f dtk", self.name, backoff)
+                self._stopped.wait(backoff)
+                backoff = min(backoff * 2, self.backoff_max)
+                continue
+
+            self._set_connected(True)
+            grabbed = self._read_frames(cap, generation)
+            cap.release()
+            if not self._current(generation):
+                # Abandoned by the watchdog (or released); a fresh grabber has taken over
+                return
+            self._set_connected(False)
+            if self.is_file and not self.realtime:
+                self._end(None)
+                return
+            if grabbed:
+                failures = 0
+                backoff = self.backoff_initial
+            else:
+                failures += 1
+                if self.max_retries and failures > self.max_retries:
+                    self._end("Gagal membaca dari kamera")
+                    return
+            self.reconnects += 1
+            self._failed_counter.inc()
+            logger.warning("Sumber %s terputus, menyambung ulang dalam %.1f dtk", self.name, backoff)
+            self._stopped.wait(backoff)
+            backoff = min(backoff * 2, self.backoff_max)
+
+    def _read_frames(self, cap: cv2.VideoCapture, generation: int) -> int:
+        """Grab until the source fails or this grabber is abandoned; returns the frame count"""
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        grabbed = 0
+        index = 0
+        start = time.monotonic()
+        wall_start = time.time()
+        while self._current(generation):
+            if not self.live and not self._wait_for_room(generation):
+                break
+            ret, frame = cap.read()
+            if not self._current(generation):
+                break
+            if not ret:
+                if self.realtime and index:
+                    # Loop the stand-in file
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    index = 0
+                    start = time.monotonic()
+                    wall_start = time.time()
+                    continue
+                break
+            if self.realtime:
+                # Hold each frame back until the moment a camera would have delivered it
+                self._stopped.wait(max(start + index / fps - time.monotonic(), 0.0))
+                timestamp = wall_start + index / fps
+            else:
+                timestamp = time.time()
+            self._publish(frame, timestamp)
+            grabbed += 1
+            index += 1
+        return grabbed
+
+    def _wait_for_room(self, generation: int) -> bool:
+        with self._cond:
+            while len(self._frames) == self._frames.maxlen:
+                if not self._current(generation):
+                    return False
+                self._cond.wait(0.5)
+                # A file waiting for the consumer isn't stalled
+                self._last_frame_at = time.monotonic()
+        return True
+
+    def _publish(self, frame, timestamp: float):
+        with self._cond:
+            if len(self._frames) == self._frames.maxlen:
+                self.dropped += 1
+                self._drop_counter.inc()
+            self._frames.append((timestamp, frame))
+            self._last_frame_at = time.monotonic()
+            self.frames_grabbed += 1
+            self._cond.notify_all()
+
+    def _set_connected(self, connected: bool):
+        with self._cond:
+            self.connected = connected
+            if connected:
+                self.opened = True
+                self._last_frame_at = time.monotonic()
+        self._connected_gauge.set(int(connected))
+        self._first_attempt.set()
+
+    def _end(self, error: Optional[str]):
+        with self._cond:
+            self.ended = True
+            self.connected = False
+            self.error = error
+            self._cond.notify_all()
+        self._connected_gauge.set(0)
+        self._first_attempt.set()
+
+    def _watch(self):
+        """Reconnect when a connected source stops delivering frames"""
+        while not self._stopped.wait(min(self.stall_timeout / 4, 1.0)):
+            with self._cond:
+                if self.ended:
+                    return
+                idle = time.monotonic() - self._last_frame_at
+                stalled = self.connected and idle > self.stall_timeout
+            if stalled:
+                self.stalls += 1
+                self._stalled_counter.inc()
+                self._set_connected(False)
+                logger.warning("Sumber %s macet (%.0f dtk tanpa frame), menyambung ulang", self.name, idle)
+                # The stuck reader releases its capture whenever its read returns
+                self._start_grabber()
@@ -1,34 +1,68 @@
-import requests
 import json
+import logging
+import random
+import threading
+import time
+from collections import deque
 from datetime import datetime
-import streamlit as st
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import REGISTRY, MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_API_URL = "https://api.telegram.org"
+
 
 class TelegramNotifier:
     """Class untuk mengirim notifikasi ke Telegram"""
 
-    def __init__(self, bot_token: str, chat_id: str):
+    def __init__(self, bot_token: str, chat_id: str, api_url: str = DEFAULT_API_URL,
+                 session: Optional[requests.Session] = None):
         self.bot_token = bot_token
         self.chat_id = chat_id
-        self.base_url = f"https://api.telegram.org/bot{bot_token}"
+        self.base_url = f"{api_url.rstrip('/')}/bot{bot_token}"
+        self.session = session or self._create_session()
+
+    @staticmethod
+    def _create_session(pool_size: int = 4) -> requests.Session:
+        """Keep-alive session so consecutive alerts reuse the same connection"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def post_message(self, message: str, parse_mode: str = "HTML",
+                     timeout: float = 10) -> requests.Response:
+        """POST sendMessage and return the raw response; network errors propagate"""
+        url = f"{self.base_url}/sendMessage"
+        payload = {
+            'chat_id': self.chat_id,
+            'text': message,
+            'parse_mode': parse_mode
+        }
+        return self.session.post(url, json=payload, timeout=timeout)
 
     def send_message(self, message: str, parse_mode: str = "HTML") -> bool:
         try:
-            url = f"{self.base_url}/sendMessage"
-            payload = {
-                'chat_id': self.chat_id,
-                'text': message,
-                'parse_mode': parse_mode
-            }
-            response = requests.post(url, json=payload, timeout=10)
+            response = self.post_message(message, parse_mode)
             return response.status_code == 200
         except Exception as e:
-            st.error(f"Error sending Telegram message: {e}")
+            logger.error("Error sending Telegram message: %s", e)
             return False
 
-    def send_drone_alert(self, drone_count: int = 1) -> bool:
+    def send_drone_alert(self, drone_count: int = 1, camera: Optional[str] = None) -> bool:
+        return self.send_message(self.format_drone_alert(drone_count, camera))
+
+    def format_drone_alert(self, drone_count: int = 1, camera: Optional[str] = None) -> str:
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         urgency = "⚠️ PERINGATAN" if drone_count == 1 else "🚨 URGENT"
         emoji = "🛸" * min(drone_count, 5)
+        camera_line = f"\n📹 Kamera: <b>{camera}</b>" if camera is not None else ""
 
         message = f"""
 {urgency} - DRONE TERDETEKSI!
@@ -36,14 +70,14 @@ class TelegramNotifier:
 {emoji} <b>⚠️LAPOR ICIK BOSS ADA DRONE NIHH⚠️</b>
 📊 Jumlah Drone: <b>{drone_count}</b>
 🕐 Waktu: <b>{current_time}</b>
-📍 Status: <b>Aktif Terdeteksi</b>
+📍 Status: <b>Aktif Terdeteksi</b>{camera_line}
 
 🔍 Mohon periksa area sekitar untuk memastikan keamanan
 
 #DroneAlert #Security 
         """.strip()
 
-        return self.send_message(message)
+        return message
 
     def send_test_message(self) -> bool:
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -102,7 +136,7 @@ Sistem deteksi telah dihentikan.
     def test_connection(self) -> tuple[bool, str]:
         try:
             url = f"{self.base_url}/getMe"
-            response = requests.get(url, timeout=10)
+            response = self.session.get(url, timeout=10)
             if response.status_code == 200:
                 bot_info = response.json()
                 if bot_info.get('ok'):
@@ -119,32 +153,189 @@ Sistem deteksi telah dihentikan.
         except Exception as e:
             return False, f"Error: {str(e)}"
 
+
+class TelegramDispatcher:
+    """Non-blocking alert dispatcher for a TelegramNotifier.
+
+    Messages are queued and delivered by a background worker that reuses the
+    notifier's keep-alive session, retries transient failures with
+    exponential backoff, and spaces messages to respect Telegram's per-chat
+    rate limit. When the queue is full the oldest pending message is dropped;
+    messages submitted with the same ``key`` coalesce into the newest one.
+    """
+
+    def __init__(self, notifier: TelegramNotifier, max_queue: int = 32, max_retries: int = 4,
+                 backoff_base: float = 1.0, backoff_max: float = 30.0,
+                 min_interval: float = 1.0, timeout: float = 10.0, metrics: MetricsRegistry = REGISTRY):
+        self.notifier = notifier
+        self.max_queue = max(int(max_queue), 1)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.min_interval = min_interval
+        self.timeout = timeout
+
+        self._pending = deque()
+        self._in_flight = False
+        self._cond = threading.Condition()
+        self._stop_event = threading.Event()
+        self._last_sent = 0.0
+        self._worker = threading.Thread(target=self._run, name="telegram-dispatcher", daemon=True)
+
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+        metrics.gauge("alert_queue_depth", "Telegram alerts waiting to be sent").set_function(
+            lambda: self.queue_depth
+        )
+        alerts_help = "Telegram alerts by outcome"
+        self._sent_counter = metrics.counter("alerts_total", alerts_help, {'outcome': 'sent'})
+        self._failed_counter = metrics.counter("alerts_total", alerts_help, {'outcome': 'failed'})
+        self._dropped_counter = metrics.counter("alerts_total", alerts_help, {'outcome': 'dropped'})
+        self._send_latency = metrics.histogram("stage_latency_seconds", "Per-stage latency",
+                                               {'stage': 'alert'})
+
+    def start(self) -> "TelegramDispatcher":
+        self._worker.start()
+        return self
+
+    def stop(self, drain: bool = True, timeout: float = 5.0) -> None:
+        """Stop the worker, optionally giving queued messages up to ``timeout`` to go out"""
+        deadline = time.monotonic() + timeout
+        if drain:
+            with self._cond:
+                while (self._pending or self._in_flight) and time.monotonic() < deadline:
+                    self._cond.wait(0.1)
+        self._stop_event.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._worker.is_alive():
+            self._worker.join(max(deadline - time.monotonic(), 0.1))
+
+    def submit(self, message: str, parse_mode: str = "HTML", key: Optional[str] = None) -> bool:
+        """Queue a message without blocking; returns False if it displaced another"""
+        with self._cond:
+            if key is not None:
+                for item in self._pending:
+                    if item['key'] == key:
+                        item['message'] = message
+                        item['parse_mode'] = parse_mode
+                        self.coalesced += 1
+                        return True
+            accepted = True
+            if len(self._pending) >= self.max_queue:
+                self._pending.popleft()
+                self.dropped += 1
+                self._dropped_counter.inc()
+                accepted = False
+            self._pending.append({'message': message, 'parse_mode': parse_mode, 'key': key})
+            self._cond.notify()
+            return accepted
+
+    def submit_drone_alert(self, drone_count: int = 1, camera: Optional[str] = None) -> bool:
+        key = "drone_alert" if camera is None else f"drone_alert:{camera}"
+        return self.submit(self.notifier.format_drone_alert(drone_count, camera), key=key)
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._pending)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            with self._cond:
+                while not self._pending and not self._stop_event.is_set():
+                    self._cond.wait(0.5)
+                if self._stop_event.is_set():
+                    break
+                item = self._pending.popleft()
+                self._in_flight = True
+
+            with self._send_latency.time():
+                delivered = self._deliver(item)
+            if delivered:
+                self.sent += 1
+                self._sent_counter.inc()
+            else:
+                self.failed += 1
+                self._failed_counter.inc()
+
+            with self._cond:
+                self._in_flight = False
+                self._cond.notify_all()
+
+    def _wait(self, seconds: float) -> bool:
+        """Sleep unless stopped; returns False when the dispatcher is stopping"""
+        return not self._stop_event.wait(max(seconds, 0.0))
+
+    def _deliver(self, item) -> bool:
+        for attempt in range(self.max_retries + 1):
+            if not self._wait(self._last_sent + self.min_interval - time.monotonic()):
+                return False
+
+            retry_after = None
+            try:
+                response = self.notifier.post_message(item['message'], item['parse_mode'],
+                                                      timeout=self.timeout)
+                self._last_sent = time.monotonic()
+                if response.status_code == 200:
+                    return True
+                if response.status_code == 429:
+                    try:
+                        retry_after = response.json().get('parameters', {}).get('retry_after')
+                    except ValueError:
+                        retry_after = None
+                elif response.status_code < 500:
+                    logger.warning("Telegram rejected message: HTTP %s", response.status_code)
+                    return False
+            except requests.exceptions.RequestException as e:
+                self._last_sent = time.monotonic()
+                logger.warning("Telegram request failed: %s", e)
+
+            if attempt == self.max_retries:
+                break
+            delay = min(self.backoff_base * (2 ** attempt), self.backoff_max)
+            delay = max(delay * random.uniform(0.5, 1.0), float(retry_after or 0))
+            if not self._wait(delay):
+                return False
+        return False
+
 # ========== Streamlit UI ==========
+# Only runs under `streamlit run telegram_notifier.py`, so importing the
+# notifier (e.g. from the headless daemon) never needs Streamlit.
+
+def run_ui():
+    import streamlit as st
+
+    st.title("🛸 Notifikasi Deteksi Drone ke Telegram")
+
+    with st.sidebar:
+        st.header("🔐 Konfigurasi Telegram")
+        bot_token = st.text_input("Bot Token", type="password")
+        chat_id = st.text_input("Chat ID")
+
+    if bot_token and chat_id:
+        notifier = TelegramNotifier(bot_token, chat_id)
+
+        if st.button("🔌 Tes Koneksi"):
+            success, msg = notifier.test_connection()
+            st.success(msg) if success else st.error(msg)
+
+        if st.button("✅ Kirim Tes Notifikasi"):
+            if notifier.send_test_message():
+                st.success("Pesan tes berhasil dikirim!")
+            else:
+                st.error("Gagal mengirim pesan tes.")
+
+        if st.button("🚨 Kirim Peringatan Drone"):
+            if notifier.send_drone_alert(drone_count=3):
+                st.success("Peringatan drone berhasil dikirim!")
+            else:
+                st.error("Gagal mengirim peringatan.")
+    else:
+        st.warning("Masukkan Bot Token dan Chat ID terlebih dahulu di sidebar.")
+
 
-st.title("🛸 Notifikasi Deteksi Drone ke Telegram")
-
-with st.sidebar:
-    st.header("🔐 Konfigurasi Telegram")
-    bot_token = st.text_input("Bot Token", type="password")
-    chat_id = st.text_input("Chat ID")
-
-if bot_token and chat_id:
-    notifier = TelegramNotifier(bot_token, chat_id)
-
-    if st.button("🔌 Tes Koneksi"):
-        success, msg = notifier.test_connection()
-        st.success(msg) if success else st.error(msg)
-
-    if st.button("✅ Kirim Tes Notifikasi"):
-        if notifier.send_test_message():
-            st.success("Pesan tes berhasil dikirim!")
-        else:
-            st.error("Gagal mengirim pesan tes.")
-
-    if st.button("🚨 Kirim Peringatan Drone"):
-        if notifier.send_drone_alert(drone_count=3):
-            st.success("Peringatan drone berhasil dikirim!")
-        else:
-            st.error("Gagal mengirim peringatan.")
-else:
-    st.warning("Masukkan Bot Token dan Chat ID terlebih dahulu di sidebar.")
+if __name__ == "__main__":
+    run_ui()
@@ -0,0 +1,111 @@
+import logging
+
+import numpy as np
+
+from backends import NumpyYoloBackend, decode_predictions, letterbox, nms
+
+CLASS_NAMES = {0: 'Pesawat', 1: 'Burung', 2: 'Drone', 3: 'Helikopter'}
+
+
+def test_letterbox_keeps_aspect_ratio_and_centres_the_frame():
+    frame = np.zeros((30, 60, 3), dtype=np.uint8)
+    frame[:, :, 0] = 255  # blue in BGR
+
+    tensor, scale, (left, top) = letterbox(frame, imgsz=120)
+
+    assert tensor.shape == (1, 3, 120, 120)
+    assert tensor.dtype == np.float32
+    assert scale == 2.0
+    assert (left, top) == (0, 30)
+    # Padding above and below, the frame (now RGB) in the middle
+    np.testing.assert_allclose(tensor[0, :, :30], 114 / 255)
+    np.testing.assert_allclose(tensor[0, :, 90:], 114 / 255)
+    np.testing.assert_allclose(tensor[0, 2, 30:90], 1.0)
+    np.testing.assert_allclose(tensor[0, :2, 30:90], 0.0)
+
+
+def test_letterbox_pads_odd_margins_consistently():
+    _, scale, (left, top) = letterbox(np.zeros((64, 61, 3), dtype=np.uint8), imgsz=64)
+
+    assert scale == 1.0
+    assert (left, top) == (1, 0)
+
+
+def test_nms_keeps_the_best_of_overlapping_boxes():
+    boxes = np.array([[0, 0, 10, 10], [1, 1, 11, 11], [20, 20, 30, 30], [0, 0, 10, 5]], dtype=np.float32)
+    scores = np.array([0.6, 0.9, 0.8, 0.7], dtype=np.float32)
+
+    # Box 0 overlaps box 1 with IoU 81 / 119, box 3 with IoU 36 / 114
+    np.testing.assert_array_equal(nms(boxes, scores, 0.5), [1, 2, 3])
+    np.testing.assert_array_equal(nms(boxes, scores, 0.3), [1, 2])
+    assert nms(np.zeros((0, 4), np.float32), np.zeros(0, np.float32), 0.5).size == 0
+
+
+def prediction(cx, cy, w, h, class_scores):
+    return [cx, cy, w, h, *class_scores]
+
+
+def test_decode_predictions_maps_boxes_back_to_the_frame():
+    output = np.array([
+        prediction(40, 50, 20, 10, [0.0, 0.1, 0.9, 0.0]),
+        prediction(41, 50, 20, 10, [0.0, 0.0, 0.8, 0.0]),   # duplicate of the first
+        prediction(41, 50, 20, 10, [0.7, 0.0, 0.0, 0.0]),   # same place, other class: kept
+        prediction(10, 10, 4, 4, [0.0, 0.2, 0.0, 0.0]),     # below the threshold
+        prediction(126, 60, 10, 10, [0.0, 0.0, 0.0, 0.6]),  # runs off the right edge
+    ], dtype=np.float32).T
+
+    detections = decode_predictions(output, conf=0.5, iou_threshold=0.5, scale=2.0, pad=(0, 30),
+                                    frame_shape=(30, 60, 3), class_names=CLASS_NAMES)
+
+    np.testing.assert_array_equal(detections.class_ids, [2, 0, 3])
+    np.testing.assert_allclose(detections.scores, [0.9, 0.7, 0.6])
+    np.testing.assert_allclose(detections.boxes, [
+        [15.0, 7.5, 25.0, 12.5],
+        [15.5, 7.5, 25.5, 12.5],
+        [60.0, 12.5, 60.0, 17.5],
+    ])
+
+
+def test_decode_predictions_without_confident_boxes_is_empty():
+    output = np.array([prediction(10, 10, 4, 4, [0.1, 0.2, 0.3, 0.4])], dtype=np.float32).T
+
+    detections = decode_predictions(output, 0.5, 0.5, 1.0, (0, 0), (64, 64, 3), CLASS_NAMES)
+
+    assert len(detections) == 0
+
+
+class ShapeRecorder(NumpyYoloBackend):
+    """Backend whose graph finds nothing and remembers the input shapes it was given"""
+
+    def __init__(self, dynamic, imgsz=64):
+        super().__init__(CLASS_NAMES, imgsz)
+        self.dynamic = dynamic
+        self.shapes = []
+
+    def _infer(self, tensor):
+        self.shapes.append(tensor.shape)
+        return np.zeros((1, 8, 0), dtype=np.float32)
+
+
+def test_dynamic_backend_honours_imgsz():
+    backend = ShapeRecorder(dynamic=True)
+    frame = np.zeros((48, 64, 3), dtype=np.uint8)
+
+    backend(frame, imgsz=96)
+    backend([frame, frame], imgsz=100)
+    backend(frame)
+
+    assert backend.shapes == [(1, 3, 96, 96)] + [(1, 3, 128, 128)] * 2 + [(1, 3, 64, 64)]
+
+
+def test_fixed_backend_keeps_its_size_and_warns_once(caplog):
+    backend = ShapeRecorder(dynamic=False)
+    frame = np.zeros((48, 64, 3), dtype=np.uint8)
+
+    with caplog.at_level(logging.WARNING, logger="backends"):
+        backend(frame, imgsz=96)
+        backend(frame, imgsz=96)
+
+    assert backend.shapes == [(1, 3, 64, 64)] * 2
+    assert len(caplog.records) == 1
+    assert "96" in caplog.records[0].getMessage()
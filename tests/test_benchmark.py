@@ -0,0 +1,68 @@
+import numpy as np
+
+from benchmark import STAGES, compare_to_baseline, make_synthetic_video, run_benchmark
+from detections import Detections
+from renderer import AnnotationRenderer
+
+CLASS_NAMES = {0: 'Pesawat', 1: 'Burung', 2: 'Drone', 3: 'Helikopter'}
+CLASS_COLORS = {'Pesawat': '#FF6B6B', 'Burung': '#4ECDC4', 'Drone': '#45B7D1', 'Helikopter': '#96CEB4'}
+
+
+class FakeDetector:
+    """One Drone per frame, with the per-stage speed a backend would report"""
+    class_names = CLASS_NAMES
+    output_channels = "BGR"
+
+    def __init__(self):
+        self.renderer = AnnotationRenderer(CLASS_NAMES, CLASS_COLORS)
+        self.frames_detected = 0
+
+    def detect_batch(self, frames, confidence_threshold=0.5, rois=None):
+        self.frames_detected += len(frames)
+        results = []
+        for frame in frames:
+            result = Detections([[4, 4, 20, 20]], [0.9], [2], CLASS_NAMES)
+            result.orig_img = frame
+            result.speed = {'preprocess': 1.0, 'inference': 2.0, 'postprocess': 0.5}
+            results.append(result)
+        return results
+
+    def process_batch_results(self, results, render=True):
+        return [(self.render(result.orig_img, result) if render else None, result) for result in results]
+
+    def render(self, frame, detections):
+        return self.renderer.render(frame, detections)
+
+    def to_output_channels(self, frame):
+        return frame
+
+
+def test_run_benchmark_times_every_stage_of_process_video(tmp_path):
+    source = make_synthetic_video(str(tmp_path / "clip.mp4"), frames=20, width=64, height=48)
+    detector = FakeDetector()
+
+    report = run_benchmark(detector, source, max_frames=12, batch_size=4, warmup=3)
+
+    assert report['frames'] == 12
+    assert report['detections'] == 12
+    assert report['resolution'] == [64, 48]
+    # Warm-up frames run through the same path but are not recorded
+    assert detector.frames_detected == 15
+    for stage in STAGES:
+        assert report['stages'][stage]['count'] == 12, stage
+    assert report['stages']['inference']['p50_ms'] == 2.0
+    assert report['stages']['postprocess']['p50_ms'] >= 0.5
+
+
+def test_compare_to_baseline_reports_slower_stages_and_throughput():
+    stage = {'count': 10, 'p95_ms': 10.0}
+    baseline = {'fps': 30.0, 'stages': {'inference': stage, 'decode': {'count': 10, 'p95_ms': 0.05}}}
+    current = {'fps': 25.0, 'stages': {'inference': {'count': 10, 'p95_ms': 10.5},
+                                       'decode': {'count': 10, 'p95_ms': 0.5}}}
+
+    assert compare_to_baseline(current, baseline, threshold=0.1) == ["fps: 25.00 vs baseline 30.00"]
+
+    current['stages']['inference']['p95_ms'] = 12.0
+    regressions = compare_to_baseline(current, baseline, threshold=0.1)
+    assert regressions[0].startswith("inference: p95 12.00 ms")
+    assert len(regressions) == 2
@@ -0,0 +1,21 @@
+from detections import Detections, count_by_class
+
+CLASS_NAMES = {0: 'Pesawat', 1: 'Burung', 2: 'Drone', 3: 'Helikopter'}
+
+
+def test_counts_skip_dicts_without_class_id():
+    detections = Detections.from_dicts([
+        {'bbox': [0, 0, 10, 10], 'confidence': 0.9, 'class_id': 2},
+        {'bbox': [5, 5, 20, 20], 'confidence': 0.6},
+    ], CLASS_NAMES)
+
+    assert len(detections) == 2
+    assert count_by_class(detections) == {'Drone': 1}
+    assert detections.class_counts() == {'Pesawat': 0, 'Burung': 0, 'Drone': 1, 'Helikopter': 0}
+    assert detections.count('Drone') == 1
+
+
+def test_unknown_class_ids_are_counted_by_fallback_name():
+    detections = Detections([[0, 0, 1, 1]], [0.5], [7], CLASS_NAMES)
+
+    assert count_by_class(detections) == {'Class_7': 1}
@@ -0,0 +1,36 @@
+import os
+import time
+
+from file_transfer import RESULTS_SUBDIR, publish_result
+
+
+def test_result_with_a_digest_is_published_once(tmp_path):
+    source = tmp_path / "result.mp4"
+    source.write_bytes(b"video")
+    static_dir = str(tmp_path / "static")
+
+    first = publish_result(str(source), static_dir=static_dir, copy=True, digest="abc123")
+    published = os.path.join(static_dir, RESULTS_SUBDIR, "abc123.mp4")
+    almost_expired = time.time() - 3000
+    os.utime(published, (almost_expired, almost_expired))
+    # A second link or copy would fail now
+    source.unlink()
+    second = publish_result(str(source), static_dir=static_dir, copy=True, digest="abc123")
+
+    assert first == second == f"app/static/{RESULTS_SUBDIR}/abc123.mp4"
+    assert os.listdir(os.path.join(static_dir, RESULTS_SUBDIR)) == ["abc123.mp4"]
+    # Reuse refreshes the age, so pruning doesn't remove a result that is still offered
+    assert os.path.getmtime(published) > almost_expired + 60
+
+
+def test_results_without_a_digest_get_fresh_names(tmp_path):
+    static_dir = str(tmp_path / "static")
+    urls = []
+    for _ in range(2):
+        source = tmp_path / "result.mp4"
+        source.write_bytes(b"video")
+        urls.append(publish_result(str(source), static_dir=static_dir))
+        assert not source.exists()
+
+    assert urls[0] != urls[1]
+    assert len(os.listdir(os.path.join(static_dir, RESULTS_SUBDIR))) == 2
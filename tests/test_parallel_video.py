@@ -0,0 +1,124 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from backends import model_hash
+from detector import DroneDetector
+from parallel_video import plan_chunks, process_video_parallel
+from video_processing import process_video
+
+IMGSZ = 64
+CELL = 16
+FPS = 10.0
+FRAMES = 40
+
+
+def grid_model(path):
+    """ONNX graph with a YOLOv8-style head: one Drone box per 16 px cell, scored by how dark the cell is"""
+    onnx = pytest.importorskip("onnx")
+    from onnx import TensorProto, helper, numpy_helper
+
+    cells = (IMGSZ // CELL) ** 2
+    index = np.arange(cells)
+    boxes = np.stack([index % 4 * CELL + CELL / 2, index // 4 * CELL + CELL / 2,
+                      np.full(cells, CELL), np.full(cells, CELL)]).astype(np.float32)[None]
+    constants = {
+        'boxes': boxes,
+        'one': np.ones(1, np.float32),
+        'shape': np.array([1, 1, cells], np.int64),
+        'zeros2': np.zeros((1, 2, cells), np.float32),
+        'zeros1': np.zeros((1, 1, cells), np.float32),
+    }
+    nodes = [
+        helper.make_node("AveragePool", ["images"], ["pooled"], kernel_shape=[CELL, CELL], strides=[CELL, CELL]),
+        helper.make_node("ReduceMean", ["pooled"], ["brightness"], axes=[1], keepdims=1),
+        helper.make_node("Reshape", ["brightness", "shape"], ["flat"]),
+        helper.make_node("Sub", ["one", "flat"], ["darkness"]),
+        helper.make_node("Concat", ["boxes", "zeros2", "darkness", "zeros1"], ["output0"], axis=1),
+    ]
+    graph = helper.make_graph(
+        nodes, "grid",
+        [helper.make_tensor_value_info("images", TensorProto.FLOAT, [1, 3, IMGSZ, IMGSZ])],
+        [helper.make_tensor_value_info("output0", TensorProto.FLOAT, [1, 8, cells])],
+        [numpy_helper.from_array(value, name) for name, value in constants.items()],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    onnx.save(model, path)
+
+
+@pytest.fixture
+def model_path(tmp_path, monkeypatch):
+    """Fake weights whose ONNX export is already cached, so no Ultralytics export runs"""
+    pytest.importorskip("onnxruntime")
+    monkeypatch.chdir(tmp_path)
+    weights = str(tmp_path / "grid.pt")
+    with open(weights, "wb") as f:
+        f.write(b"grid")
+    cache = os.path.join("Model", ".cache", model_hash(weights))
+    os.makedirs(cache)
+    grid_model(os.path.join(cache, f"model_{IMGSZ}.onnx"))
+    return weights
+
+
+@pytest.fixture
+def video(tmp_path):
+    """Dark squares wandering over a light background, one cell per frame"""
+    path = str(tmp_path / "grid.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), FPS, (IMGSZ, IMGSZ))
+    for index in range(FRAMES):
+        frame = np.full((IMGSZ, IMGSZ, 3), 230, dtype=np.uint8)
+        for offset in (0, 7):
+            cell = (index + offset) % 16
+            x, y = cell % 4 * CELL, cell // 4 * CELL
+            frame[y:y + CELL, x:x + CELL] = 20
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def output_frames(path):
+    cap = cv2.VideoCapture(path)
+    count = 0
+    while cap.read()[0]:
+        count += 1
+    cap.release()
+    return count
+
+
+@pytest.mark.parametrize("options", [
+    {},
+    {'stride': 3},
+    {'stride': 2, 'start_time': 0.75, 'end_time': 3.15},
+])
+def test_parallel_matches_sequential(model_path, video, options):
+    detector = DroneDetector(model_path, output_channels="BGR", backend="onnx", imgsz=IMGSZ, warmup=0)
+    assert detector.is_model_loaded(), detector.load_error
+
+    sequential_path, expected = process_video(video, detector, 0.5, batch_size=4, **options)
+    parallel_path, actual = process_video_parallel(video, detector, 0.5, workers=2, batch_size=3,
+                                                   chunk_frames=4, **options)
+    try:
+        assert len(expected) > 0
+        # Only frames on the stride grid within the range were analysed
+        analysed = np.unique(expected.frame_indices)
+        assert (np.diff(analysed) % options.get('stride', 1) == 0).all()
+        assert analysed.min() >= options.get('start_time', 0.0) * FPS - 1
+        np.testing.assert_array_equal(actual.frame_indices, expected.frame_indices)
+        np.testing.assert_allclose(actual.timestamps, expected.timestamps)
+        np.testing.assert_array_equal(actual.class_ids, expected.class_ids)
+        np.testing.assert_allclose(actual.boxes, expected.boxes)
+        np.testing.assert_allclose(actual.scores, expected.scores)
+        assert output_frames(parallel_path) == output_frames(sequential_path)
+    finally:
+        os.remove(sequential_path)
+        os.remove(parallel_path)
+
+
+def test_chunks_start_on_the_stride_grid():
+    chunks = plan_chunks(5, 40, workers=2, stride=3, chunk_frames=4)
+
+    assert chunks == [(5, 17), (17, 29), (29, None)]
+    assert all((start - 5) % 3 == 0 for start, _ in chunks)
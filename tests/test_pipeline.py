@@ -0,0 +1,94 @@
+import time
+
+import numpy as np
+
+from detections import Detections
+from event_store import EventStore
+from metrics import MetricsRegistry
+from pipeline import DetectionPipeline
+from tracker import IoUTracker, TrackingDetector
+from utils import DetectionCounter
+
+FRAMES = 40
+
+
+class FrameCap:
+    """Delivers ``count`` frames, each carrying its index, then fails like an unplugged camera"""
+
+    def __init__(self, count):
+        self.count = count
+        self.index = 0
+
+    def read(self):
+        if self.index == self.count:
+            return False, None
+        frame = np.full((4, 6, 3), self.index % 256, dtype=np.uint8)
+        self.index += 1
+        time.sleep(0.002)
+        return True, frame
+
+
+class FileCap(FrameCap):
+    """A source read in full, like a StreamSource over a video file"""
+    live = False
+
+
+class NewObjectDetector:
+    """Finds one Drone per frame, far from every earlier one, so each detection starts a track"""
+    class_names = {0: 'Drone'}
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+
+    def detect(self, frame, confidence_threshold=0.5, roi=None):
+        time.sleep(self.delay)
+        self.calls += 1
+        return self.calls
+
+    def process_results(self, results, render=True):
+        left = results * 100.0
+        return None, Detections([[left, 0.0, left + 20.0, 20.0]], [0.9], [0], self.class_names)
+
+    def to_output_channels(self, frame):
+        return frame
+
+
+def run_to_end(pipeline):
+    deadline = time.time() + 10.0
+    while pipeline.running and time.time() < deadline:
+        time.sleep(0.01)
+    pipeline.stop()
+
+
+def test_dropped_results_are_still_recorded(tmp_path):
+    metrics = MetricsRegistry()
+    store = EventStore(str(tmp_path / "events.db"), flush_interval=0.05, metrics=metrics).start()
+    counter = DetectionCounter()
+    detector = NewObjectDetector()
+    tracking = TrackingDetector(detector, detect_interval=1, tracker=IoUTracker(detector.class_names),
+                                render=False)
+
+    def on_result(result):
+        counter.update_session_counts(result.detections)
+        store.record("0", result.new_detections, result.timestamp)
+
+    pipeline = DetectionPipeline(FrameCap(FRAMES), detector, tracking=tracking, metrics=metrics,
+                                 render=False, result_callback=on_result).start()
+    # Nobody reads results, so the latest-wins result queue keeps only the last one
+    run_to_end(pipeline)
+    store.stop(drain=True)
+
+    assert pipeline.result_queue.dropped > 0
+    assert detector.calls > 1
+    assert store.totals() == {'Drone': detector.calls}
+    assert counter.session_counts['Drone'] == detector.calls
+
+
+def test_file_source_is_read_in_full():
+    detector = NewObjectDetector(delay=0.005)
+    pipeline = DetectionPipeline(FileCap(FRAMES), detector, metrics=MetricsRegistry(), render=False).start()
+    run_to_end(pipeline)
+
+    assert pipeline.frame_queue.dropped == 0
+    assert detector.calls == FRAMES
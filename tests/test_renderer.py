@@ -0,0 +1,44 @@
+import numpy as np
+
+from detections import Detections
+from renderer import AnnotationRenderer, hex_to_bgr
+
+CLASS_NAMES = {0: 'Pesawat', 1: 'Burung', 2: 'Drone', 3: 'Helikopter'}
+CLASS_COLORS = {'Pesawat': '#FF6B6B', 'Burung': '#4ECDC4', 'Drone': '#45B7D1', 'Helikopter': '#96CEB4'}
+
+
+def test_render_draws_into_the_frame_in_place():
+    renderer = AnnotationRenderer(CLASS_NAMES, CLASS_COLORS)
+    frame = np.zeros((120, 160, 3), dtype=np.uint8)
+    detections = Detections([[40, 50, 100, 110]], [0.87], [2], CLASS_NAMES)
+
+    annotated = renderer.render(frame, detections)
+
+    assert annotated is frame
+    drone = hex_to_bgr('#45B7D1')
+    # Box edges in the class colour; the label sits above the box
+    assert tuple(frame[80, 40]) == drone
+    assert tuple(frame[110, 70]) == drone
+    assert tuple(frame[50 - 5, 41]) == drone
+    # Untouched inside the box and away from it
+    assert not frame[80, 70].any()
+    assert not frame[5, 150].any()
+
+
+def test_render_uses_the_frame_colour_order():
+    renderer = AnnotationRenderer(CLASS_NAMES, CLASS_COLORS)
+    detections = Detections([[40, 50, 100, 110]], [0.5], [0], CLASS_NAMES)
+
+    bgr = renderer.render(np.zeros((120, 160, 3), dtype=np.uint8), detections, channels='BGR')
+    rgb = renderer.render(np.zeros((120, 160, 3), dtype=np.uint8), detections, channels='RGB')
+
+    assert tuple(bgr[80, 40]) == (0x6B, 0x6B, 0xFF)
+    np.testing.assert_array_equal(rgb, bgr[:, :, ::-1])
+
+
+def test_render_without_detections_leaves_the_frame_alone():
+    renderer = AnnotationRenderer(CLASS_NAMES, CLASS_COLORS)
+    frame = np.full((20, 20, 3), 7, dtype=np.uint8)
+
+    assert renderer.render(frame, Detections.empty(CLASS_NAMES)) is frame
+    assert (frame == 7).all()
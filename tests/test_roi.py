@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from detections import Detections
+from roi import RegionOfInterest
+
+CLASS_NAMES = {0: 'Pesawat', 1: 'Burung', 2: 'Drone', 3: 'Helikopter'}
+
+
+def test_parse_reads_polygons_and_round_trips():
+    roi = RegionOfInterest.parse("0,0 1,0 1,0.5 0,0.5; 0.5,0.5 1,0.5 1,1")
+
+    assert len(roi.polygons) == 2
+    np.testing.assert_allclose(roi.polygons[1], [[0.5, 0.5], [1.0, 0.5], [1.0, 1.0]])
+    assert str(RegionOfInterest.parse(str(roi))) == str(roi)
+
+
+@pytest.mark.parametrize("spec", ["", "0,0 1,0", "0,0 1,0 a,b", "0,0 1.5,0 1,1"])
+def test_parse_rejects_invalid_specs(spec):
+    with pytest.raises(ValueError):
+        RegionOfInterest.parse(spec)
+
+
+def test_restore_shifts_crop_boxes_and_keeps_centres_inside_the_mask():
+    # Triangle in the lower right of a 200 x 100 frame: (100, 50), (200, 50), (200, 100)
+    roi = RegionOfInterest.parse("0.5,0.5 1,0.5 1,1")
+    frame = np.zeros((100, 200, 3), dtype=np.uint8)
+    crop, offset = roi.crop(frame)
+    assert offset == (100, 50)
+    assert crop.shape == (50, 100, 3)
+
+    detections = Detections([[80, 5, 90, 15], [5, 35, 15, 45]], [0.9, 0.8], [2, 1], CLASS_NAMES,
+                            track_ids=[7, 8])
+    restored = roi.restore(detections, offset, frame.shape)
+
+    # The first centre (185, 60) is inside the triangle, the second (110, 90) below its diagonal
+    np.testing.assert_allclose(restored.boxes, [[180, 55, 190, 65]])
+    np.testing.assert_array_equal(restored.class_ids, [2])
+    np.testing.assert_array_equal(restored.track_ids, [7])
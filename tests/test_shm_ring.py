@@ -0,0 +1,73 @@
+import threading
+
+import numpy as np
+
+from detections import Detections
+from metrics import MetricsRegistry
+from pipeline import CapturedFrame, InferenceWorker, LatestQueue
+from shm_ring import SharedFrameRing
+
+SHAPE = (4, 6, 3)
+
+
+class PassthroughDetector:
+    """BGR detector that finds nothing, so the "annotated" frame is the input itself"""
+    class_names = {0: 'Drone'}
+
+    def detect(self, frame, confidence_threshold=0.5, roi=None):
+        return frame
+
+    def process_results(self, results, render=True):
+        return (results if render else None), Detections.empty(self.class_names)
+
+    def to_output_channels(self, frame):
+        return frame
+
+
+def make_worker(ring, copy_frames):
+    return InferenceWorker(PassthroughDetector(), 0.5, LatestQueue(), LatestQueue(), threading.Event(),
+                           metrics=MetricsRegistry(), copy_frames=copy_frames)
+
+
+def consume(ring, worker, after):
+    sequence, index, frame_id, timestamp = ring.acquire(after)
+    return sequence, worker._process(CapturedFrame(frame_id, timestamp, ring.frames[index]))
+
+
+def fill(ring, value, count):
+    for frame_id in range(count):
+        ring.write(np.full(SHAPE, value, dtype=np.uint8), frame_id, 0.0)
+
+
+def test_held_result_survives_ring_reuse():
+    ring = SharedFrameRing(SHAPE, slots=3)
+    try:
+        worker = make_worker(ring, copy_frames=True)
+        fill(ring, 1, 1)
+        sequence, held = consume(ring, worker, 0)
+        fill(ring, 2, 3)
+        # Taking the next frame unpins the held result's slot; the producer then cycles through every slot
+        consume(ring, worker, sequence)
+        fill(ring, 3, 6)
+        assert (held.annotated_frame == 1).all()
+    finally:
+        ring.release()
+        ring.close()
+        ring.unlink()
+
+
+def test_borrowed_frame_is_overwritten_without_copy():
+    ring = SharedFrameRing(SHAPE, slots=3)
+    try:
+        worker = make_worker(ring, copy_frames=False)
+        fill(ring, 1, 1)
+        sequence, held = consume(ring, worker, 0)
+        fill(ring, 2, 3)
+        consume(ring, worker, sequence)
+        fill(ring, 3, 6)
+        assert not (held.annotated_frame == 1).all()
+        del held
+    finally:
+        ring.release()
+        ring.close()
+        ring.unlink()
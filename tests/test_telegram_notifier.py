@@ -0,0 +1,163 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from metrics import MetricsRegistry
+from telegram_notifier import TelegramDispatcher, TelegramNotifier
+
+
+class FakeTelegram:
+    """Local stand-in for the Bot API: answers sendMessage from a script of (status, body) replies"""
+
+    def __init__(self, replies=()):
+        self.replies = list(replies)
+        self.requests = []
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                fake.requests.append((time.monotonic(), payload['text']))
+                status, body = fake.replies.pop(0) if fake.replies else (200, {'ok': True})
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    @property
+    def texts(self):
+        return [text for _, text in self.requests]
+
+    @property
+    def gaps(self):
+        times = [at for at, _ in self.requests]
+        return [later - earlier for earlier, later in zip(times, times[1:])]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def telegram():
+    fake = FakeTelegram()
+    yield fake
+    fake.close()
+
+
+def make_dispatcher(fake, **options):
+    options.setdefault('min_interval', 0.0)
+    options.setdefault('backoff_base', 0.05)
+    notifier = TelegramNotifier("TOKEN", "42", api_url=fake.url)
+    return TelegramDispatcher(notifier, metrics=MetricsRegistry(), **options)
+
+
+def test_server_errors_are_retried_with_backoff(telegram):
+    telegram.replies = [(500, {'ok': False}), (502, {'ok': False})]
+    dispatcher = make_dispatcher(telegram).start()
+    dispatcher.submit("halo")
+    dispatcher.stop(drain=True)
+
+    assert telegram.texts == ["halo"] * 3
+    assert (dispatcher.sent, dispatcher.failed) == (1, 0)
+    # Jitter shortens each delay to no less than half of 0.05 s, then 0.1 s
+    assert telegram.gaps[0] >= 0.025
+    assert telegram.gaps[1] >= 0.05
+
+
+def test_retries_give_up_after_max_retries(telegram):
+    telegram.replies = [(500, {'ok': False})] * 3
+    dispatcher = make_dispatcher(telegram, max_retries=2, backoff_base=0.01).start()
+    dispatcher.submit("halo")
+    dispatcher.stop(drain=True)
+
+    assert len(telegram.requests) == 3
+    assert (dispatcher.sent, dispatcher.failed) == (0, 1)
+
+
+def test_client_errors_are_not_retried(telegram):
+    telegram.replies = [(400, {'ok': False})]
+    dispatcher = make_dispatcher(telegram).start()
+    dispatcher.submit("halo")
+    dispatcher.stop(drain=True)
+
+    assert len(telegram.requests) == 1
+    assert dispatcher.failed == 1
+
+
+def test_rate_limit_waits_for_retry_after(telegram):
+    telegram.replies = [(429, {'ok': False, 'parameters': {'retry_after': 0.3}})]
+    dispatcher = make_dispatcher(telegram, backoff_base=0.01).start()
+    dispatcher.submit("halo")
+    dispatcher.stop(drain=True)
+
+    assert len(telegram.requests) == 2
+    assert dispatcher.sent == 1
+    assert telegram.gaps[0] >= 0.3
+
+
+def test_messages_with_the_same_key_coalesce(telegram):
+    dispatcher = make_dispatcher(telegram)
+    dispatcher.submit_drone_alert(1, camera="A")
+    dispatcher.submit("lain")
+    dispatcher.submit_drone_alert(3, camera="A")
+    dispatcher.submit_drone_alert(2, camera="B")
+    assert dispatcher.queue_depth == 3
+    assert dispatcher.coalesced == 1
+
+    dispatcher.start().stop(drain=True)
+
+    assert len(telegram.texts) == 3
+    assert "Jumlah Drone: <b>3</b>" in telegram.texts[0]
+    assert telegram.texts[1] == "lain"
+    assert "Kamera: <b>B</b>" in telegram.texts[2]
+
+
+def test_full_queue_drops_the_oldest_message(telegram):
+    dispatcher = make_dispatcher(telegram, max_queue=2)
+    assert dispatcher.submit("satu")
+    assert dispatcher.submit("dua")
+    assert not dispatcher.submit("tiga")
+    assert dispatcher.dropped == 1
+
+    dispatcher.start().stop(drain=True)
+
+    assert telegram.texts == ["dua", "tiga"]
+
+
+def test_stop_drains_pending_messages(telegram):
+    dispatcher = make_dispatcher(telegram, min_interval=0.05).start()
+    for number in range(4):
+        dispatcher.submit(f"pesan {number}")
+    dispatcher.stop(drain=True, timeout=5.0)
+
+    assert telegram.texts == [f"pesan {number}" for number in range(4)]
+    assert dispatcher.queue_depth == 0
+    assert not dispatcher._worker.is_alive()
+
+
+def test_stop_without_drain_returns_promptly(telegram):
+    dispatcher = make_dispatcher(telegram, min_interval=10.0).start()
+    for number in range(4):
+        dispatcher.submit(f"pesan {number}")
+    start = time.monotonic()
+    dispatcher.stop(drain=False, timeout=5.0)
+
+    assert time.monotonic() - start < 1.0
+    assert len(telegram.requests) <= 1
+    assert not dispatcher._worker.is_alive()
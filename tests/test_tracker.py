@@ -0,0 +1,70 @@
+import numpy as np
+
+from detections import Detections
+from tracker import IoUTracker, TrackingDetector
+
+CLASS_NAMES = {0: 'Pesawat', 1: 'Burung', 2: 'Drone', 3: 'Helikopter'}
+
+
+def detections(boxes, class_ids=None):
+    class_ids = class_ids or [2] * len(boxes)
+    return Detections(boxes, [0.9] * len(boxes), class_ids, CLASS_NAMES)
+
+
+def test_tracker_keeps_ids_across_frames():
+    tracker = IoUTracker(CLASS_NAMES)
+
+    current, new = tracker.update(detections([[0, 0, 20, 20], [100, 100, 130, 120]]))
+    np.testing.assert_array_equal(current.track_ids, [1, 2])
+    np.testing.assert_array_equal(new.track_ids, [1, 2])
+
+    # Both objects moved a little; a third appeared far away
+    current, new = tracker.update(detections([[103, 101, 133, 121], [2, 1, 22, 21], [200, 0, 220, 20]]))
+    left = dict(zip(current.track_ids.tolist(), current.boxes[:, 0].tolist()))
+    assert sorted(left) == [1, 2, 3]
+    assert left[1] < 5
+    assert left[2] > 100
+    assert left[3] == 200
+    np.testing.assert_array_equal(new.track_ids, [3])
+
+
+def test_tracker_does_not_match_across_classes():
+    tracker = IoUTracker(CLASS_NAMES)
+    tracker.update(detections([[0, 0, 20, 20]], class_ids=[2]))
+
+    current, new = tracker.update(detections([[0, 0, 20, 20]], class_ids=[1]))
+
+    np.testing.assert_array_equal(new.track_ids, [2])
+
+
+class CountingDetector:
+    """Finds the same Drone on every frame and counts how often it runs"""
+    class_names = CLASS_NAMES
+
+    def __init__(self):
+        self.calls = 0
+
+    def detect(self, frame, confidence_threshold=0.5, roi=None):
+        self.calls += 1
+        return frame
+
+    def process_results(self, results, render=True):
+        return None, detections([[10, 10, 30, 30]])
+
+
+def test_tracking_detector_runs_the_model_every_detect_interval_frames():
+    detector = CountingDetector()
+    tracking = TrackingDetector(detector, detect_interval=3, render=False)
+    frame = np.zeros((40, 40, 3), dtype=np.uint8)
+
+    ran = []
+    track_ids = []
+    for _ in range(7):
+        _, tracked, _, detected = tracking.process(frame)
+        ran.append(detected)
+        track_ids.append(tracked.track_ids.tolist())
+
+    assert ran == [True, False, False, True, False, False, True]
+    assert detector.calls == 3
+    # Propagated frames keep the object under its id
+    assert track_ids == [[1]] * 7
@@ -0,0 +1,59 @@
+import numpy as np
+
+from detections import Detections
+from utils import DetectionCounter, RollingWindow
+
+CLASS_NAMES = {0: 'Pesawat', 1: 'Burung', 2: 'Drone', 3: 'Helikopter'}
+
+
+def drones(count, track_ids=None):
+    return Detections(np.tile([0, 0, 10, 10], (count, 1)), [0.9] * count, [2] * count, CLASS_NAMES,
+                      track_ids=track_ids)
+
+
+def test_rolling_window_evicts_bins_that_fall_out_of_the_ring():
+    window = RollingWindow(('a', 'b'), bin_seconds=1.0, bins=3)
+    window.add(np.array([1, 0]), now=0.5)
+    window.add(np.array([0, 2]), now=1.2)
+    window.add(np.array([1, 1]), now=2.9)
+
+    np.testing.assert_array_equal(window.total(3, now=2.9), [2, 3])
+    np.testing.assert_array_equal(window.total(1, now=2.9), [1, 1])
+
+    # Second 3 reuses the slot of second 0
+    window.add(np.array([5, 0]), now=3.1)
+    np.testing.assert_array_equal(window.total(3, now=3.1), [6, 3])
+    np.testing.assert_array_equal(window.total(10, now=3.1), [6, 3])
+    # Slots still holding old bins don't count once the window has moved past them
+    np.testing.assert_array_equal(window.total(3, now=5.0), [5, 0])
+    np.testing.assert_array_equal(window.total(3, now=10.0), [0, 0])
+
+
+def test_window_counts_cover_the_last_minute_and_quarter_hour():
+    now = [1000.0]
+    counter = DetectionCounter(clock=lambda: now[0])
+    counter.update(drones(2))
+    now[0] += 30
+    counter.update(drones(1))
+    now[0] += 45
+
+    assert counter.window_counts(60)['Drone'] == 1
+    assert counter.window_counts(15 * 60)['Drone'] == 3
+    assert counter.session_counts['Drone'] == 3
+    # Frame counts are the last frame only
+    assert counter.frame_counts['Drone'] == 1
+
+    now[0] += 15 * 60
+    assert counter.window_counts(60)['Drone'] == 0
+    assert counter.window_counts(15 * 60)['Drone'] == 0
+    assert counter.session_counts['Drone'] == 3
+
+
+def test_tracked_objects_are_counted_once():
+    counter = DetectionCounter(clock=lambda: 0.0)
+    counter.update(drones(2, track_ids=[1, 2]))
+    counter.update(drones(2, track_ids=[1, 2]))
+    counter.update(drones(2, track_ids=[2, 3]))
+
+    assert counter.session_counts['Drone'] == 3
+    assert counter.window_counts(60)['Drone'] == 3
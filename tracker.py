@@ -0,0 +1,201 @@
+from typing import List, Tuple
+
+import numpy as np
+
+from detections import Detections
+
+
+def iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU between two (N, 4) and (M, 4) xyxy box arrays"""
+    if len(boxes_a) == 0 or len(boxes_b) == 0:
+        return np.zeros((len(boxes_a), len(boxes_b)), dtype=np.float32)
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    area_a = np.prod(boxes_a[:, 2:] - boxes_a[:, :2], axis=1)
+    area_b = np.prod(boxes_b[:, 2:] - boxes_b[:, :2], axis=1)
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return intersection / np.maximum(union, 1e-6)
+
+
+class Track:
+    """A single tracked object with a constant-velocity (alpha-beta) motion model"""
+
+    def __init__(self, track_id: int, box: np.ndarray, score: float, class_id: int):
+        self.track_id = track_id
+        self.box = box.astype(np.float32)
+        self.velocity = np.zeros(4, dtype=np.float32)
+        self.score = score
+        self.class_id = class_id
+        self.hits = 1
+        self.misses = 0
+
+    def predict(self, decay: float):
+        self.box = self.box + self.velocity
+        self.score *= decay
+        self.misses += 1
+
+    def update(self, box: np.ndarray, score: float, alpha: float, beta: float):
+        # predict() has already advanced the box to this frame, so the residual is the
+        # innovation accumulated over the frames since the last detection
+        steps = max(self.misses, 1)
+        residual = box - self.box
+        self.box = self.box + alpha * residual
+        self.velocity = self.velocity + beta * residual / steps
+        self.score = score
+        self.hits += 1
+        self.misses = 0
+
+
+class IoUTracker:
+    """Greedy IoU multi-object tracker with motion prediction between detections.
+
+    Track ids increase monotonically, so "new unique objects" are simply the
+    tracks created by the latest :meth:`update`.
+    """
+
+    def __init__(self, class_names, iou_threshold: float = 0.3, max_missed: int = 15,
+                 alpha: float = 0.85, beta: float = 0.3, decay: float = 0.9):
+        self.class_names = class_names
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.alpha = alpha
+        self.beta = beta
+        self.decay = decay
+        self.reset()
+
+    def reset(self):
+        self.tracks: List[Track] = []
+        self._next_id = 1
+
+    def predict(self) -> Detections:
+        """Advance all tracks one frame without a detection"""
+        for track in self.tracks:
+            track.predict(self.decay)
+        self.tracks = [track for track in self.tracks if track.misses <= self.max_missed]
+        return self.to_detections()
+
+    def update(self, detections: Detections) -> Tuple[Detections, Detections]:
+        """Associate a frame's detections with tracks.
+
+        Returns (tracked detections for this frame, detections that started new tracks).
+        """
+        for track in self.tracks:
+            track.predict(self.decay)
+
+        matched_tracks, matched_detections = self._match(detections)
+        for track_index, detection_index in zip(matched_tracks, matched_detections):
+            self.tracks[track_index].update(
+                detections.boxes[detection_index], float(detections.scores[detection_index]),
+                self.alpha, self.beta
+            )
+
+        unmatched = np.setdiff1d(np.arange(len(detections)), matched_detections)
+        new_ids = []
+        for detection_index in unmatched:
+            track = Track(self._next_id, detections.boxes[detection_index],
+                          float(detections.scores[detection_index]),
+                          int(detections.class_ids[detection_index]))
+            self._next_id += 1
+            self.tracks.append(track)
+            new_ids.append(track.track_id)
+
+        self.tracks = [track for track in self.tracks if track.misses <= self.max_missed]
+
+        current = self.to_detections(only_matched=True)
+        new_tracks = current.filter(np.isin(current.track_ids, new_ids))
+        return current, new_tracks
+
+    def _match(self, detections: Detections):
+        if not self.tracks or not len(detections):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        track_boxes = np.stack([track.box for track in self.tracks])
+        track_classes = np.array([track.class_id for track in self.tracks])
+        iou = iou_matrix(track_boxes, detections.boxes)
+        iou[track_classes[:, None] != detections.class_ids[None, :]] = 0.0
+
+        track_indices, detection_indices = [], []
+        candidates = np.argwhere(iou >= self.iou_threshold)
+        order = np.argsort(-iou[candidates[:, 0], candidates[:, 1]], kind="stable")
+        used_tracks, used_detections = set(), set()
+        for track_index, detection_index in candidates[order]:
+            if track_index in used_tracks or detection_index in used_detections:
+                continue
+            used_tracks.add(track_index)
+            used_detections.add(detection_index)
+            track_indices.append(track_index)
+            detection_indices.append(detection_index)
+        return np.array(track_indices, dtype=np.int64), np.array(detection_indices, dtype=np.int64)
+
+    def to_detections(self, only_matched: bool = False) -> Detections:
+        tracks = [track for track in self.tracks if not only_matched or track.misses == 0]
+        if not tracks:
+            return Detections.empty(self.class_names)
+        return Detections(
+            np.stack([track.box for track in tracks]),
+            [track.score for track in tracks],
+            [track.class_id for track in tracks],
+            self.class_names,
+            track_ids=[track.track_id for track in tracks]
+        )
+
+    @property
+    def min_score(self) -> float:
+        return min((track.score for track in self.tracks), default=1.0)
+
+
+class TrackingDetector:
+    """Runs a DroneDetector every ``detect_interval`` frames and tracks objects in between.
+
+    The detector also runs early when the weakest track's decayed confidence
+    drops below ``min_track_confidence``. With ``render=False`` no annotated
+    frame is produced (None is returned in its place).
+    """
+
+    def __init__(self, detector, detect_interval: int = 5, min_track_confidence: float = 0.3,
+                 tracker: IoUTracker = None, render: bool = True):
+        self.detector = detector
+        self.render = render
+        self.detect_interval = max(int(detect_interval), 1)
+        self.min_track_confidence = min_track_confidence
+        self.tracker = tracker or IoUTracker(detector.class_names)
+        self._frames_since_detection = None
+
+    def reset(self):
+        self.tracker.reset()
+        self._frames_since_detection = None
+
+    def should_detect(self) -> bool:
+        return (
+            self._frames_since_detection is None
+            or self._frames_since_detection + 1 >= self.detect_interval
+            or self.tracker.min_score < self.min_track_confidence
+        )
+
+    def update(self, frame, detections: Detections):
+        """Feed detector output for ``frame``; returns (annotated, tracked, new_tracks)"""
+        self._frames_since_detection = 0
+        tracked, new_tracks = self.tracker.update(detections)
+        return self._annotate(frame, tracked), tracked, new_tracks
+
+    def propagate(self, frame):
+        """Advance tracks for a frame the detector did not see"""
+        if self._frames_since_detection is not None:
+            self._frames_since_detection += 1
+        tracked = self.tracker.predict()
+        return (self._annotate(frame, tracked), tracked,
+                Detections.empty(self.detector.class_names))
+
+    def _annotate(self, frame, tracked: Detections):
+        return self.detector.render(frame, tracked) if self.render else None
+
+    def process(self, frame, confidence_threshold: float = 0.5, run_detector: bool = None, roi=None):
+        """Detect or propagate for one frame; returns (annotated, tracked, new_tracks, detected)"""
+        if run_detector is None:
+            run_detector = self.should_detect()
+        if not run_detector:
+            return (*self.propagate(frame), False)
+        results = self.detector.detect(frame, confidence_threshold, roi=roi)
+        _, detections = self.detector.process_results(results, render=False)
+        return (*self.update(frame, detections), True)
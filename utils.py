@@ -1,6 +1,12 @@
 import cv2
+import math
 import time
-from typing import Dict, List, Tuple
+from collections import deque
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from detections import count_by_class
 
 def get_class_colors() -> Dict[str, str]:
     return {
@@ -19,60 +25,142 @@ def get_class_icons() -> Dict[str, str]:
     }
 
 class FPSCalculator:
-    """Helper class to calculate FPS"""
+    """Helper class to calculate FPS over a sliding window of frame times"""
     
     def __init__(self, buffer_size: int = 15):
         self.buffer_size = buffer_size
-        self.frame_times = []
-        self.last_time = time.time()
+        self.reset()
     
     def update(self) -> float:
         current_time = time.time()
         frame_time = current_time - self.last_time
         self.last_time = current_time
 
+        if len(self.frame_times) == self.buffer_size:
+            self._total -= self.frame_times[0]
         self.frame_times.append(frame_time)
-        
-        if len(self.frame_times) > self.buffer_size:
-            self.frame_times.pop(0)
+        self._total += frame_time
 
-        if len(self.frame_times) > 0:
-            avg_frame_time = sum(self.frame_times) / len(self.frame_times)
-            if avg_frame_time > 0:
-                return 1.0 / avg_frame_time
+        if len(self.frame_times) > 0 and self._total > 0:
+            return len(self.frame_times) / self._total
         
         return 0.0
     
     def reset(self):
         """Reset FPS calculator"""
-        self.frame_times = []
+        self.frame_times = deque(maxlen=self.buffer_size)
+        self._total = 0.0
         self.last_time = time.time()
 
-class DetectionCounter:    
-    def __init__(self):
+class RollingWindow:
+    """Per-class counts in a ring of ``bins`` time bins of ``bin_seconds`` each.
+
+    Adding is O(1): a slot still holding an older bin is zeroed when reused,
+    so memory stays constant however long the process runs.
+    """
+
+    def __init__(self, classes: Sequence[str], bin_seconds: float, bins: int):
+        self.classes = tuple(classes)
+        self.bin_seconds = bin_seconds
+        self.bins = bins
+        self.reset()
+
+    def reset(self):
+        self._counts = np.zeros((self.bins, len(self.classes)), dtype=np.int64)
+        # Absolute bin number each slot currently holds (-1 = empty)
+        self._bin_ids = np.full(self.bins, -1, dtype=np.int64)
+
+    @property
+    def span(self) -> float:
+        return self.bin_seconds * self.bins
+
+    def add(self, counts: np.ndarray, now: float):
+        bin_id = int(now // self.bin_seconds)
+        slot = bin_id % self.bins
+        if self._bin_ids[slot] != bin_id:
+            self._bin_ids[slot] = bin_id
+            self._counts[slot] = 0
+        self._counts[slot] += counts
+
+    def total(self, seconds: float, now: float) -> np.ndarray:
+        """Counts over the last ``seconds`` (rounded up to whole bins, current bin included)"""
+        bin_id = int(now // self.bin_seconds)
+        window = min(max(int(math.ceil(seconds / self.bin_seconds)), 1), self.bins)
+        valid = (self._bin_ids > bin_id - window) & (self._bin_ids <= bin_id)
+        return self._counts[valid].sum(axis=0)
+
+
+class DetectionCounter:
+    """Frame, session and time-windowed per-class detection counts.
+
+    Session detections also go into two ring buffers of per-second and
+    per-minute bins, so "last 60 s" or "last 15 min" totals and rates take
+    constant time and memory, however long the session runs.
+    """
+
+    def __init__(self, classes: Sequence[str] = None, clock: Callable[[], float] = time.monotonic):
+        self.classes = tuple(classes or get_class_icons())
+        self.clock = clock
+        self._seconds = RollingWindow(self.classes, 1.0, 60)
+        self._minutes = RollingWindow(self.classes, 60.0, 60)
         self.reset()
     
     def reset(self):
         """Reset all counters"""
-        self.session_counts = {'Pesawat': 0, 'Burung': 0, 'Drone': 0, 'Helikopter': 0}
-        self.total_counts = {'Pesawat': 0, 'Burung': 0, 'Drone': 0, 'Helikopter': 0}
-        self.frame_counts = {'Pesawat': 0, 'Burung': 0, 'Drone': 0, 'Helikopter': 0}
+        self.session_counts = dict.fromkeys(self.classes, 0)
+        self.total_counts = dict.fromkeys(self.classes, 0)
+        self.frame_counts = dict.fromkeys(self.classes, 0)
+        self._last_track_id = 0
+        self._seconds.reset()
+        self._minutes.reset()
+        self.started = self.clock()
+    
+    def update(self, detections, now: float = None):
+        """Update frame, session and windowed counts for one frame"""
+        self.update_frame_counts(detections)
+        self.update_session_counts(detections, now)
     
     def update_frame_counts(self, detections: List[Dict]):
         """Update counts for current frame"""
+        counts = count_by_class(detections)
         for key in self.frame_counts:
-            self.frame_counts[key] = 0
-        for detection in detections:
-            class_name = detection.get('class_name', '')
-            if class_name in self.frame_counts:
-                self.frame_counts[class_name] += 1
+            self.frame_counts[key] = counts.get(key, 0)
     
-    def update_session_counts(self, detections: List[Dict]):
-        """Update session total counts"""
-        for detection in detections:
-            class_name = detection.get('class_name', '')
+    def update_session_counts(self, detections: List[Dict], now: float = None):
+        """Update session total counts
+
+        Tracked detections (with track ids) are counted once per unique track.
+        Track ids only ever increase, so remembering the highest id seen keeps
+        this constant-memory.
+        """
+        track_ids = getattr(detections, 'track_ids', None)
+        if track_ids is not None and len(track_ids):
+            new = track_ids > self._last_track_id
+            self._last_track_id = max(self._last_track_id, int(track_ids.max()))
+            detections = detections.filter(new)
+        counts = count_by_class(detections)
+        if not counts:
+            return
+        for class_name, count in counts.items():
             if class_name in self.session_counts:
-                self.session_counts[class_name] += 1
+                self.session_counts[class_name] += count
+        now = self.clock() if now is None else now
+        vector = np.array([counts.get(class_name, 0) for class_name in self.classes], dtype=np.int64)
+        self._seconds.add(vector, now)
+        self._minutes.add(vector, now)
+    
+    def window_counts(self, seconds: float, now: float = None) -> Dict[str, int]:
+        """Per-class counts over the last ``seconds``: 1 s resolution up to a minute, 1 min up to an hour"""
+        now = self.clock() if now is None else now
+        window = self._seconds if seconds <= self._seconds.span else self._minutes
+        return dict(zip(self.classes, window.total(seconds, now).tolist()))
+    
+    def window_rates(self, seconds: float, now: float = None) -> Dict[str, float]:
+        """Per-class detections per minute over the last ``seconds`` (or the session, if shorter)"""
+        now = self.clock() if now is None else now
+        elapsed = min(seconds, max(now - self.started, 1.0))
+        return {class_name: count * 60.0 / elapsed
+                for class_name, count in self.window_counts(seconds, now).items()}
     
     def get_frame_summary(self) -> str:
         total = sum(self.frame_counts.values())
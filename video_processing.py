@@ -0,0 +1,121 @@
+"""Sequential video file processing.
+
+``process_video`` decodes a file in order, runs frames through the model in
+batches, renders and encodes the result. It has no UI dependency: progress
+and preview frames go to callbacks, as with
+``parallel_video.process_video_parallel``, which must match its output.
+"""
+import tempfile
+import time
+from typing import Callable, Iterable, Iterator
+
+from detections import Detections
+from video_reader import VideoReader
+from video_writer import open_writer
+
+
+def timed_frames(frames: Iterable, stage_callback: Callable[[str, float], None]) -> Iterator:
+    """Yield from ``frames``, reporting the wait for each one as ("decode", milliseconds)"""
+    frames = iter(frames)
+    while True:
+        start = time.perf_counter()
+        try:
+            captured = next(frames)
+        except StopIteration:
+            return
+        stage_callback("decode", (time.perf_counter() - start) * 1000)
+        yield captured
+
+
+def process_video(video_path, detector, confidence, batch_size=8, motion_gate=None, tracking=None,
+                  stride=1, start_time=0.0, end_time=None, reader_backend="opencv", highlights_only=False,
+                  pre_seconds=1.0, post_seconds=2.0, progress_callback: Callable[[float], None] = None,
+                  frame_callback: Callable[[int, object], None] = None,
+                  stage_callback: Callable[[str, float], None] = None):
+    """Process video file for detection, running frames through the model in batches.
+
+    With a motion_gate, static frames skip inference and are written unannotated.
+    With tracking (a TrackingDetector), the model only sees every detect_interval-th
+    frame, boxes are propagated in between, and the returned detections hold one
+    entry per unique track instead of one per frame occurrence.
+    Only every stride-th frame between start_time and end_time is decoded and
+    analysed; detections carry their original frame index and timestamp.
+    Encoding runs on a background writer thread; with highlights_only the output
+    holds just the segments around detections, padded by pre/post_seconds.
+    stage_callback receives ("decode" | "encode", milliseconds) per frame; encode
+    times come from the writer thread.
+    Returns (output_path, concatenated Detections).
+    """
+    reader = VideoReader(video_path, stride, start_time, end_time, backend=reader_backend)
+    total_frames = max(reader.expected_frames, 1)
+    batch_size = max(int(batch_size), 1)
+
+    all_detections = []
+    frame_count = 0
+
+    # Create output video writer
+    temp_output = tempfile.NamedTemporaryFile(delete=False, suffix='.mp4')
+    out = open_writer(temp_output.name, reader.output_fps, (reader.width, reader.height),
+                      detector.output_channels, highlights_only, pre_seconds, post_seconds,
+                      stage_callback=stage_callback)
+
+    def flush(batch):
+        nonlocal frame_count
+        to_infer = [captured.frame for captured, infer in batch if infer]
+        processed = []
+        if to_infer:
+            results = detector.detect_batch(to_infer, confidence)
+            processed = detector.process_batch_results(results, render=tracking is None)
+            if len(processed) != len(to_infer):
+                processed = [(None, Detections.empty(detector.class_names))] * len(to_infer)
+        processed = iter(processed)
+
+        for captured, infer in batch:
+            frame = captured.frame
+            if infer:
+                annotated_frame, detections = next(processed)
+                visible = detections
+                if motion_gate is not None:
+                    motion_gate.record_detections(len(detections))
+                if tracking is not None:
+                    annotated_frame, visible, detections = tracking.update(frame, detections)
+            elif tracking is not None:
+                annotated_frame, visible, detections = tracking.propagate(frame)
+            else:
+                annotated_frame = detector.to_output_channels(frame)
+                detections = visible = Detections.empty(detector.class_names)
+
+            if annotated_frame is not None:
+                out.write(annotated_frame, len(visible) > 0)
+                if frame_callback is not None:
+                    frame_callback(frame_count, annotated_frame)
+
+            all_detections.append(detections.set_frame(captured.frame_id, captured.timestamp))
+            frame_count += 1
+
+        if progress_callback is not None:
+            progress_callback(min(frame_count / total_frames, 1.0))
+
+    try:
+        batch = []
+        frames_read = 0
+        frames = reader if stage_callback is None else timed_frames(reader, stage_callback)
+        for captured in frames:
+            # Batching needs the decision up front, so tracking uses a fixed detect schedule here
+            infer = tracking is None or frames_read % tracking.detect_interval == 0
+            if infer and motion_gate is not None:
+                infer = motion_gate.should_infer(captured.frame)
+            batch.append((captured, infer))
+            frames_read += 1
+            if len(batch) == batch_size:
+                flush(batch)
+                batch = []
+
+        if batch:
+            flush(batch)
+
+    finally:
+        reader.close()
+        out.close()
+
+    return temp_output.name, Detections.concatenate(all_detections, detector.class_names)
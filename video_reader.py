@@ -0,0 +1,171 @@
+"""Frame-stride and time-range aware video file reading.
+
+``VideoReader`` yields ``CapturedFrame(frame_id, timestamp, frame)``, where
+``frame_id`` is the frame's index in the original file and ``timestamp`` its
+position in seconds. Results can therefore be mapped back to the source even
+when frames are skipped. It seeks straight to the start of the range.
+
+Two backends:
+
+* ``opencv``: skipped frames are only ``grab()``-ed. They are demuxed and
+  decoded, which reference frames need anyway, but never retrieved or
+  converted to BGR.
+* ``ffmpeg`` (needs the ``ffmpeg`` binary on PATH): an ``ffmpeg`` pipe. The
+  input seek is frame-accurate (ffmpeg jumps to the preceding keyframe and
+  decodes, but doesn't output, the frames up to the start), and unwanted
+  frames are dropped inside the filter graph, so they are never scaled,
+  converted or copied into Python.
+  ``auto`` picks it when available and frames are being skipped.
+"""
+import math
+import shutil
+import subprocess
+from functools import lru_cache
+from typing import Iterator, Optional
+
+import cv2
+import numpy as np
+
+from pipeline import CapturedFrame
+
+READERS = ("opencv", "ffmpeg", "auto")
+
+
+@lru_cache(maxsize=1)
+def passthrough_options() -> tuple:
+    """Options that keep ffmpeg from duplicating or dropping frames to a constant rate
+
+    ``-fps_mode`` (ffmpeg 5.1+) replaces the deprecated ``-vsync``; older builds only know the latter.
+    """
+    try:
+        help_text = subprocess.run(["ffmpeg", "-hide_banner", "-h", "long"], capture_output=True,
+                                   text=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        help_text = ""
+    return ("-fps_mode", "passthrough") if "-fps_mode" in help_text else ("-vsync", "0")
+
+
+class VideoReader:
+    """Iterate over every ``stride``-th frame of a video file within a time range.
+
+    ``start_frame``/``end_frame`` (end exclusive) override ``start_time``/``end_time``
+    when given, e.g. for chunked processing.
+    """
+
+    def __init__(self, path: str, stride: int = 1, start_time: float = 0.0, end_time: Optional[float] = None,
+                 start_frame: Optional[int] = None, end_frame: Optional[int] = None, backend: str = "opencv"):
+        if backend not in READERS:
+            raise ValueError(f"Unknown video reader {backend!r}, expected one of {READERS}")
+        self.path = path
+        self.stride = max(int(stride), 1)
+
+        cap = cv2.VideoCapture(path)
+        if not cap.isOpened():
+            raise RuntimeError(f"Cannot open video: {path}")
+        self.fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.frame_count = max(int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), 0)
+        self._cap = cap
+
+        self.start_frame = start_frame if start_frame is not None else int(round(max(start_time, 0.0) * self.fps))
+        if end_frame is None and end_time is not None:
+            end_frame = int(round(end_time * self.fps))
+        self.end_frame = end_frame
+
+        if backend == "auto":
+            backend = "ffmpeg" if self.stride > 1 and shutil.which("ffmpeg") else "opencv"
+        self.backend = backend
+
+    @property
+    def output_fps(self) -> float:
+        """Frame rate of the yielded sequence, which keeps the original duration"""
+        return self.fps / self.stride
+
+    @property
+    def expected_frames(self) -> int:
+        """Frames this reader should yield, from the container's (approximate) frame count"""
+        end = self.frame_count
+        if self.end_frame is not None:
+            end = min(end, self.end_frame) if end else self.end_frame
+        return max(math.ceil((end - self.start_frame) / self.stride), 0)
+
+    def timestamp(self, frame_index: int) -> float:
+        return frame_index / self.fps
+
+    def __iter__(self) -> Iterator[CapturedFrame]:
+        if self.backend == "ffmpeg":
+            return self._iter_ffmpeg()
+        return self._iter_opencv()
+
+    def _iter_opencv(self) -> Iterator[CapturedFrame]:
+        cap = self._cap
+        if self.start_frame:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, self.start_frame)
+        index = self.start_frame
+        while self.end_frame is None or index < self.end_frame:
+            if (index - self.start_frame) % self.stride:
+                if not cap.grab():
+                    break
+            else:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                if index == self.start_frame and self.start_frame:
+                    self._check_seek(cap)
+                yield CapturedFrame(index, self.timestamp(index), frame)
+            index += 1
+
+    def _check_seek(self, cap):
+        """Fail if the seek landed elsewhere; the position is that of the frame after the one just read"""
+        landed = int(cap.get(cv2.CAP_PROP_POS_FRAMES)) - 1
+        if landed >= 0 and landed != self.start_frame:
+            raise RuntimeError(f"Seek to frame {self.start_frame} of {self.path} landed on frame {landed}")
+
+    def _iter_ffmpeg(self) -> Iterator[CapturedFrame]:
+        command = ["ffmpeg", "-v", "error", "-nostdin"]
+        if self.start_frame:
+            command += ["-ss", f"{self.start_frame / self.fps:.6f}"]
+        command += ["-i", self.path, "-an", *passthrough_options()]
+        if self.stride > 1:
+            command += ["-vf", f"select=not(mod(n\\,{self.stride}))"]
+        if self.end_frame is not None:
+            command += ["-frames:v", str(max(math.ceil((self.end_frame - self.start_frame) / self.stride), 0))]
+        command += ["-f", "rawvideo", "-pix_fmt", "bgr24", "pipe:1"]
+
+        frame_bytes = self.width * self.height * 3
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, bufsize=frame_bytes * 2)
+        try:
+            index = self.start_frame
+            while True:
+                # A fresh writable buffer per frame: downstream renderers draw in place
+                buffer = bytearray(frame_bytes)
+                if not self._read_exact(process.stdout, buffer):
+                    break
+                frame = np.frombuffer(buffer, dtype=np.uint8).reshape(self.height, self.width, 3)
+                yield CapturedFrame(index, self.timestamp(index), frame)
+                index += self.stride
+        finally:
+            process.stdout.close()
+            process.kill()
+            process.wait()
+
+    @staticmethod
+    def _read_exact(stream, buffer: bytearray) -> bool:
+        view = memoryview(buffer)
+        filled = 0
+        while filled < len(buffer):
+            read = stream.readinto(view[filled:])
+            if not read:
+                return False
+            filled += read
+        return True
+
+    def close(self):
+        self._cap.release()
+
+    def __enter__(self) -> "VideoReader":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
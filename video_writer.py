@@ -0,0 +1,136 @@
+"""Video output off the detection thread.
+
+``BackgroundVideoWriter`` moves colour conversion and encoding to a writer
+thread fed by a bounded queue. The queue blocks instead of dropping when the
+encoder falls behind, because a file must keep every frame.
+``HighlightWriter`` builds on it and writes only the segments around frames
+with detections, padded by a pre-roll and post-roll, as one highlight clip.
+"""
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, List, Optional, Tuple
+
+import cv2
+
+
+class BackgroundVideoWriter:
+    """``cv2.VideoWriter`` running on its own thread.
+
+    ``stage_callback``, if given, is called on the writer thread with
+    ("encode", milliseconds) for every frame written.
+    """
+
+    def __init__(self, path: str, fps: float, size: Tuple[int, int], channels: str = "BGR",
+                 max_queue: int = 64, stage_callback: Callable[[str, float], None] = None):
+        self.path = path
+        self.channels = channels
+        self.stage_callback = stage_callback
+        self.frames_written = 0
+        self.error: Optional[Exception] = None
+        self._writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="video-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, frame, highlight: bool = True):
+        """Queue a frame; ``highlight`` is ignored (same signature as HighlightWriter)"""
+        if self.error is not None:
+            raise self.error
+        self._queue.put(frame)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        self._writer.release()
+        if self.error is not None:
+            raise self.error
+
+    def _run(self):
+        while True:
+            frame = self._queue.get()
+            if frame is None:
+                return
+            if self.error is not None:
+                continue
+            try:
+                start = time.perf_counter()
+                # Video writing needs BGR
+                self._writer.write(frame if self.channels == "BGR" else cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
+                self.frames_written += 1
+                if self.stage_callback is not None:
+                    self.stage_callback("encode", (time.perf_counter() - start) * 1000)
+            except Exception as e:
+                self.error = e
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class HighlightWriter:
+    """Writes only frames within ``pre_seconds``/``post_seconds`` of a highlighted frame.
+
+    The last ``pre_seconds`` of frames wait in a small ring buffer and are
+    flushed when a highlight starts. Each frame after a highlight keeps the
+    segment open for ``post_seconds``. ``segments`` lists the
+    (first, last) input frame numbers of every exported segment.
+    """
+
+    def __init__(self, path: str, fps: float, size: Tuple[int, int], channels: str = "BGR",
+                 pre_seconds: float = 1.0, post_seconds: float = 2.0, max_queue: int = 64,
+                 stage_callback: Callable[[str, float], None] = None):
+        self.writer = BackgroundVideoWriter(path, fps, size, channels, max_queue, stage_callback)
+        self.path = path
+        self.post_frames = int(round(post_seconds * fps))
+        self._pre_roll = deque(maxlen=max(int(round(pre_seconds * fps)), 0))
+        self._post_remaining = 0
+        self._index = 0
+        self.segments: List[Tuple[int, int]] = []
+
+    @property
+    def frames_written(self) -> int:
+        return self.writer.frames_written
+
+    def write(self, frame, highlight: bool = False):
+        index = self._index
+        self._index += 1
+        if highlight:
+            if self._post_remaining == 0:
+                first = index - len(self._pre_roll)
+                while self._pre_roll:
+                    self.writer.write(self._pre_roll.popleft())
+                self.segments.append((first, index))
+            self.writer.write(frame)
+            self.segments[-1] = (self.segments[-1][0], index)
+            self._post_remaining = self.post_frames + 1
+        elif self._post_remaining > 1:
+            self.writer.write(frame)
+            self.segments[-1] = (self.segments[-1][0], index)
+            self._post_remaining -= 1
+        else:
+            self._post_remaining = 0
+            self._pre_roll.append(frame)
+
+    def close(self):
+        self._pre_roll.clear()
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_writer(path: str, fps: float, size: Tuple[int, int], channels: str = "BGR",
+                highlights_only: bool = False, pre_seconds: float = 1.0, post_seconds: float = 2.0,
+                stage_callback: Callable[[str, float], None] = None):
+    """Full-length background writer, or a highlight writer when ``highlights_only``"""
+    if highlights_only:
+        return HighlightWriter(path, fps, size, channels, pre_seconds, post_seconds,
+                               stage_callback=stage_callback)
+    return BackgroundVideoWriter(path, fps, size, channels, stage_callback=stage_callback)